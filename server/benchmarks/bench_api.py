@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+イベント検索の計測
+
+イベント数を増やしながら、地域・ジャンル・日付で絞り込んで1ページ分を返すクエリの時間を、
+EventIndex（二次索引と二分探索）と、全件を走査して絞り込む従来の方式とで比較する。
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.event_index import EventIndex
+from fixtures import synthetic_events, ARTISTS
+
+
+def reference_query(events, region=None, genre=None, artist=None, date_from=None, date_to=None, offset=0, limit=50):
+    """従来の方式（全件を走査して絞り込み、日付で並べ替えてから切り出す）"""
+    matches = [
+        event for event in events
+        if (region is None or event['region'] == region)
+        and (genre is None or event['genre'] == genre)
+        and (artist is None or artist in event['artists'])
+        and (date_from is None or event['date'] >= date_from)
+        and (date_to is None or event['date'] <= date_to)
+    ]
+    matches.sort(key=lambda event: (event['date'], event['id']))
+    return len(matches), matches[offset:offset + limit]
+
+
+def make_queries(count, seed=0):
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        month = rng.randint(1, 12)
+        query = {'date_from': f"2024-{month:02d}-01", 'date_to': f"2024-{month:02d}-28"}
+        choice = rng.random()
+        if choice < 0.4:
+            query['region'] = rng.choice(['東京', '大阪', '札幌'])
+        elif choice < 0.7:
+            query['region'] = rng.choice(['東京', '大阪', '札幌'])
+            query['genre'] = rng.choice(['ロック', 'ジャズ', 'ポップ'])
+        else:
+            query['artist'] = rng.choice(ARTISTS)
+        queries.append(query)
+    return queries
+
+
+def measure(run, queries):
+    """クエリごとの時間（ミリ秒）の中央値と99パーセンタイル"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='イベント検索のベンチマーク')
+    parser.add_argument('--sizes', type=str, default='10000,100000,1000000',
+                        help='イベント数（カンマ区切り、デフォルト: 10000,100000,1000000）')
+    parser.add_argument('--queries', type=int, default=1000, help='索引で実行するクエリ数（デフォルト: 1000）')
+    parser.add_argument('--reference-queries', type=int, default=20, help='全件走査で実行するクエリ数（デフォルト: 20）')
+    args = parser.parse_args()
+
+    print(f"{'events':>8} {'index build':>12} {'index p50':>10} {'index p99':>10} {'scan p50':>10}")
+    for size in (int(size) for size in args.sizes.split(',')):
+        events = synthetic_events(size)
+        start = time.perf_counter()
+        index = EventIndex(events)
+        build = time.perf_counter() - start
+
+        queries = make_queries(args.queries)
+        for query in queries[:args.reference_queries]:
+            assert index.query(**query) == reference_query(events, **query), query
+        index_p50, index_p99 = measure(lambda query: index.query(**query), queries)
+        scan_p50, _ = measure(lambda query: reference_query(events, **query), queries[:args.reference_queries])
+        print(f"{size:>8} {build:11.2f}s {index_p50:8.3f}ms {index_p99:8.3f}ms {scan_p50:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+変更履歴の計測
+
+合成イベントで前回の実行を記録したあと、一部のイベントを追加・更新・削除して ChangeFeed に記録し、
+利用側が前回のカーソル以降の変更だけを読む時間を、events.json を全件読み込んで前回と比べる従来の方式と比較する。
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.change_feed import ChangeFeed
+from fixtures import synthetic_events
+
+
+def reference_diff(path, previous):
+    """従来の方式（events.jsonを全件読み込み、前回の全件とIDごとに比べる）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        current = {event['id']: event for event in json.load(f)}
+    changed = [event for event_id, event in current.items() if previous.get(event_id) != event]
+    deleted = [event_id for event_id in previous if event_id not in current]
+    return changed, deleted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='変更履歴のベンチマーク')
+    parser.add_argument('--events', type=int, default=100000, help='イベント数（デフォルト: 100000）')
+    parser.add_argument('--changes', type=int, default=100, help='追加・更新・削除するイベント数（デフォルト: 100）')
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp()
+    feed = ChangeFeed(os.path.join(directory, 'changes'))
+    events = synthetic_events(args.events)
+    start = time.perf_counter()
+    feed.record(events)
+    print(f"record (baseline):  {time.perf_counter() - start:.2f}s")
+    cursor = feed.head()
+    previous = {event['id']: event for event in events}
+
+    # 1/3ずつ追加・更新・削除する
+    rng = random.Random(0)
+    third = max(1, args.changes // 3)
+    positions = set(rng.sample(range(args.events), 2 * third))
+    deleted = set(list(positions)[:third])
+    current = [dict(event, price='¥0') if position in positions else event
+               for position, event in enumerate(events) if position not in deleted]
+    current.extend(synthetic_events(third, seed=1, start_id=args.events + 1))
+    path = os.path.join(directory, 'events.json')
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(current, f, ensure_ascii=False)
+
+    start = time.perf_counter()
+    counts = feed.record(current).counts
+    print(f"record ({sum(counts.values())} changes): {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    batch = feed.changes_since(cursor)
+    print(f"changes_since:      {(time.perf_counter() - start) * 1000:.2f}ms ({len(batch.changes)} changes)")
+    start = time.perf_counter()
+    changed, removed = reference_diff(path, previous)
+    print(f"reload + diff:      {(time.perf_counter() - start) * 1000:.2f}ms ({len(changed) + len(removed)} changes)")
+    assert len(batch.changes) == len(changed) + len(removed)
+
+
+if __name__ == "__main__":
+    main()
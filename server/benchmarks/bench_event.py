@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+イベントの保持形式（辞書 / Event）の計測
+
+events.jsonを読み込んだときと同じ辞書のリストと、正規化したEventのリストについて、
+1件あたりのメモリとJSONへの書き出し・読み込みのスループットを比較する。
+あわせて、パイプラインの正規化の段階（辞書 → Event → 辞書）にかかる時間を計測する。
+"""
+import sys
+import os
+import gc
+import json
+import time
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.event import normalize_events, dumps_events, loads_events
+from fixtures import synthetic_events
+
+
+def measure_memory(build):
+    """buildが返すオブジェクトが確保したメモリ（バイト）"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='イベントの保持形式のベンチマーク')
+    parser.add_argument('--events', type=int, default=1000000, help='イベント数（デフォルト: 1000000）')
+    args = parser.parse_args()
+
+    print(f"Generating {args.events} events...")
+    text = json.dumps(synthetic_events(args.events), ensure_ascii=False)
+
+    # 辞書: events.jsonを読み込んだ状態（文字列は読み込みごとに別のオブジェクトになる）
+    _, dict_bytes = measure_memory(lambda: json.loads(text))
+    # Event: 同じ内容を正規化した状態（読み込んだ辞書の分は含めない）
+    _, event_bytes = measure_memory(lambda: normalize_events(json.loads(text)))
+
+    print(f"dict:  {dict_bytes / args.events:8.1f} bytes/event")
+    print(f"Event: {event_bytes / args.events:8.1f} bytes/event ({event_bytes / dict_bytes:.0%} of dict)")
+
+    # スループットはtracemallocを止めた状態で計測する
+    dicts = json.loads(text)
+    events, normalize = timed(lambda: normalize_events(dicts))
+    _, to_dict = timed(lambda: [event.to_dict() for event in events])
+    print(f"normalize: {args.events / normalize:10.0f} events/s, to_dict {args.events / to_dict:10.0f} events/s")
+
+    dict_text, dict_dump = timed(lambda: json.dumps(dicts, ensure_ascii=False, separators=(',', ':')))
+    event_text, event_dump = timed(lambda: dumps_events(events))
+    _, dict_load = timed(lambda: json.loads(dict_text))
+    loaded, event_load = timed(lambda: loads_events(event_text))
+    assert loaded == events
+
+    for label, dump, load, size in (('dict', dict_dump, dict_load, len(dict_text)),
+                                    ('Event', event_dump, event_load, len(event_text))):
+        print(f"{label + ':':6} dump {args.events / dump:10.0f} events/s, "
+              f"load {args.events / load:10.0f} events/s, {size / args.events:6.1f} chars/event")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+ページ取得バックエンドのスループット計測
+
+ローカルのスタブサーバーから多数のページを取得し、
+逐次・スレッド並列・asyncの各バックエンドのページ/秒を比較する。
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.base_scraper import BaseScraper, PageJob
+from stub_server import StubServer
+
+
+PAGE = ('<html><body>' + ''.join(
+    f'<div class="event-item"><h3>Live {i}</h3><span class="date">2024-08-{i % 28 + 1:02d}</span></div>'
+    for i in range(20)
+) + '</body></html>').encode('utf-8')
+
+
+class StubScraper(BaseScraper):
+    """スタブサーバーのページ数だけを数えるスクレイパー"""
+    
+    def scrape_events(self, urls):
+        return self.scrape_pages([PageJob(url, '_parse_page') for url in urls])
+    
+    def _parse_page(self, soup):
+        return [{'name': h3.get_text()} for h3 in soup.find_all('h3')]
+
+
+def run(backend: str, workers: int, urls, rate: float) -> float:
+    scraper = StubScraper(urls[0])
+    scraper.fetch_backend = backend
+    scraper.workers = workers
+    scraper.request_rate = rate
+    scraper.request_burst = workers
+    scraper.max_concurrency = max(workers, 1) * 4
+    scraper.per_host_concurrency = max(workers, 1)
+    start = time.perf_counter()
+    events = scraper.scrape_events(urls)
+    elapsed = time.perf_counter() - start
+    assert len(events) == 20 * len(urls), f"{backend}: {len(events)} events"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ページ取得バックエンドのベンチマーク')
+    parser.add_argument('--pages', type=int, default=200, help='取得するページ数（デフォルト: 200）')
+    parser.add_argument('--latency', type=float, default=0.05, help='スタブサーバーの応答遅延秒数（デフォルト: 0.05）')
+    parser.add_argument('--rate', type=float, default=1000.0, help='1ホストあたりのリクエスト数/秒の上限（デフォルト: 1000）')
+    parser.add_argument('--workers', type=int, default=8, help='並列数（デフォルト: 8）')
+    args = parser.parse_args()
+    
+    with StubServer(lambda path: PAGE, latency=args.latency) as server:
+        urls = [f"{server.url}/page/{i}" for i in range(args.pages)]
+        for label, backend, workers in [
+            ('sync (sequential)', 'sync', 1),
+            (f'sync ({args.workers} threads)', 'sync', args.workers),
+            (f'async ({args.workers} per host)', 'async', args.workers),
+        ]:
+            elapsed = run(backend, workers, urls, args.rate)
+            print(f"{label:<24} {elapsed:8.2f}s  {args.pages / elapsed:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+ジャンル判定の計測
+
+東京・大阪スクレイパーの従来の _detect_genre と、キーワード表による GenreClassifier の
+スループットを、すべて異なるタイトルの場合と同じタイトルが繰り返し現れる場合とで比較する。
+"""
+import sys
+import os
+import time
+import random
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.genre import GenreClassifier
+from fixtures import TITLES, ARTISTS
+
+
+def reference_detect_genre(title, artists):
+    """従来のジャンル判定（キーワードごとにタイトルと出演者を走査する）"""
+    title_lower = title.lower()
+    artists_text = ' '.join(artists).lower()
+
+    if any(word in title_lower or word in artists_text for word in ['rock', 'ロック', 'rock']):
+        return "ロック"
+    elif any(word in title_lower or word in artists_text for word in ['jazz', 'ジャズ']):
+        return "ジャズ"
+    elif any(word in title_lower or word in artists_text for word in ['classical', 'クラシック', 'classic']):
+        return "クラシック"
+    elif any(word in title_lower or word in artists_text for word in ['edm', 'electronic', 'エレクトロ']):
+        return "EDM"
+    else:
+        return "ポップ"
+
+
+def make_items(count, distinct, seed=0):
+    """distinct種類の(タイトル, 出演者)からcount件を作る"""
+    rng = random.Random(seed)
+    pool = [(f"{rng.choice(TITLES)} {i}", rng.sample(ARTISTS, rng.randint(1, 4))) for i in range(distinct)]
+    if distinct >= count:
+        return pool[:count]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def run(label, items):
+    start = time.perf_counter()
+    expected = [reference_detect_genre(title, artists) for title, artists in items]
+    reference = time.perf_counter() - start
+
+    start = time.perf_counter()
+    genres = GenreClassifier().classify_many(items)
+    classifier = time.perf_counter() - start
+
+    assert genres == expected
+    print(f"{label}: reference {len(items) / reference:10.0f} titles/s, "
+          f"classifier {len(items) / classifier:10.0f} titles/s ({reference / classifier:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ジャンル判定のベンチマーク')
+    parser.add_argument('--titles', type=int, default=1000000, help='判定するタイトル数（デフォルト: 1000000）')
+    parser.add_argument('--distinct', type=int, default=10000, help='繰り返しありの場合の種類数（デフォルト: 10000）')
+    args = parser.parse_args()
+
+    run('unique  ', make_items(args.titles, args.titles))
+    run('repeated', make_items(args.titles, args.distinct))
+
+
+if __name__ == "__main__":
+    main()
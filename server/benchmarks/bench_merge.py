@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+ScraperManager.merge_events の計測
+
+大量の既存イベントに対して、一部が重複・一部が内容変更・残りが新規の
+イベントをマージする時間を、既存イベントを全件走査する従来の方式と比較する。
+"""
+import sys
+import os
+import time
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.scraper_manager import ScraperManager
+from fixtures import synthetic_events
+
+
+def reference_merge(new_events, existing_events):
+    """従来のマージ（新しいイベントごとに既存イベントを全件走査する）"""
+    merged = existing_events.copy()
+    for new_event in new_events:
+        is_duplicate = any(
+            existing.get('name') == new_event.get('name') and
+            existing.get('date') == new_event.get('date')
+            for existing in existing_events
+        )
+        if not is_duplicate:
+            merged.append(new_event)
+    return merged
+
+
+def make_new_events(existing, count, seed):
+    """既存の1/3をそのまま、1/3を価格変更で再取得し、残りを新規とする"""
+    third = count // 3
+    same = [dict(event) for event in existing[:third]]
+    changed = [dict(event, price='¥9999') for event in existing[third:2 * third]]
+    fresh = synthetic_events(count - 2 * third, seed=seed, start_id=len(existing) + 1)
+    return same + changed + fresh
+
+
+def main():
+    parser = argparse.ArgumentParser(description='merge_eventsのベンチマーク')
+    parser.add_argument('--existing', type=int, default=100000, help='既存イベント数（デフォルト: 100000）')
+    parser.add_argument('--new', type=int, default=3000, help='新しくスクレイピングしたイベント数（デフォルト: 3000）')
+    parser.add_argument('--reference-new', type=int, default=100,
+                        help='従来方式で計測する新規イベント数（全件走査のため少なめ、デフォルト: 100）')
+    args = parser.parse_args()
+    
+    existing = synthetic_events(args.existing)
+    manager = ScraperManager(data_dir=tempfile.mkdtemp(), use_cache=False)
+    
+    new_events = make_new_events(existing, args.new, seed=1)
+    start = time.perf_counter()
+    merged = manager.merge_events(new_events, existing)
+    elapsed = time.perf_counter() - start
+    print(f"hash index: {args.new} new x {args.existing} existing -> {len(merged)} events in {elapsed * 1000:.1f}ms "
+          f"({elapsed / args.new * 1e6:.1f}us/event) {manager.last_merge.stats()}")
+    
+    reference_events = make_new_events(existing, args.reference_new, seed=2)
+    start = time.perf_counter()
+    reference_merge(reference_events, existing)
+    elapsed = time.perf_counter() - start
+    print(f"reference:  {args.reference_new} new x {args.existing} existing in {elapsed * 1000:.1f}ms "
+          f"({elapsed / args.reference_new * 1e6:.1f}us/event)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+HTMLパーサーと parse_only フィルタの比較
+
+各地域の合成ページを html.parser / lxml、フィルタあり / なしで解析し、
+解析時間とピークメモリを計測する。どの組み合わせでも抽出結果が同じことも確認する。
+"""
+import sys
+import os
+import time
+import argparse
+import tracemalloc
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.sapporo_scraper import SapporoKyobunScraper
+from python_scrapers.tokyo_scraper import TokyoMusicScraper
+from python_scrapers.osaka_scraper import OsakaMusicScraper
+from fixtures import region_pages
+
+SCRAPERS = {cls.__name__: cls for cls in (SapporoKyobunScraper, TokyoMusicScraper, OsakaMusicScraper)}
+
+
+def comparable(events):
+    """アーティストの順序（setで重複除去しているため不定）を揃えて比較できる形にする"""
+    return [dict(event, artists=sorted(event['artists'])) for event in events]
+
+
+def parse(scraper, parser, args, content):
+    return getattr(scraper, parser)(scraper.make_soup(content), *args)
+
+
+def measure(scraper, parser, args, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        events = parse(scraper, parser, args, content)
+        timings.append(time.perf_counter() - start)
+    tracemalloc.start()
+    parse(scraper, parser, args, content)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='HTMLパーサーのベンチマーク')
+    parser.add_argument('--events', type=int, default=500, help='1ページあたりのイベント数（デフォルト: 500）')
+    parser.add_argument('--repeat', type=int, default=5, help='計測の繰り返し回数（デフォルト: 5）')
+    args = parser.parse_args()
+    
+    print(f"{'region':<8} {'parser':<12} {'strainer':<9} {'time':>9} {'peak mem':>10} {'events':>7}")
+    for region, class_name, method, method_args, content in region_pages(args.events):
+        scraper_cls = SCRAPERS[class_name]
+        baseline = None
+        for backend in ('html.parser', 'lxml'):
+            for use_strainer in (False, True):
+                if use_strainer and scraper_cls.parse_only is None:
+                    continue
+                scraper = scraper_cls()
+                scraper.parser_backend = backend
+                if not use_strainer:
+                    scraper.parse_only = None
+                elapsed, peak, events = measure(scraper, method, method_args, content, args.repeat)
+                if baseline is None:
+                    baseline = comparable(events)
+                elif comparable(events) != baseline:
+                    print(f"  ! {region} {backend} strainer={use_strainer}: 抽出結果が html.parser と異なります")
+                print(f"{region:<8} {backend:<12} {'on' if use_strainer else 'off':<9} "
+                      f"{elapsed * 1000:7.1f}ms {peak / 1024 / 1024:8.1f}MB {len(events):>7}")
+
+
+if __name__ == "__main__":
+    main()
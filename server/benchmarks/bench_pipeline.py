@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+取得・解析パイプラインの計測
+
+ローカルのスタブサーバーから重いイベント一覧ページを取得し、取得したスレッドで解析する場合と、
+解析をプロセスプールに任せて取得と並行に進める場合のページ/秒を比較する。
+"""
+import sys
+import os
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.base_scraper import PageJob
+from python_scrapers.parse_pool import ParsePool
+from python_scrapers.tokyo_scraper import TokyoMusicScraper
+from fixtures import listing_page
+from stub_server import StubServer
+
+
+def run(urls, workers: int, backend: str, parse_workers: int, rate: float):
+    scraper = TokyoMusicScraper()
+    scraper.workers = workers
+    scraper.fetch_backend = backend
+    scraper.request_rate = rate
+    scraper.request_burst = workers
+    scraper.max_concurrency = workers * 4
+    scraper.per_host_concurrency = workers
+    scraper.parse_pool = ParsePool(parse_workers) if parse_workers else None
+    jobs = [PageJob(url, '_parse_event_list') for url in urls]
+    try:
+        if scraper.parse_pool:
+            # ワーカープロセスの起動は計測に含めない
+            scraper.parse_pool.submit(scraper, '_parse_event_list', (), b'<html></html>').result()
+        start = time.perf_counter()
+        events = scraper.scrape_pages(jobs)
+        elapsed = time.perf_counter() - start
+    finally:
+        if scraper.parse_pool:
+            scraper.parse_pool.close()
+    return elapsed, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='取得・解析パイプラインのベンチマーク')
+    parser.add_argument('--pages', type=int, default=100, help='取得するページ数（デフォルト: 100）')
+    parser.add_argument('--events', type=int, default=300, help='1ページあたりのイベント数（デフォルト: 300）')
+    parser.add_argument('--latency', type=float, default=0.05, help='スタブサーバーの応答遅延秒数（デフォルト: 0.05）')
+    parser.add_argument('--rate', type=float, default=1000.0, help='1ホストあたりのリクエスト数/秒の上限（デフォルト: 1000）')
+    parser.add_argument('--workers', type=int, default=8, help='取得の並列数（デフォルト: 8）')
+    parser.add_argument('--parse-workers', type=int, default=os.cpu_count() or 2,
+                        help='解析プロセス数（デフォルト: CPU数）')
+    args = parser.parse_args()
+
+    page = listing_page(args.events)
+    with StubServer(lambda path: page, latency=args.latency) as server:
+        urls = [f"{server.url}/events/{i}" for i in range(args.pages)]
+        baseline = None
+        for backend in ('sync', 'async'):
+            for parse_workers in (0, args.parse_workers):
+                elapsed, events = run(urls, args.workers, backend, parse_workers, args.rate)
+                if baseline is None:
+                    baseline = len(events)
+                assert len(events) == baseline, f"{backend}/{parse_workers}: {len(events)} events"
+                label = f"{backend} + {f'{parse_workers} parse processes' if parse_workers else 'in-thread parse'}"
+                print(f"{label:<32} {elapsed:8.2f}s  {args.pages / elapsed:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+札幌教育文化会館の月別ページ抽出の計測
+
+大きな合成ページに対して、イベントごとに正規表現を繰り返し適用する従来の抽出と、
+1回の走査で抽出する現在の SapporoKyobunScraper._extract_event_elements を比較し、
+両者の出力が同じであることを確認する。
+"""
+import sys
+import os
+import re
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.sapporo_scraper import SapporoKyobunScraper
+from fixtures import sapporo_page
+
+
+class ReferenceExtractor:
+    """従来の抽出処理（イベントごとに日付以降のテキストへ複数の正規表現を適用する）"""
+    
+    def __init__(self, scraper: SapporoKyobunScraper):
+        self.scraper = scraper
+    
+    def extract(self, page_text: str):
+        events = []
+        date_pattern = r'(\d{4}年\d{1,2}月\d{1,2}日（[月火水木金土日]）)'
+        date_matches = list(re.finditer(date_pattern, page_text))
+        for i, date_match in enumerate(date_matches):
+            next_pos = date_matches[i + 1].start() if i + 1 < len(date_matches) else len(page_text)
+            event_text = page_text[date_match.start():next_pos]
+            events.append(self.parse(event_text, date_match.group(1)))
+        return events
+    
+    def parse(self, event_text: str, date_str: str):
+        venue_match = re.search(r'(大ホール|小ホール|ギャラリー)', event_text)
+        venue = venue_match.group(1) if venue_match else "不明"
+        genre_match = re.search(r'(音楽|洋舞・邦舞|展示|オペラ|演劇|その他)', event_text)
+        genre = genre_match.group(1) if genre_match else "その他"
+        title_start = event_text.find(date_str) + len(date_str)
+        title_end = len(event_text)
+        for pattern in [r'大ホール', r'小ホール', r'ギャラリー', r'音楽', r'洋舞・邦舞', r'展示', r'オペラ', r'演劇', r'【開場】', r'【開演】']:
+            match = re.search(pattern, event_text[title_start:])
+            if match and match.start() < title_end - title_start:
+                title_end = title_start + match.start()
+        title = event_text[title_start:title_end].strip() or "不明なイベント"
+        time_match = re.search(r'【開場】(\d{1,2}:\d{2})\s*【開演】(\d{1,2}:\d{2})', event_text)
+        time_str = f"{time_match.group(1)}開場・{time_match.group(2)}開演" if time_match else ""
+        artists = []
+        for pattern in [r'「([^」]+)」', r'『([^』]+)』', r'([^、。\n]+?)(?:＆|&)([^、。\n]+)']:
+            for match in re.findall(pattern, event_text):
+                if isinstance(match, tuple):
+                    artists.extend([m.strip() for m in match if m.strip()])
+                else:
+                    artists.append(match.strip())
+        return {
+            'name': title,
+            'date': date_str,
+            'time': time_str,
+            'location': f"札幌教育文化会館 {venue}",
+            'artists': sorted(set(artists)),
+            'price': '要確認',
+            'scale': self.scraper._estimate_scale(venue, genre),
+            'links': [],
+            'genre': self.scraper._normalize_genre(genre),
+            'region': '札幌',
+            'source': '札幌教育文化会館'
+        }
+
+
+def best_of(repeat, func, *args):
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='札幌スクレイパーの抽出処理のベンチマーク')
+    parser.add_argument('--sizes', type=str, default='100,1000,10000', help='1ページあたりのイベント数（カンマ区切り）')
+    parser.add_argument('--repeat', type=int, default=3, help='計測の繰り返し回数（デフォルト: 3）')
+    args = parser.parse_args()
+    
+    scraper = SapporoKyobunScraper()
+    reference = ReferenceExtractor(scraper)
+    print(f"{'events':>8} {'reference':>11} {'single-pass':>12} {'speedup':>8}  output")
+    for size in [int(value) for value in args.sizes.split(',')]:
+        # テキスト抽出（soup.get_text）は両方に共通なので計測から除く
+        soup = scraper.make_soup(sapporo_page(size))
+        page_text = soup.get_text()
+        soup.get_text = lambda: page_text
+        
+        reference_time, expected = best_of(args.repeat, reference.extract, page_text)
+        current_time, actual = best_of(args.repeat, scraper._extract_event_elements, soup)
+        actual = [dict(event, artists=sorted(event['artists'])) for event in actual]
+        status = 'identical' if actual == expected else 'MISMATCH'
+        print(f"{size:>8} {reference_time * 1000:9.1f}ms {current_time * 1000:10.1f}ms "
+              f"{reference_time / current_time:7.1f}x  {status}")
+        if status == 'MISMATCH':
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+全文検索索引の計測
+
+合成イベントから SearchIndex を作り、イベント名・出演者名の検索で上位k件を返す時間を、
+全イベントの名前と出演者を走査する従来の方式と比較する。保存・読み込みの時間も計測する。
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.dedup import normalize_text
+from python_scrapers.search_index import SearchIndex
+from fixtures import synthetic_events, TITLES, ARTISTS
+
+
+def reference_search(events, query, limit):
+    """従来の方式（全イベントの名前と出演者に検索語が含まれるかを順に調べる）"""
+    text = normalize_text(query)
+    results = []
+    for event in events:
+        if text in normalize_text(event['name']) or any(text in normalize_text(artist) for artist in event['artists']):
+            results.append(event['id'])
+            if len(results) >= limit:
+                break
+    return results
+
+
+def make_queries(count, size, seed=0):
+    """タイトルの一部・出演者名・出演者名の一部・ほぼ一意なイベント番号を混ぜた検索語"""
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(count):
+        choice = rng.random()
+        if choice < 0.3:
+            title = rng.choice(TITLES)
+            start = rng.randrange(0, max(1, len(title) - 2))
+            queries.append(title[start:start + rng.randint(2, 4)])
+        elif choice < 0.5:
+            queries.append(rng.choice(ARTISTS))
+        elif choice < 0.7:
+            artist = rng.choice(ARTISTS)
+            queries.append(artist[:max(2, len(artist) // 2)])
+        else:
+            queries.append(f"0-{rng.randrange(size)}")
+    return queries
+
+
+def measure(run, queries):
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        run(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[max(0, int(len(timings) * 0.99) - 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='全文検索索引のベンチマーク')
+    parser.add_argument('--events', type=int, default=1000000, help='イベント数（デフォルト: 1000000）')
+    parser.add_argument('--queries', type=int, default=1000, help='索引で実行する検索数（デフォルト: 1000）')
+    parser.add_argument('--reference-queries', type=int, default=20, help='全件走査で実行する検索数（デフォルト: 20）')
+    parser.add_argument('--top', type=int, default=20, help='返す件数（デフォルト: 20）')
+    args = parser.parse_args()
+
+    events = synthetic_events(args.events)
+    directory = tempfile.mkdtemp()
+    index = SearchIndex(directory)
+    start = time.perf_counter()
+    index.rebuild(events)
+    print(f"build + save: {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    index = SearchIndex.open(directory)
+    print(f"load:         {time.perf_counter() - start:.2f}s")
+
+    queries = make_queries(args.queries, args.events)
+    for query in queries[:args.reference_queries]:
+        # 索引はスコア順、従来の方式は先頭からの順のため、件数が足りる検索語は同じ集合になるとは限らない
+        found = {event_id for event_id, _ in index.search(query, args.events)}
+        assert found == set(reference_search(events, query, args.events)), query
+    p50, p99 = measure(lambda query: index.search(query, args.top), queries)
+    print(f"index top-{args.top}:  p50 {p50:.3f}ms  p99 {p99:.3f}ms")
+    p50, p99 = measure(lambda query: reference_search(events, query, args.top), queries[:args.reference_queries])
+    print(f"scan top-{args.top}:   p50 {p50:.3f}ms  p99 {p99:.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
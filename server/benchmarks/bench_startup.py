@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+CLIの起動時間の計測
+
+新しいPythonプロセスで ScraperManager を作成し、スクレイピングを始められる状態になるまでの時間を、
+1地域だけを指定した場合と全地域の場合とで比較する（ネットワークには接続しない）。
+"""
+import sys
+import os
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SETUP = """
+import sys
+sys.path.insert(0, {server_dir!r})
+from python_scrapers.scraper_manager import ScraperManager
+manager = ScraperManager(data_dir={data_dir!r}, regions={regions!r})
+for region in manager.regions:
+    manager.get_scraper(region)
+"""
+
+# 従来と同じく全スクレイパーのモジュールを読み込んで作成する
+EAGER = """
+import sys
+sys.path.insert(0, {server_dir!r})
+from python_scrapers.tokyo_scraper import TokyoMusicScraper
+from python_scrapers.osaka_scraper import OsakaMusicScraper
+from python_scrapers.sapporo_scraper import SapporoKyobunScraper
+scrapers = [SapporoKyobunScraper(), TokyoMusicScraper(), OsakaMusicScraper()]
+"""
+
+
+def measure(code, repeat):
+    """コードを新しいプロセスで実行した時間の中央値（ミリ秒）"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], check=True, stdout=subprocess.DEVNULL)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CLI起動時間のベンチマーク')
+    parser.add_argument('--repeat', type=int, default=10, help='各条件の実行回数（デフォルト: 10）')
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp()
+    cases = [
+        ('python only', 'pass'),
+        ('--help', f"import sys, runpy; sys.argv = ['run_python_scraper.py', '--help']\n"
+                   f"try:\n    runpy.run_path({os.path.join(SERVER_DIR, 'run_python_scraper.py')!r}, run_name='__main__')\n"
+                   f"except SystemExit:\n    pass"),
+        ('eager (all)', EAGER.format(server_dir=SERVER_DIR)),
+        ('registry all', SETUP.format(server_dir=SERVER_DIR, data_dir=data_dir, regions=None)),
+        ('registry tokyo', SETUP.format(server_dir=SERVER_DIR, data_dir=data_dir, regions=['tokyo'])),
+        ('registry sapporo', SETUP.format(server_dir=SERVER_DIR, data_dir=data_dir, regions=['sapporo'])),
+    ]
+    for label, code in cases:
+        print(f"{label:18} {measure(code, args.repeat):7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+オフラインのベンチマークスイート
+
+各地域のスクレイパーに合成ページ（1ページあたり10件・1000件・10万件など）と記録済みのHTMLを
+ネットワークなしで解析させ、イベント/秒とピークRSSを計測する。merge_events / save_events は
+処理速度に加えてピークメモリの割り当て量も計測する。
+
+ピークRSSがケースごとに比べられるよう、各ケースは新しいプロセスで実行する。
+結果はコミットごとに results/<コミット>.json に保存し、--compare で以前の結果と比較できる。
+
+記録済みのHTMLは --recorded DIR に <地域>/<名前>.html の形で置く（札幌の月別ページは
+ファイル名を 202408.html のように年月にする）。
+"""
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+import tracemalloc
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+
+from fixtures import region_pages, synthetic_events
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+# 記録済みページを解析するメソッドと引数（札幌はファイル名の年月を渡す）
+RECORDED_PARSERS = {
+    'sapporo': ('_parse_month', lambda name: (name,)),
+    'tokyo': ('_parse_event_list', lambda name: ()),
+    'osaka': ('_parse_event_list', lambda name: ()),
+}
+
+
+def peak_rss_kb() -> int:
+    """このプロセスのピークRSS（KB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOSはバイト単位
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+
+def run_parse_case(case: dict) -> dict:
+    """1ページをスクレイパーのパーサーで解析する（子プロセスで実行）"""
+    from python_scrapers.registry import scraper_registry
+    scraper = scraper_registry.create(case['region'])
+    with open(case['path'], 'rb') as f:
+        content = f.read()
+    baseline_rss = peak_rss_kb()
+    best = None
+    for _ in range(case['repeat']):
+        start = time.perf_counter()
+        events = scraper.parse_content(case['parser'], tuple(case['args']), content)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return {
+        'events': len(events),
+        'bytes': len(content),
+        'seconds': round(best, 4),
+        'events_per_second': round(len(events) / best, 1) if best else None,
+        'peak_rss_kb': peak_rss_kb(),
+        'rss_growth_kb': peak_rss_kb() - baseline_rss,
+    }
+
+
+def run_store_case(case: dict) -> dict:
+    """merge_events / save_events を計測する（子プロセスで実行）"""
+    from python_scrapers.scraper_manager import ScraperManager
+    manager = ScraperManager(data_dir=tempfile.mkdtemp(), use_cache=False)
+    existing = synthetic_events(case['events'])
+    # 既存の1/10を内容を変えて再取得し、同じ数の新規イベントを加える
+    tenth = max(1, case['events'] // 10)
+    new_events = [dict(event, price='¥9999') for event in existing[:tenth]]
+    new_events += synthetic_events(tenth, seed=1, start_id=case['events'] + 1)
+    baseline_rss = peak_rss_kb()
+
+    def measure(operation):
+        start = time.perf_counter()
+        result = operation()
+        elapsed = time.perf_counter() - start
+        tracemalloc.start()
+        operation()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return result, elapsed, peak
+
+    if case['operation'] == 'merge_events':
+        merged, elapsed, alloc_peak = measure(lambda: manager.merge_events([dict(e) for e in new_events], existing))
+        count = len(new_events)
+    else:
+        merged = manager.merge_events(new_events, existing)
+        _, elapsed, alloc_peak = measure(lambda: manager.save_events(merged))
+        count = len(merged)
+    return {
+        'events': count,
+        'seconds': round(elapsed, 4),
+        'events_per_second': round(count / elapsed, 1) if elapsed else None,
+        'alloc_peak_kb': alloc_peak // 1024,
+        'peak_rss_kb': peak_rss_kb(),
+        'rss_growth_kb': peak_rss_kb() - baseline_rss,
+    }
+
+
+def run_in_subprocess(case: dict) -> dict:
+    """ケースを新しいプロセスで実行して結果を受け取る"""
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case)],
+        check=True, stdout=subprocess.PIPE, text=True
+    ).stdout
+    # 計測中の表示（"Saved ..."など）の後の最後の行が結果
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def parse_cases(sizes, recorded_dir, repeat, workdir):
+    """(ケース名, ケース) を返す。合成ページは一時ファイルに書き出して子プロセスに渡す"""
+    for size in sizes:
+        for region, _, parser, args, content in region_pages(size):
+            path = os.path.join(workdir, f"{region}-{size}.html")
+            with open(path, 'wb') as f:
+                f.write(content)
+            # 大きなページは1回だけ計測する
+            yield f"parse/{region}/{size}", {
+                'kind': 'parse', 'region': region, 'parser': parser, 'args': list(args), 'path': path,
+                'repeat': repeat if size <= 10000 else 1,
+            }
+    if recorded_dir:
+        for region in sorted(os.listdir(recorded_dir)):
+            if region not in RECORDED_PARSERS:
+                continue
+            parser, make_args = RECORDED_PARSERS[region]
+            for filename in sorted(os.listdir(os.path.join(recorded_dir, region))):
+                name, ext = os.path.splitext(filename)
+                if ext not in ('.html', '.htm'):
+                    continue
+                yield f"parse/{region}/recorded/{name}", {
+                    'kind': 'parse', 'region': region, 'parser': parser, 'args': list(make_args(name)),
+                    'path': os.path.join(recorded_dir, region, filename), 'repeat': repeat,
+                }
+
+
+def git_commit() -> str:
+    """現在のコミット（作業ツリーに変更があれば -dirty を付ける）"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SERVER_DIR, check=True,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=SERVER_DIR,
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout.strip()
+        return f"{commit}-dirty" if dirty else commit
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def compare(results: dict, base_path: str, threshold: float = 0.1):
+    """以前の結果とイベント/秒・ピークRSSを比較して表示"""
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    print(f"\nCompared with {base.get('commit')} ({os.path.basename(base_path)}):")
+    for name, result in results['cases'].items():
+        previous = base['cases'].get(name)
+        if not previous or not previous.get('events_per_second') or not result.get('events_per_second'):
+            continue
+        speed = result['events_per_second'] / previous['events_per_second']
+        rss = result['peak_rss_kb'] / previous['peak_rss_kb'] if previous.get('peak_rss_kb') else 1.0
+        flag = '  <- slower' if speed < 1 - threshold else ''
+        print(f"{name:<36} speed x{speed:5.2f}  peak RSS x{rss:5.2f}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='オフラインのベンチマークスイート')
+    parser.add_argument('--sizes', type=str, default='10,1000,100000',
+                        help='合成ページ1ページあたりのイベント数（カンマ区切り、デフォルト: 10,1000,100000）')
+    parser.add_argument('--store-sizes', type=str, default='1000,100000',
+                        help='merge_events / save_events の既存イベント数（カンマ区切り、デフォルト: 1000,100000）')
+    parser.add_argument('--recorded', type=str, help='記録済みHTMLのディレクトリ（<地域>/<名前>.html）')
+    parser.add_argument('--repeat', type=int, default=3, help='解析の繰り返し回数（1万件を超えるページは1回。デフォルト: 3）')
+    parser.add_argument('--output', type=str, help='結果の保存先（デフォルト: results/<コミット>.json）')
+    parser.add_argument('--compare', type=str, metavar='PATH', help='比較する以前の結果ファイル')
+    parser.add_argument('--run-case', type=str, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_case:
+        case = json.loads(args.run_case)
+        result = run_parse_case(case) if case['kind'] == 'parse' else run_store_case(case)
+        print(json.dumps(result))
+        return
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'cases': {},
+    }
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    store_sizes = [int(size) for size in args.store_sizes.split(',') if size]
+
+    print(f"{'case':<36} {'events':>8} {'time':>10} {'events/s':>12} {'peak RSS':>10} {'alloc peak':>11}")
+    with tempfile.TemporaryDirectory() as workdir:
+        cases = list(parse_cases(sizes, args.recorded, args.repeat, workdir))
+        for operation in ('merge_events', 'save_events'):
+            cases.extend((f"{operation}/{size}", {'kind': 'store', 'operation': operation, 'events': size})
+                         for size in store_sizes)
+        for name, case in cases:
+            result = run_in_subprocess(case)
+            results['cases'][name] = result
+            alloc = f"{result['alloc_peak_kb'] / 1024:9.1f}MB" if 'alloc_peak_kb' in result else ''
+            print(f"{name:<36} {result['events']:>8} {result['seconds'] * 1000:8.1f}ms "
+                  f"{result['events_per_second'] or 0:12.0f} {result['peak_rss_kb'] / 1024:8.1f}MB {alloc:>11}")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"Results saved to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+一覧表示用ビューの計測
+
+合成イベントから MaterializedViews を作り、再スクレイピングで一部のイベントが追加・更新されたときに
+変わったビューだけを書き直す時間を、全ビューの作り直しと比較する。
+あわせて、一覧表示で読むビューの大きさを全イベントのevents.jsonと比較する。
+"""
+import sys
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from python_scrapers.views import MaterializedViews
+from fixtures import synthetic_events
+
+
+def main():
+    parser = argparse.ArgumentParser(description='一覧表示用ビューのベンチマーク')
+    parser.add_argument('--events', type=int, default=100000, help='既存のイベント数（デフォルト: 100000）')
+    parser.add_argument('--changes', type=int, default=100, help='1回の実行で追加・更新されるイベント数（デフォルト: 100）')
+    parser.add_argument('--today', type=str, default='2024-06-01', help='今後のイベントの基準日（デフォルト: 2024-06-01）')
+    args = parser.parse_args()
+
+    existing = synthetic_events(args.events)
+    directory = tempfile.mkdtemp()
+    views = MaterializedViews(directory)
+    start = time.perf_counter()
+    count = views.rebuild(existing, today=args.today)
+    print(f"rebuild ({count} views): {time.perf_counter() - start:.2f}s")
+
+    # 1地域のサイトを再スクレイピングし、基準日の月のイベントが追加・更新された場合
+    rng = random.Random(0)
+    month = args.today[:7]
+    inserted = [dict(event, region='東京', date=f"{month}-{rng.randint(1, 28):02d}")
+                for event in synthetic_events(args.changes, seed=1, start_id=args.events + 1)]
+    candidates = [position for position, event in enumerate(existing)
+                  if event['region'] == '東京' and event['date'].startswith(month)]
+    updated = []
+    for position in rng.sample(candidates, min(args.changes, len(candidates))):
+        existing[position] = dict(existing[position], price=f"¥{rng.randint(1, 20) * 500}")
+        updated.append(existing[position])
+    start = time.perf_counter()
+    count = views.update(inserted + updated, today=args.today)
+    print(f"update ({count} views):   {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    MaterializedViews(tempfile.mkdtemp()).rebuild(existing + inserted, today=args.today)
+    print(f"rebuild after changes:   {time.perf_counter() - start:.2f}s")
+
+    full = len(json.dumps(existing + inserted, ensure_ascii=False).encode('utf-8'))
+    print(f"events.json:             {full / 1024:.0f} KB")
+    sizes = sorted(os.path.getsize(os.path.join(directory, path)) for path in views.manifest['views'])
+    print(f"view size:               median {sizes[len(sizes) // 2] / 1024:.0f} KB  max {sizes[-1] / 1024:.0f} KB")
+    print(f"manifest.json:           {os.path.getsize(os.path.join(directory, 'manifest.json')) / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+ベンチマーク用の合成HTMLページ
+
+各スクレイパーが想定するマークアップを、ナビゲーションやスクリプトなど
+解析に不要な要素と一緒に生成する。乱数のシードを固定しているため、
+同じ引数なら常に同じページになる。
+"""
+import random
+from typing import List
+
+WEEKDAYS = '月火水木金土日'
+TITLES = ['夜のジャズライブ', 'サマー・ロック・フェス', 'クラシックの夕べ', 'EDMパーティー', 'アコースティックナイト',
+          'Rock Night', 'Jazz Session', 'Classic Gala', 'Electronic Wave', 'ポップス・コンサート']
+ARTISTS = ['The Rockers', 'Pop Queens', 'DJ Future', 'Jazz Night', 'Classic Stars', '札幌交響楽団',
+           '山田太郎', '鈴木花子', 'Blue Notes', 'エレクトロ・ユニット']
+VENUES = ['大ホール', '小ホール', 'ギャラリー']
+GENRES = ['音楽', '洋舞・邦舞', '展示', 'オペラ', '演劇', 'その他']
+
+
+def _chrome(rng: random.Random, links: int = 200) -> str:
+    """ヘッダー・ナビゲーション・スクリプトなど、イベント以外の部分"""
+    nav = ''.join(f'<li><a href="/page/{i}">メニュー{i}</a></li>' for i in range(links))
+    script = '<script>' + 'var x = 1;' * 500 + '</script>'
+    sidebar = ''.join(f'<p class="news">お知らせ {rng.randint(1, 9999)}</p>' for _ in range(links // 2))
+    return f'<header><nav><ul>{nav}</ul></nav>{script}</header><aside>{sidebar}</aside>'
+
+
+def listing_page(events: int, seed: int = 0) -> bytes:
+    """東京・大阪のイベント一覧ページ（div.event-item の並び）"""
+    rng = random.Random(seed)
+    items = []
+    for i in range(events):
+        artists = ', '.join(rng.sample(ARTISTS, rng.randint(1, 7)))
+        items.append(
+            f'<div class="event-item"><h3>{rng.choice(TITLES)} {i}</h3>'
+            f'<span class="date">2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}</span>'
+            f'<span class="venue">会場{rng.randint(1, 50)}</span>'
+            f'<span class="artists">{artists}</span>'
+            f'<span class="price">¥{rng.randint(1, 9) * 500}</span>'
+            f'<a href="/events/{i}">詳細</a></div>'
+        )
+    body = _chrome(rng) + '<main>' + ''.join(items) + '</main><footer>' + _chrome(rng, 50) + '</footer>'
+    return f'<html><head><title>イベント一覧</title></head><body>{body}</body></html>'.encode('utf-8')
+
+
+def sapporo_page(events: int, year: int = 2024, month: int = 8, seed: int = 0) -> bytes:
+    """札幌教育文化会館の月別スケジュールページ（日付で始まる行の並び）"""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(events):
+        day = i % 28 + 1
+        weekday = WEEKDAYS[(day - 1) % 7]
+        title = rng.choice(TITLES)
+        if rng.random() < 0.3:
+            title += f'「{rng.choice(ARTISTS)}」'
+        if rng.random() < 0.2:
+            title += f' {rng.choice(ARTISTS)}＆{rng.choice(ARTISTS)}'
+        hour = rng.randint(10, 19)
+        rows.append(
+            f'<tr><td>{year}年{month}月{day}日（{weekday}）</td><td>{title}</td>'
+            f'<td>{rng.choice(VENUES)}</td><td>{rng.choice(GENRES)}</td>'
+            f'<td>【開場】{hour}:00 【開演】{hour}:30</td></tr>'
+        )
+    body = _chrome(rng) + '<main><table>' + ''.join(rows) + '</table></main>'
+    return f'<html><head><title>イベントスケジュール</title></head><body>{body}</body></html>'.encode('utf-8')
+
+
+def region_pages(events: int) -> List[tuple]:
+    """(地域, スクレイパーのクラス名, パーサーメソッド名, 引数, 本文) のリスト"""
+    return [
+        ('sapporo', 'SapporoKyobunScraper', '_extract_event_elements', (), sapporo_page(events)),
+        ('tokyo', 'TokyoMusicScraper', '_parse_event_list', (), listing_page(events, seed=1)),
+        ('osaka', 'OsakaMusicScraper', '_parse_live_house_site', ('https://www.osaka-livehouse.jp',), listing_page(events, seed=2)),
+    ]
+
+
+def synthetic_events(count: int, seed: int = 0, start_id: int = 1) -> List[dict]:
+    """スクレイパーの出力と同じ形式のイベントデータ"""
+    rng = random.Random(seed)
+    regions = ['東京', '大阪', '札幌']
+    genres = ['ロック', 'ジャズ', 'クラシック', 'EDM', 'ポップ', 'ダンス', '演劇', '展示', 'その他']
+    scales = ['大規模', '中規模', '小規模']
+    events = []
+    for i in range(count):
+        artists = rng.sample(ARTISTS, rng.randint(1, 4))
+        events.append({
+            'id': start_id + i,
+            'name': f"{rng.choice(TITLES)} {seed}-{i}",
+            'date': f"{rng.randint(2023, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            'time': f"{rng.randint(10, 20)}:00開場・{rng.randint(10, 20)}:30開演",
+            'location': f"会場{rng.randint(1, 300)}",
+            'artists': artists,
+            'price': f"¥{rng.randint(1, 20) * 500}",
+            'scale': rng.choice(scales),
+            'links': [{'label': '詳細情報', 'url': f"https://example.com/events/{seed}/{i}"}],
+            'genre': rng.choice(genres),
+            'region': rng.choice(regions),
+            'source': 'Benchmark',
+            'createdAt': '2024-01-01T00:00:00',
+        })
+    return events
@@ -0,0 +1,157 @@
+"""
+イベントデータの集計（pandas）
+
+イベントを列指向のDataFrameに読み込み、地域別・週別の件数やジャンル構成などを
+ベクトル演算で集計する。
+"""
+import argparse
+import json
+import os
+from typing import Dict, Any, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .dates import FULL_DATE_PATTERN, ERA_OFFSETS
+from .genre import KEYWORD_GENRES, DEFAULT_GENRE, keyword_pattern
+
+
+# ライブハウス系スクレイパーの取得元（ジャンル・規模をタイトルと出演者から推定している）
+LIVE_HOUSE_SOURCES = ('Tokyo Music Scraper', 'Osaka Music Scraper')
+SAPPORO_SOURCE = '札幌教育文化会館'
+
+# 価格帯の区切り（円）
+PRICE_BINS = (0, 2000, 4000, 6000, 10000, np.inf)
+
+CATEGORY_COLUMNS = ('region', 'genre', 'scale', 'source')
+
+
+def load_frame(events: Iterable[Dict[str, Any]]) -> pd.DataFrame:
+    """イベントをDataFrameに読み込む
+
+    地域・ジャンル・規模・取得元はカテゴリ型にし、日付（date_iso）と価格（price_yen）を
+    読み取った列を追加する。読み取れない日付・価格は欠損値になる。
+    """
+    df = pd.DataFrame.from_records(list(events))
+    for column in ('id', 'name', 'date', 'time', 'location', 'artists', 'price', 'scale', 'genre', 'region', 'source'):
+        if column not in df.columns:
+            df[column] = pd.Series(dtype=object)
+    df['artists'] = df['artists'].map(lambda value: value if isinstance(value, list) else [])
+    for column in CATEGORY_COLUMNS:
+        df[column] = df[column].fillna('').astype('category')
+
+    # 2024年8月12日（月） / 2024-08-12 / 令和6年8月12日 などをまとめて日付に変換する（dateISOのない古いデータ用）
+    # parse_date と同じ規則で読む
+    parts = df['date'].fillna('').astype(str).str.normalize('NFKC').str.extract(FULL_DATE_PATTERN.pattern)
+    parts.columns = ['era', 'year', 'month', 'day']
+    year = parts['year'].astype(float) + parts['era'].map(ERA_OFFSETS).astype(float).fillna(0)
+    dates = pd.DataFrame({'year': year.where(year >= 1000), 'month': parts['month'].astype(float),
+                          'day': parts['day'].astype(float)})
+    df['date_iso'] = pd.to_datetime(dates, errors='coerce')
+    if 'dateISO' in df.columns:
+        # 正規化の段階で読み取った日付（年のない表記も含む）を優先する
+        df['date_iso'] = pd.to_datetime(df['dateISO'], errors='coerce').fillna(df['date_iso'])
+
+    # ¥3,000 / 3000円 / 前売3,000円 など最初の金額を円として読む（要確認は欠損値）
+    prices = df['price'].fillna('').astype(str).str.normalize('NFKC').str.replace(',', '', regex=False)
+    df['price_yen'] = prices.str.extract(r'(\d+)', expand=False).astype(float)
+    return df
+
+
+def load_events_file(filepath: str) -> pd.DataFrame:
+    """events.jsonを読み込む"""
+    with open(filepath, 'r', encoding='utf-8') as f:
+        return load_frame(json.load(f))
+
+
+def load_store(store) -> pd.DataFrame:
+    """JsonLinesEventStore / SqliteEventStore の全イベントを読み込む"""
+    return load_frame(store.iter_events())
+
+
+def save_parquet(df: pd.DataFrame, filepath: str):
+    """DataFrameをParquetで保存（pyarrowが必要）"""
+    df.to_parquet(filepath, index=False)
+
+
+def events_per_region_week(df: pd.DataFrame) -> pd.DataFrame:
+    """週（月曜始まり）×地域のイベント数"""
+    dated = df.dropna(subset=['date_iso'])
+    weeks = dated['date_iso'].dt.to_period('W-SUN').dt.start_time.rename('week')
+    return dated.groupby([weeks, 'region'], observed=True).size().unstack('region', fill_value=0)
+
+
+def genre_mix(df: pd.DataFrame, normalize: bool = True) -> pd.DataFrame:
+    """地域ごとのジャンル構成（normalizeがTrueなら割合）"""
+    counts = df.groupby(['region', 'genre'], observed=True).size().unstack('genre', fill_value=0)
+    if normalize:
+        return counts.div(counts.sum(axis=1), axis=0)
+    return counts
+
+
+def price_distribution(df: pd.DataFrame, bins: Sequence[float] = PRICE_BINS) -> pd.Series:
+    """価格帯ごとのイベント数（価格が読み取れないものは欠損値の行に数える）"""
+    ranges = pd.cut(df['price_yen'], bins=list(bins), right=False)
+    return ranges.value_counts(sort=False, dropna=False)
+
+
+def artist_frequency(df: pd.DataFrame, top: Optional[int] = 20) -> pd.Series:
+    """出演回数の多いアーティスト"""
+    counts = df['artists'].explode().dropna()
+    counts = counts[counts != ''].value_counts()
+    return counts.head(top) if top else counts
+
+
+def recompute_genre(df: pd.DataFrame) -> pd.Series:
+    """ライブハウス系のイベントのジャンルをタイトルと出演者から推定し直す（他の取得元は元の値）"""
+    text = (df['name'].fillna('').astype(str) + ' ' + df['artists'].str.join(' ')).str.lower()
+    conditions = [text.str.contains(keyword_pattern(keywords)) for _, keywords in KEYWORD_GENRES]
+    detected = np.select(conditions, [genre for genre, _ in KEYWORD_GENRES], default=DEFAULT_GENRE)
+    genre = df['genre'].astype(object).where(~df['source'].isin(LIVE_HOUSE_SOURCES), detected)
+    return genre.astype('category')
+
+
+def recompute_scale(df: pd.DataFrame) -> pd.Series:
+    """規模を推定し直す（ライブハウス系は出演者数、札幌教育文化会館は会場から）"""
+    artist_count = df['artists'].str.len()
+    live_house_scale = np.select([artist_count > 5, artist_count > 2], ['大規模', '中規模'], default='小規模')
+
+    venue = df['location'].fillna('').astype(str).str.removeprefix(f"{SAPPORO_SOURCE} ")
+    hall_scale = venue.map({'大ホール': '大規模', '小ホール': '中規模', 'ギャラリー': '小規模'}).fillna('中規模')
+
+    scale = df['scale'].astype(object)
+    scale = scale.where(~df['source'].isin(LIVE_HOUSE_SOURCES), live_house_scale)
+    scale = scale.where(df['source'] != SAPPORO_SOURCE, hall_scale)
+    return scale.astype('category')
+
+
+def report(df: pd.DataFrame, top: int = 10) -> Dict[str, Any]:
+    """主な集計結果をまとめて返す"""
+    return {
+        'events_per_region_week': events_per_region_week(df),
+        'genre_mix': genre_mix(df),
+        'price_distribution': price_distribution(df),
+        'artist_frequency': artist_frequency(df, top),
+    }
+
+
+def main():
+    """events.jsonの集計結果を表示"""
+    parser = argparse.ArgumentParser(description='イベントデータの集計')
+    parser.add_argument('--data-dir', type=str, default='data', help='データディレクトリ（デフォルト: data）')
+    parser.add_argument('--input', type=str, default='events.json', help='入力ファイル名（デフォルト: events.json）')
+    parser.add_argument('--parquet', type=str, help='DataFrameをParquetで保存するパス')
+    args = parser.parse_args()
+
+    df = load_events_file(os.path.join(args.data_dir, args.input))
+    print(f"Loaded {len(df)} events")
+    for title, result in report(df).items():
+        print(f"\n== {title} ==")
+        print(result.to_string())
+    if args.parquet:
+        save_parquet(df, args.parquet)
+        print(f"\nSaved DataFrame to {args.parquet}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+イベントの読み取りAPI（Flask）
+
+保存済みのイベントをメモリ上の EventIndex に読み込み、地域・ジャンル・出演者・日付で絞り込んだ
+結果をページ単位で返す。イベント名・出演者名の検索にはスクレイピング時に保存した SearchIndex を使う。
+前回読んだ連番以降の変更（追加・更新・削除）だけを ChangeFeed から返す。
+ストア（events.json / jsonl / sqlite）や検索索引が書き換わったときだけ読み込み直す。
+"""
+import argparse
+import hashlib
+import threading
+import time
+from typing import Dict, Any, Optional
+
+from flask import Flask, Response, jsonify, request
+from flask_cors import CORS
+
+from .dates import parse_date
+from .event import intern_fields
+from .change_feed import ChangeBatch
+from .event_index import EventIndex
+from .search_index import SearchIndex
+from .scraper_manager import ScraperManager
+
+
+# 1ページの件数の既定値と上限
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+# 検索結果の件数の既定値
+DEFAULT_SEARCH_LIMIT = 20
+# 1回に返す変更の件数の既定値と上限
+DEFAULT_CHANGES_LIMIT = 1000
+MAX_CHANGES_LIMIT = 5000
+
+
+class EventService:
+    """ストアのイベントを索引付きでメモリに保持し、ストアが変わったら読み込み直す"""
+
+    def __init__(self, data_dir: str = "data", storage: str = "json", filename: str = "events.json",
+                 check_interval: float = 1.0):
+        self.data_dir = data_dir
+        self.storage = storage
+        self.filename = filename
+        # ストアの版を確認する間隔（秒）。リクエストごとにファイルを調べないようにする
+        self.check_interval = check_interval
+        self._manager = self._open_manager()
+        self._index: Optional[EventIndex] = None
+        self._search_index: Optional[SearchIndex] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def current(self) -> EventIndex:
+        """最新の索引を返す（ストアが変わっていれば読み込み直す）"""
+        index = self._index
+        now = time.monotonic()
+        if index is not None and now - self._checked_at < self.check_interval:
+            return index
+        with self._lock:
+            self._checked_at = now
+            version = (self._manager.data_version(self.filename), SearchIndex.version(self._manager.search_index_dir))
+            if self._index is None or self._index.version != version:
+                self._index = self._load(version)
+            return self._index
+
+    def search(self, query: str, limit: int = DEFAULT_SEARCH_LIMIT):
+        """検索語を含むイベントを(イベント, スコア)のリストで返す"""
+        index = self.current()
+        results = []
+        for event_id, score in self._search_index.search(query, limit):
+            event = index.get(event_id)
+            # events.jsonを直接編集した場合など、索引にだけ残っているイベントは除く
+            if event is not None:
+                results.append((event, score))
+        return results
+
+    def changes(self, since: int, limit: int = DEFAULT_CHANGES_LIMIT) -> ChangeBatch:
+        """連番がsinceより後の変更"""
+        return self._manager.change_feed.changes_since(since, limit)
+
+    def _load(self, version: Any) -> EventIndex:
+        # SQLiteの接続は作成したスレッドでしか使えないため、読み込むスレッドで開き直す
+        manager = self._open_manager()
+        started = time.perf_counter()
+        try:
+            if manager.store is not None:
+                events = [intern_fields(event) for event in manager.store.iter_events()]
+            else:
+                events = manager.load_events(self.filename)
+        finally:
+            if hasattr(manager.store, 'close'):
+                manager.store.close()
+        index = EventIndex(events, version)
+        self._search_index = SearchIndex.open(manager.search_index_dir)
+        if self._search_index.is_empty() and len(index):
+            # スクレイパーをまだ索引付きで実行していない場合はメモリ上だけで作る
+            self._search_index.add(index.events)
+        print(f"Indexed {len(index)} events in {time.perf_counter() - started:.2f}s")
+        return index
+
+    def _open_manager(self) -> ScraperManager:
+        return ScraperManager(data_dir=self.data_dir, use_cache=False, storage=self.storage)
+
+
+def create_app(service: EventService) -> Flask:
+    """読み取りAPIのFlaskアプリケーションを作成"""
+    app = Flask(__name__)
+    CORS(app)
+    app.json.ensure_ascii = False
+
+    @app.get('/api/events')
+    def list_events():
+        try:
+            params = _query_params(request.args)
+        except ValueError as e:
+            return jsonify(message=str(e)), 400
+        index = service.current()
+        # 結果はストアの版とクエリで決まるため、イベントを取り出す前に変更の有無を返せる
+        etag = _etag(index, sorted(params.items()))
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        total, events = index.query(**params)
+        response = jsonify(total=total, offset=params['offset'], limit=params['limit'], events=events)
+        return _cacheable(response, etag)
+
+    @app.get('/api/events/<int:event_id>')
+    def get_event(event_id: int):
+        index = service.current()
+        etag = _etag(index, event_id)
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        event = index.get(event_id)
+        if event is None:
+            return jsonify(message='指定されたイベントが見つかりません。'), 404
+        return _cacheable(jsonify(event), etag)
+
+    @app.get('/api/search')
+    def search():
+        query = (request.args.get('q') or '').strip()
+        if not query:
+            return jsonify(message='検索語（q）を指定してください。'), 400
+        try:
+            limit = min(MAX_LIMIT, max(1, int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))))
+        except ValueError:
+            return jsonify(message='limit は整数で指定してください。'), 400
+        index = service.current()
+        etag = _etag(index, ('search', query, limit))
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        results = service.search(query, limit)
+        return _cacheable(jsonify(query=query, events=[dict(event, score=score) for event, score in results]), etag)
+
+    @app.get('/api/changes')
+    def changes():
+        try:
+            since = int(request.args['since'])
+            limit = min(MAX_CHANGES_LIMIT, max(1, int(request.args.get('limit', DEFAULT_CHANGES_LIMIT))))
+        except KeyError:
+            return jsonify(message='前回読んだ連番（since）を指定してください。'), 400
+        except ValueError:
+            return jsonify(message='since と limit は整数で指定してください。'), 400
+        batch = service.changes(since, limit)
+        # resetがtrueの場合は /api/events から全件を読み込み直し、headから続ける
+        return jsonify(since=since, next=batch.next, head=batch.head, reset=batch.reset, changes=batch.changes)
+
+    @app.get('/api/facets')
+    def facets():
+        index = service.current()
+        etag = _etag(index, 'facets')
+        if request.if_none_match.contains(etag):
+            return _not_modified(etag)
+        return _cacheable(jsonify(total=len(index), region=index.values('region'), genre=index.values('genre')), etag)
+
+    return app
+
+
+def _query_params(args) -> Dict[str, Any]:
+    """クエリ文字列を EventIndex.query の引数にする（不正な値はValueError）"""
+    params: Dict[str, Any] = {
+        'region': args.get('region') or None,
+        'genre': args.get('genre') or None,
+        'artist': args.get('artist') or None,
+    }
+    for name, key in (('from', 'date_from'), ('to', 'date_to')):
+        value = args.get(name)
+        params[key] = parse_date(value) if value else None
+        if value and params[key] is None:
+            raise ValueError(f"日付を読み取れません: {name}={value}")
+    try:
+        params['offset'] = max(0, int(args.get('offset', 0)))
+        params['limit'] = min(MAX_LIMIT, max(1, int(args.get('limit', DEFAULT_LIMIT))))
+    except ValueError:
+        raise ValueError('offset と limit は整数で指定してください。')
+    return params
+
+
+def _etag(index: EventIndex, key: Any) -> str:
+    return hashlib.sha1(f"{index.etag}:{key!r}".encode('utf-8')).hexdigest()[:20]
+
+
+def _not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def _cacheable(response: Response, etag: str) -> Response:
+    response.set_etag(etag)
+    # キャッシュしてよいが、使う前に毎回ETagで確認させる
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def main():
+    """読み取りAPIを起動"""
+    parser = argparse.ArgumentParser(description='イベントの読み取りAPI')
+    parser.add_argument('--data-dir', type=str, default='data', help='データディレクトリ（デフォルト: data）')
+    parser.add_argument('--storage', type=str, default='json', choices=['json', 'jsonl', 'sqlite'],
+                        help='読み込むストア（デフォルト: json = events.json）')
+    parser.add_argument('--input', type=str, default='events.json', help='storageがjsonの場合の入力ファイル名（デフォルト: events.json）')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='待ち受けるアドレス（デフォルト: 127.0.0.1）')
+    parser.add_argument('--port', type=int, default=5001, help='ポート番号（デフォルト: 5001）')
+    args = parser.parse_args()
+
+    service = EventService(data_dir=args.data_dir, storage=args.storage, filename=args.input)
+    # 最初のリクエストを待たせないよう、起動時に読み込んでおく
+    service.current()
+    create_app(service).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+asyncioベースのページ取得エンジン
+"""
+import asyncio
+import time
+from typing import List, Dict, Callable, Optional
+from urllib.parse import urlparse
+
+import aiohttp
+
+from .rate_limiter import HostRateLimiter, shared_rate_limiter, parse_retry_after, RETRY_STATUSES
+from .connection_limiter import ConnectionLimiter
+from .http_cache import HttpCache
+from .base_scraper import FetchedPage
+from .metrics import RunMetrics
+
+
+class AsyncFetcher:
+    """ホストごとに接続をプールし、同時接続数を制限しながら複数ページを並行取得する
+
+    同時接続数の上限はconnection_limiterで数えるため、同じリミッターを渡した複数のフェッチャー
+    （別スレッドのイベントループ）を同時に動かしても全体の上限を超えない。
+    HTTPキャッシュの読み書きはディスクI/Oでイベントループを止めないよう、スレッドプールで行う。
+    """
+    
+    def __init__(self, headers: Dict[str, str], max_concurrency: int = 16,
+                 per_host_concurrency: int = 2, rate_limiter: Optional[HostRateLimiter] = None,
+                 rate: Optional[float] = None, burst: Optional[int] = None,
+                 max_retries: int = 3, http_cache: Optional[HttpCache] = None, timeout: float = 10,
+                 metrics: Optional[RunMetrics] = None, connection_limiter: Optional[ConnectionLimiter] = None):
+        self.headers = headers
+        self.connection_limiter = connection_limiter or ConnectionLimiter(max_concurrency, per_host_concurrency)
+        self.max_concurrency = self.connection_limiter.max_concurrency
+        self.per_host_concurrency = self.connection_limiter.per_host_concurrency
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.rate = rate
+        self.burst = burst
+        self.max_retries = max_retries
+        self.http_cache = http_cache
+        self.timeout = timeout
+        self.metrics = metrics or RunMetrics()
+    
+    def fetch_all(self, urls: List[str],
+                  on_page: Optional[Callable[[int, Optional[FetchedPage]], None]] = None) -> List[Optional[FetchedPage]]:
+        """URLを並行取得し、同じ順でページを返す（失敗したページはNone）
+
+        on_pageを渡すと、ページを取得するたびに(URLの位置, ページ)で呼び出す。
+        on_pageは待つことがあるため、イベントループを止めないよう別スレッドで実行する。
+        """
+        if not urls:
+            return []
+        return asyncio.run(self._fetch_all(urls, on_page))
+    
+    async def _fetch_all(self, urls: List[str],
+                         on_page: Optional[Callable[[int, Optional[FetchedPage]], None]]) -> List[Optional[FetchedPage]]:
+        # コネクタがホストごとにKeep-Alive接続をプールする
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, limit_per_host=self.per_host_concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        async with aiohttp.ClientSession(headers=self.headers, connector=connector, timeout=timeout) as session:
+            return await asyncio.gather(*(self._fetch_and_notify(session, index, url, on_page)
+                                          for index, url in enumerate(urls)))
+    
+    async def _fetch_and_notify(self, session: aiohttp.ClientSession, index: int, url: str,
+                                on_page: Optional[Callable[[int, Optional[FetchedPage]], None]]) -> Optional[FetchedPage]:
+        page = await self._fetch(session, url)
+        if on_page:
+            await asyncio.get_running_loop().run_in_executor(None, on_page, index, page)
+        return page
+    
+    async def _fetch(self, session: aiohttp.ClientSession, url: str) -> Optional[FetchedPage]:
+        host = urlparse(url).netloc
+        loop = asyncio.get_running_loop()
+        cache = self.http_cache
+        try:
+            # キャッシュ済みのページはETag/Last-Modifiedで変更の有無だけを問い合わせる
+            cached = await loop.run_in_executor(None, cache.lookup, url) if cache else None
+            headers = cache.validators(cached) if cached else {}
+            async with self.connection_limiter.host(host):
+                for attempt in range(self.max_retries + 1):
+                    # スレッドを止めずに順番を待ち、その間も他ホストの取得を進める
+                    waited = time.perf_counter()
+                    await self.rate_limiter.acquire_async(host, self.rate, self.burst)
+                    self.metrics.record_sleep(host, time.perf_counter() - waited)
+                    async with self.connection_limiter.connection():
+                        started = time.perf_counter()
+                        try:
+                            async with session.get(url, headers=headers) as response:
+                                content = await response.read()
+                        except Exception:
+                            self.metrics.record_request(host, time.perf_counter() - started, 0, None)
+                            raise
+                    self.metrics.record_request(host, time.perf_counter() - started, len(content), response.status)
+                    if response.status in RETRY_STATUSES and attempt < self.max_retries:
+                        delay = self.rate_limiter.backoff(host, parse_retry_after(response.headers.get('Retry-After')))
+                        print(f"Throttled by {host} ({response.status}), retrying in {delay:.1f}s")
+                        continue
+                    if response.status == 304 and cached:
+                        content = await loop.run_in_executor(None, cache.load_body, url)
+                        if content is not None:
+                            self.rate_limiter.success(host)
+                            await loop.run_in_executor(None, cache.revalidated, url)
+                            return FetchedPage(content, not_modified=True)
+                        # 本文が消えていたら条件なしで取り直す
+                        cached, headers = None, {}
+                        continue
+                    response.raise_for_status()
+                    self.rate_limiter.success(host)
+                    if cache:
+                        await loop.run_in_executor(None, cache.store, url, content, response.headers)
+                    return FetchedPage(content)
+        except Exception as e:
+            print(f"Error fetching {url}: {e}")
+            return None
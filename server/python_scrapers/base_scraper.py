@@ -1,37 +1,365 @@
 """
 基本スクレイパークラス
 """
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+import hashlib
+import inspect
+import queue
+import sys
+import threading
 import time
-import random
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import List, Dict, Any, Optional, Tuple, NamedTuple
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+from .rate_limiter import shared_rate_limiter, parse_retry_after, RETRY_STATUSES
+from .http_cache import HttpCache
+from .connection_limiter import ConnectionLimiter
+from .parse_cache import ParseCache
+from .crawl_state import CrawlState
+from .parse_pool import ParsePool
+from .metrics import RunMetrics
+from .event import Event
+from . import genre
+
+
+# スクレイパーのモジュール以外で解析結果を左右するモジュール（ジャンルの判定規則など）
+PARSE_DEPENDENCIES = (genre,)
+
+
+class PageJob(NamedTuple):
+    """1ページ分の取得・解析ジョブ"""
+    url: str
+    parser: str  # BeautifulSoupを受け取りイベントのリストを返すメソッド名
+    args: Tuple[Any, ...] = ()
+    months_ahead: int = 0  # 何か月先の情報のページか（差分スクレイピングの再取得間隔に使う）
+
+
+class FetchedPage(NamedTuple):
+    """取得したページの本文"""
+    content: bytes
+    not_modified: bool = False  # 304応答でキャッシュの本文を再利用した（前回の解析結果があれば解析しない）
 
 
 class BaseScraper(ABC):
     """スクレイピングの基本クラス"""
     
+    # 1ホストあたりの平均リクエスト数/秒と、待たずに送れるリクエスト数
+    request_rate = 0.5
+    request_burst = 2
+    # 429/503を受けたときの再試行回数
+    max_retries = 3
+    # パーサーメソッドが必要とする要素だけを組み立てるためのフィルタ（Noneならページ全体）
+    parse_only: Optional[SoupStrainer] = None
+    # 抽出結果の形式を変えたときに上げるバージョン（ソースの変更でも解析キャッシュは無効になる）
+    parser_version = 1
+    # scrape_eventsが日数ではなく月数を受け取る場合はTrue
+    horizon_in_months = False
+    
     def __init__(self, base_url: str, headers: Optional[Dict[str, str]] = None):
         self.base_url = base_url
         self.headers = headers or {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
-        self.session = requests.Session()
-        self.session.headers.update(self.headers)
+        # requestsのセッションは最初に同期取得するときに作成する（sessionプロパティ）
+        self._session = None
+        self._session_lock = threading.Lock()
+        # scrape_pagesで並列に取得するページ数（1なら逐次）
+        self.workers = 1
+        # ホストごとのリクエスト数を制限する（既定では全スクレイパーで共有）
+        self.rate_limiter = shared_rate_limiter
+        # HTMLパーサー: 'lxml' または 'html.parser'
+        self.parser_backend = 'lxml'
+        # ページ取得のバックエンド: 'sync'（requests）または 'async'（aiohttp）
+        self.fetch_backend = 'sync'
+        # asyncバックエンドの全体・ホストごとの同時接続数
+        self.max_concurrency = 16
+        self.per_host_concurrency = 2
+        # 同時接続数を数えるリミッター（ScraperManagerは全スクレイパーで1つを共有する。
+        # Noneなら最初に取得するときに上の設定からこのスクレイパー用に作る）
+        self.connection_limiter: Optional[ConnectionLimiter] = None
+        # 条件付きGETに使うレスポンスキャッシュ（Noneなら毎回取得する）
+        self.http_cache: Optional[HttpCache] = None
+        # 本文が同じページの解析結果を再利用するキャッシュ（Noneなら毎回解析する）
+        self.parse_cache: Optional[ParseCache] = None
+        # 差分スクレイピングの取得状態（Noneなら毎回全ページを取得する）
+        self.crawl_state: Optional[CrawlState] = None
+        # ページの解析を任せるプロセスプール（Noneなら取得したスレッドで解析する）
+        self.parse_pool: Optional[ParsePool] = None
+        # 取得・解析の時間や件数の記録先（ScraperManagerは全スクレイパーで1つを共有する）
+        self.metrics = RunMetrics()
+        # 解析中のページの要素単位のエラー数（スレッドごと）
+        self._parse_local = threading.local()
+    
+    @property
+    def session(self):
+        """ページ取得に使うrequestsのセッション"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    # requestsの読み込みは重いため、asyncバックエンドや取得しない実行では読み込まない
+                    import requests
+                    session = requests.Session()
+                    session.headers.update(self.headers)
+                    self._session = session
+        return self._session
     
-    def get_page(self, url: str, delay: float = 1.0) -> Optional[BeautifulSoup]:
+    def get_page(self, url: str) -> Optional[BeautifulSoup]:
         """ページを取得してBeautifulSoupオブジェクトを返す"""
+        page = self.fetch(url)
+        if page is None:
+            return None
+        return self.make_soup(page.content)
+    
+    def fetch(self, url: str) -> Optional[FetchedPage]:
+        """ページを取得してレスポンスの本文を返す"""
+        host = urlparse(url).netloc
         try:
-            # サーバーに負荷をかけないようランダムな遅延
-            time.sleep(delay + random.uniform(0, 1))
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
-            return BeautifulSoup(response.content, 'html.parser')
+            # キャッシュ済みのページはETag/Last-Modifiedで変更の有無だけを問い合わせる
+            cached = self.http_cache.lookup(url) if self.http_cache else None
+            headers = self.http_cache.validators(cached) if cached else {}
+            for attempt in range(self.max_retries + 1):
+                # サーバーに負荷をかけないよう、ホストごとの予算を使い切ったときだけ待つ
+                waited = time.perf_counter()
+                self.rate_limiter.acquire(host, self.request_rate, self.request_burst)
+                started = time.perf_counter()
+                self.metrics.record_sleep(host, started - waited)
+                try:
+                    response = self.session.get(url, timeout=10, headers=headers)
+                except Exception:
+                    self.metrics.record_request(host, time.perf_counter() - started, 0, None)
+                    raise
+                self.metrics.record_request(host, time.perf_counter() - started, len(response.content), response.status_code)
+                if response.status_code in RETRY_STATUSES and attempt < self.max_retries:
+                    delay = self.rate_limiter.backoff(host, parse_retry_after(response.headers.get('Retry-After')))
+                    print(f"Throttled by {host} ({response.status_code}), retrying in {delay:.1f}s")
+                    continue
+                if response.status_code == 304 and cached:
+                    content = self.http_cache.load_body(url)
+                    if content is not None:
+                        self.rate_limiter.success(host)
+                        self.http_cache.revalidated(url)
+                        return FetchedPage(content, not_modified=True)
+                    # 本文が消えていたら条件なしで取り直す
+                    cached, headers = None, {}
+                    continue
+                response.raise_for_status()
+                self.rate_limiter.success(host)
+                if self.http_cache:
+                    self.http_cache.store(url, response.content, response.headers)
+                return FetchedPage(response.content)
         except Exception as e:
             print(f"Error fetching {url}: {e}")
             return None
     
+    def make_soup(self, content: bytes) -> BeautifulSoup:
+        """レスポンスの本文からBeautifulSoupオブジェクトを作成"""
+        return BeautifulSoup(content, self.parser_backend, parse_only=self.parse_only)
+    
+    def scrape_pages(self, jobs: List[PageJob]) -> List[Dict[str, Any]]:
+        """複数ページを取得・解析し、イベントをジョブの順に連結して返す"""
+        if self.crawl_state:
+            # 前回の取得から再取得の間隔を過ぎていないページは取得しない
+            jobs = [job for job in jobs if self.crawl_state.is_stale(job.url, job.months_ahead)]
+        
+        if self.parse_pool and jobs:
+            results = self._scrape_pipelined(jobs)
+        elif self.fetch_backend == 'async':
+            # 全ページをイベントループ上で並行取得してから順に解析する
+            pages = self._async_fetcher().fetch_all([job.url for job in jobs])
+            results = [self._parse_job(job, page) for job, page in zip(jobs, pages)]
+        elif self.workers > 1 and len(jobs) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+                results = list(executor.map(self._run_job, jobs))
+        else:
+            results = [self._run_job(job) for job in jobs]
+        
+        events = []
+        for page_events in results:
+            events.extend(page_events)
+        return events
+    
+    def _async_fetcher(self):
+        from .async_fetcher import AsyncFetcher
+        if self.connection_limiter is None:
+            self.connection_limiter = ConnectionLimiter(self.max_concurrency, self.per_host_concurrency)
+        return AsyncFetcher(
+            self.headers,
+            metrics=self.metrics,
+            connection_limiter=self.connection_limiter,
+            rate_limiter=self.rate_limiter,
+            rate=self.request_rate,
+            burst=self.request_burst,
+            max_retries=self.max_retries,
+            http_cache=self.http_cache,
+        )
+    
+    def _scrape_pipelined(self, jobs: List[PageJob]) -> List[List[Dict[str, Any]]]:
+        """取得と解析を別の段階で進める（取得したページは有界キューを通してプロセスプールで解析する）"""
+        pages: queue.Queue = queue.Queue(maxsize=self.parse_pool.queue_size)
+        fetched_all = object()
+        fetch_errors = []
+        
+        def put(index: int, page: Optional[FetchedPage]):
+            # 解析が追いつかずキューが埋まっているときは取得側が待つ
+            pages.put((index, page))
+        
+        def fetch_stage():
+            try:
+                if self.fetch_backend == 'async':
+                    self._async_fetcher().fetch_all([job.url for job in jobs], on_page=put)
+                elif self.workers > 1 and len(jobs) > 1:
+                    with ThreadPoolExecutor(max_workers=min(self.workers, len(jobs))) as executor:
+                        list(executor.map(lambda index: put(index, self.fetch(jobs[index].url)), range(len(jobs))))
+                else:
+                    for index, job in enumerate(jobs):
+                        put(index, self.fetch(job.url))
+            except Exception as e:
+                fetch_errors.append(e)
+            finally:
+                pages.put(fetched_all)
+        
+        fetcher = threading.Thread(target=fetch_stage, daemon=True)
+        fetcher.start()
+        results: List[List[Dict[str, Any]]] = [[] for _ in jobs]
+        parsing = []
+        while True:
+            item = pages.get()
+            if item is fetched_all:
+                break
+            index, page = item
+            if page is None:
+                continue
+            job = jobs[index]
+            cache_key, events = self._lookup_parse_cache(job, page)
+            if events is not None:
+                self.metrics.record_cached_parse(self._parser_name(job), len(events))
+                self._record_crawl(job, page)
+                results[index] = events
+                continue
+            # プロセスプールに空きがなければここで待ち、その間にキューが埋まると取得も止まる
+            future = self.parse_pool.submit(self, job.parser, job.args, page.content)
+            parsing.append((index, job, page, cache_key, future))
+        fetcher.join()
+        if fetch_errors:
+            raise fetch_errors[0]
+        
+        for index, job, page, cache_key, future in parsing:
+            try:
+                events, seconds, element_errors = future.result()
+            except Exception as e:
+                print(f"Error scraping {job.url}: {e}")
+                self.metrics.record_parse_failure(self._parser_name(job))
+                continue
+            self.metrics.record_parse(self._parser_name(job), seconds, len(events), element_errors)
+            results[index] = self._finish_job(job, page, cache_key, events)
+        return results
+    
+    def _run_job(self, job: PageJob) -> List[Dict[str, Any]]:
+        """1ページを取得して解析する"""
+        return self._parse_job(job, self.fetch(job.url))
+    
+    def _parse_job(self, job: PageJob, page: Optional[FetchedPage]) -> List[Dict[str, Any]]:
+        """取得したページをパーサーメソッドに渡す"""
+        if page is None:
+            return []
+        cache_key, events = self._lookup_parse_cache(job, page)
+        if events is not None:
+            self.metrics.record_cached_parse(self._parser_name(job), len(events))
+            self._record_crawl(job, page)
+            return events
+        try:
+            events, seconds, element_errors = self.measure_parse(job.parser, job.args, page.content)
+        except Exception as e:
+            print(f"Error scraping {job.url}: {e}")
+            self.metrics.record_parse_failure(self._parser_name(job))
+            return []
+        self.metrics.record_parse(self._parser_name(job), seconds, len(events), element_errors)
+        return self._finish_job(job, page, cache_key, events)
+    
+    def parse_content(self, parser: str, args: Tuple[Any, ...], content: bytes) -> List[Dict[str, Any]]:
+        """本文からsoupを作ってパーサーメソッドに渡す"""
+        return getattr(self, parser)(self.make_soup(content), *args)
+    
+    def measure_parse(self, parser: str, args: Tuple[Any, ...], content: bytes) -> Tuple[List[Dict[str, Any]], float, int]:
+        """解析して(イベント, 解析秒数, 要素の解析エラー数)を返す（プロセスプールのワーカーからも呼ばれる）"""
+        self._parse_local.errors = 0
+        start = time.perf_counter()
+        events = self.parse_content(parser, args, content)
+        return events, time.perf_counter() - start, self._parse_local.errors
+    
+    def element_error(self, message: str):
+        """ページ内の1要素の解析エラーを表示し、ページごとのエラー数に数える"""
+        print(message)
+        self._parse_local.errors = getattr(self._parse_local, 'errors', 0) + 1
+    
+    def _parser_name(self, job: PageJob) -> str:
+        return f"{type(self).__name__}.{job.parser}"
+    
+    def parse_settings(self) -> Dict[str, Any]:
+        """パーサーメソッドが参照する属性（プロセスプールのワーカーに同じ値を渡す）"""
+        return {'base_url': self.base_url, 'parser_backend': self.parser_backend, 'parse_only': self.parse_only}
+    
+    def _lookup_parse_cache(self, job: PageJob, page: FetchedPage) -> Tuple[Optional[str], Optional[List[Dict[str, Any]]]]:
+        """解析キャッシュのキーと、前回の解析結果（なければNone）を返す
+
+        304応答のページは、HTTPキャッシュにURLごとに保存した前回の解析結果を使う（解析キャッシュを使わない場合も解析しない）。
+        """
+        parser_id = self._parser_id(job)
+        if page.not_modified:
+            events = self.http_cache.load_events(job.url, parser_id)
+            if events is not None:
+                return None, events
+        if not self.parse_cache:
+            return None, None
+        # 本文が前回と同じなら soupを作らずに前回の結果を使う
+        cache_key = self.parse_cache.key(page.content, parser_id)
+        events = self.parse_cache.get(cache_key)
+        if events is not None:
+            self._remember_events(job, events)
+        return cache_key, events
+    
+    def _finish_job(self, job: PageJob, page: FetchedPage, cache_key: Optional[str],
+                    events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """解析結果をキャッシュと取得状態に記録する"""
+        if cache_key:
+            self.parse_cache.put(cache_key, events)
+        self._remember_events(job, events)
+        self._record_crawl(job, page)
+        return events
+    
+    def _remember_events(self, job: PageJob, events: List[Dict[str, Any]]):
+        """次の実行で304応答を受けたときに使えるよう、解析結果をHTTPキャッシュに保存する"""
+        if self.http_cache:
+            self.http_cache.store_events(job.url, self._parser_id(job), events)
+    
+    def _parser_id(self, job: PageJob) -> str:
+        """解析結果を左右するパーサーの識別子（クラス・バージョン・パーサー・メソッド・引数）"""
+        return f"{self.parser_fingerprint()}:{self.parser_backend}:{job.parser}{job.args!r}"
+    
+    def _record_crawl(self, job: PageJob, page: FetchedPage):
+        """解析できたページを取得状態に記録する"""
+        if self.crawl_state:
+            self.crawl_state.record(job.url, page.content)
+    
+    @classmethod
+    def parser_fingerprint(cls) -> str:
+        """クラス名・parser_version・パース処理とPARSE_DEPENDENCIESのソースから解析キャッシュ用の識別子を作る"""
+        fingerprint = cls.__dict__.get('_parser_fingerprint')
+        if fingerprint is None:
+            digest = hashlib.sha1(f"{cls.__module__}.{cls.__qualname__}:{cls.parser_version}".encode('utf-8'))
+            modules = [sys.modules.get(klass.__module__) for klass in cls.__mro__
+                       if klass is not BaseScraper and issubclass(klass, BaseScraper)]
+            for module in modules + list(PARSE_DEPENDENCIES):
+                try:
+                    digest.update(inspect.getsource(module).encode('utf-8'))
+                except (OSError, TypeError):
+                    # ソースが読めない環境ではparser_versionだけで判定する
+                    pass
+            fingerprint = digest.hexdigest()[:16]
+            cls._parser_fingerprint = fingerprint
+        return fingerprint
+    
     @abstractmethod
     def scrape_events(self, **kwargs) -> List[Dict[str, Any]]:
         """イベント情報をスクレイピングする抽象メソッド"""
@@ -39,19 +367,4 @@ class BaseScraper(ABC):
     
     def normalize_event(self, event_data: Dict[str, Any]) -> Dict[str, Any]:
         """イベントデータを正規化する"""
-        return {
-            'id': event_data.get('id'),
-            'name': event_data.get('name') or event_data.get('title', ''),
-            'date': event_data.get('date', ''),
-            'time': event_data.get('time', ''),
-            'location': event_data.get('location') or event_data.get('venue', ''),
-            'artists': event_data.get('artists', []),
-            'price': event_data.get('price') or event_data.get('ticket_price', ''),
-            'scale': event_data.get('scale', '中規模'),
-            'links': event_data.get('links', []),
-            'genre': event_data.get('genre', 'その他'),
-            'region': event_data.get('region', ''),
-            'source': event_data.get('source', ''),
-            'image': event_data.get('image'),
-            'createdAt': event_data.get('createdAt')
-        } 
\ No newline at end of file
+        return Event.from_dict(event_data).to_dict()
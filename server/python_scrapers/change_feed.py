@@ -0,0 +1,185 @@
+"""
+実行ごとのイベントの変更履歴（追加・更新・削除を連番付きで記録する）
+"""
+import hashlib
+import json
+import os
+import re
+from bisect import bisect_right
+from datetime import datetime
+from typing import List, Dict, Any, Iterable, NamedTuple, Optional, Tuple
+
+from .dedup import VOLATILE_FIELDS
+
+
+SEGMENT_PATTERN = re.compile(r'^(\d{12})\.jsonl$')
+SNAPSHOT_FILE = 'snapshot.json'
+HEAD_FILE = 'head.json'
+
+
+class ChangeSet(NamedTuple):
+    """record で求めた前回の実行からの変更"""
+    upserted: List[Dict[str, Any]]  # 追加・更新されたイベント（最新の内容）
+    deleted: List[Any]              # 削除されたイベントのID
+    counts: Dict[str, int]          # 変更の種類ごとの件数
+    baseline: bool                  # 前回のスナップショットがなく、起点を記録しただけ
+
+
+class ChangeBatch(NamedTuple):
+    """changes_since の結果"""
+    changes: List[Dict[str, Any]]
+    next: int      # 次に changes_since に渡すカーソル
+    head: int      # 最新の連番
+    reset: bool    # カーソルが古すぎる（または新しすぎる）ため、全件を読み込み直す必要がある
+
+
+class ChangeFeed:
+    """パイプラインの実行ごとに、前回の実行からのイベントの変更を連番付きで記録する
+
+    前回の実行時点のイベントID → 内容のハッシュ（スナップショット）と比べて、
+    追加（insert）・更新（update）・削除（delete）を求める。Express APIでの編集や
+    events.json の直接の編集も差分に含まれる。変更は実行ごとに1つのセグメント
+    （最初の連番をファイル名にしたJSON Lines）に追記し、古いセグメントは max_segments を超えたら消す。
+    利用側は最後に読んだ連番（カーソル）を渡して、それ以降の変更だけを受け取る。
+    """
+
+    def __init__(self, directory: str, max_segments: int = 100):
+        self.directory = directory
+        # 残しておく実行（セグメント）の数
+        self.max_segments = max_segments
+
+    def head(self) -> int:
+        """最新の変更の連番（まだ変更がなければ0）"""
+        try:
+            with open(os.path.join(self.directory, HEAD_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)['seq']
+        except (OSError, ValueError, KeyError):
+            return 0
+
+    def exists(self) -> bool:
+        """起点（スナップショット）が記録されているか"""
+        return os.path.exists(os.path.join(self.directory, SNAPSHOT_FILE))
+
+    def record(self, events: Iterable[Dict[str, Any]]) -> ChangeSet:
+        """現在のイベントを前回のスナップショットと比べ、変更を記録して返す
+
+        スナップショットがない初回は、現在のイベントを起点として記録するだけで変更は出さない
+        （利用側は最初に全件を読み込み、そのときの head をカーソルにする）。
+        """
+        previous = self._load_snapshot()
+        hashes: Dict[Any, str] = {}
+        changes: List[Tuple[str, Any, Optional[Dict[str, Any]]]] = []
+        for event in events:
+            event_id = event.get('id')
+            if event_id in hashes:
+                # 以前の連番のIDが重複しているイベントは最初の1件だけを見る
+                continue
+            digest = _content_hash(event)
+            hashes[event_id] = digest
+            if previous is None:
+                continue
+            old = previous.pop(event_id, None)
+            if old is None:
+                changes.append(('insert', event_id, event))
+            elif old != digest:
+                changes.append(('update', event_id, event))
+        if previous:
+            changes.extend(('delete', event_id, None) for event_id in previous)
+
+        if changes or previous is None:
+            head = self.head()
+            if changes:
+                self._append(head + 1, changes)
+                head += len(changes)
+            # 途中で止まった場合は次の実行で同じ変更をもう一度記録する（変更を落とさない）よう、
+            # セグメント → head → スナップショットの順に書く。変更がなければ何も書き換えない
+            self._write_json(HEAD_FILE, {'seq': head, 'updatedAt': datetime.now().isoformat()})
+            self._write_json(SNAPSHOT_FILE, list(hashes.items()))
+            self._prune()
+
+        counts = {'insert': 0, 'update': 0, 'delete': 0}
+        upserted, deleted = [], []
+        for op, event_id, event in changes:
+            counts[op] += 1
+            if event is None:
+                deleted.append(event_id)
+            else:
+                upserted.append(event)
+        return ChangeSet(upserted, deleted, counts, previous is None)
+
+    def changes_since(self, cursor: int, limit: int = 1000) -> ChangeBatch:
+        """連番がcursorより後の変更を古い順に最大limit件返す"""
+        head = self.head()
+        starts = [start for start, _ in self._segments()]
+        oldest = starts[0] if starts else head + 1
+        if cursor < oldest - 1 or cursor > head:
+            # 必要な変更がすでに消されている、または記録を作り直した後のカーソル
+            return ChangeBatch([], head, head, True)
+
+        changes: List[Dict[str, Any]] = []
+        # cursorの次の変更を含むセグメントから読む
+        first = max(0, bisect_right(starts, cursor + 1) - 1)
+        for start in starts[first:]:
+            with open(self._segment_path(start), 'r', encoding='utf-8') as f:
+                for line in f:
+                    change = json.loads(line)
+                    if change['seq'] <= cursor:
+                        continue
+                    if change['seq'] > head:
+                        # 記録の途中で止まった実行の変更（次の実行で書き直される）
+                        break
+                    changes.append(change)
+                    if len(changes) >= limit:
+                        return ChangeBatch(changes, change['seq'], head, False)
+        return ChangeBatch(changes, changes[-1]['seq'] if changes else cursor, head, False)
+
+    def _append(self, first_seq: int, changes: List[Tuple[str, Any, Optional[Dict[str, Any]]]]):
+        os.makedirs(self.directory, exist_ok=True)
+        at = datetime.now().isoformat()
+        path = self._segment_path(first_seq)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            for seq, (op, event_id, event) in enumerate(changes, first_seq):
+                change = {'seq': seq, 'op': op, 'id': event_id, 'at': at}
+                if event is not None:
+                    change['event'] = event
+                f.write(json.dumps(change, ensure_ascii=False) + '\n')
+        os.replace(f"{path}.tmp", path)
+
+    def _prune(self):
+        segments = self._segments()
+        for _, path in segments[:max(0, len(segments) - self.max_segments)]:
+            os.remove(path)
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        """(最初の連番, パス)を連番順に"""
+        if not os.path.isdir(self.directory):
+            return []
+        segments = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def _segment_path(self, first_seq: int) -> str:
+        return os.path.join(self.directory, f"{first_seq:012d}.jsonl")
+
+    def _load_snapshot(self) -> Optional[Dict[Any, str]]:
+        try:
+            with open(os.path.join(self.directory, SNAPSHOT_FILE), 'r', encoding='utf-8') as f:
+                return dict((event_id, digest) for event_id, digest in json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def _write_json(self, name: str, data: Any):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, name)
+        with open(f"{path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(f"{path}.tmp", path)
+
+
+def _content_hash(event: Dict[str, Any]) -> str:
+    """IDと作成日時を除いた内容のハッシュ（content_changed と同じく、実行ごとに変わる項目は見ない）"""
+    content = {field: value for field, value in event.items() if field not in VOLATILE_FIELDS}
+    return hashlib.sha1(json.dumps(content, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()[:16]
@@ -0,0 +1,88 @@
+"""
+複数のイベントループにまたがる同時接続数の制限
+"""
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+
+class _Slots:
+    """スレッドごとのイベントループから共有できるセマフォ
+
+    asyncio.Semaphoreは1つのイベントループの中でしか使えないため、空きを待つタスクのループと
+    Futureを覚えておき、解放されたスロットをcall_soon_threadsafeでそのタスクに直接渡す。
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._active = 0
+        self._waiters: Deque[Tuple[Any, Any]] = deque()
+        self._lock = threading.Lock()
+
+    async def acquire(self):
+        # asyncioの読み込みは重いため、asyncバックエンドを使うときだけimportする
+        import asyncio
+        with self._lock:
+            if self._active < self.limit and not self._waiters:
+                self._active += 1
+                return
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            waiter = (loop, future)
+            self._waiters.append(waiter)
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+                # すでにスロットを渡されていた場合は_hand_overが解放する
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._active -= 1
+                return
+            # 数を変えずに、最も長く待っているタスクにスロットを渡す
+            loop, future = self._waiters.popleft()
+        loop.call_soon_threadsafe(self._hand_over, future)
+
+    def _hand_over(self, future: Any):
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, *exc_info):
+        self.release()
+
+
+class ConnectionLimiter:
+    """全体とホストごとの同時接続数の上限
+
+    asyncバックエンドはスクレイパーごと（地域ごとのスレッドごと）にイベントループを作るため、
+    ScraperManagerは1つのリミッターを全スクレイパーで共有し、同時に実行しても上限を超えないようにする。
+    """
+
+    def __init__(self, max_concurrency: int = 16, per_host_concurrency: int = 2):
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self._global = _Slots(max_concurrency)
+        self._hosts: Dict[str, _Slots] = {}
+        self._lock = threading.Lock()
+
+    def connection(self) -> _Slots:
+        """全体の同時接続数のスロット（async withで使う）"""
+        return self._global
+
+    def host(self, host: str) -> _Slots:
+        """ホストごとの同時接続数のスロット（async withで使う）"""
+        with self._lock:
+            slots = self._hosts.get(host)
+            if slots is None:
+                slots = self._hosts[host] = _Slots(self.per_host_concurrency)
+            return slots
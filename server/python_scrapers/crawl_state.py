@@ -0,0 +1,80 @@
+"""
+差分スクレイピング用のページごとの取得状態
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+# 何か月先のページかに応じた再取得の間隔（秒）。近い月ほど頻繁に取り直す
+REFRESH_INTERVALS = (
+    (0, 6 * 3600),        # 今月（一覧ページを含む）
+    (1, 24 * 3600),       # 来月
+    (3, 3 * 24 * 3600),   # 3か月先まで
+)
+FAR_REFRESH_INTERVAL = 7 * 24 * 3600
+
+
+def refresh_interval(months_ahead: int) -> float:
+    """何か月先のページかから再取得の間隔を返す"""
+    for limit, interval in REFRESH_INTERVALS:
+        if months_ahead <= limit:
+            return interval
+    return FAR_REFRESH_INTERVAL
+
+
+class CrawlState:
+    """ページごとの最終取得時刻と本文のハッシュを保存し、取り直しが必要なページを判定する"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._pages: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                self._pages = json.load(f).get('pages', {})
+        except (OSError, ValueError):
+            pass
+        # 今回の実行で取得・変更・スキップしたページ数
+        self.fetched = 0
+        self.changed = 0
+        self.skipped = 0
+
+    def is_stale(self, url: str, months_ahead: int = 0, now: Optional[float] = None) -> bool:
+        """前回の取得から再取得の間隔を過ぎているか（未取得のページは常にTrue）"""
+        with self._lock:
+            page = self._pages.get(url)
+            if page is None:
+                return True
+            now = time.time() if now is None else now
+            stale = now - page.get('fetched_at', 0) >= refresh_interval(months_ahead)
+            if not stale:
+                self.skipped += 1
+            return stale
+
+    def record(self, url: str, content: bytes) -> bool:
+        """取得したページを記録し、本文が前回から変わったかを返す"""
+        content_hash = hashlib.sha256(content).hexdigest()
+        now = time.time()
+        with self._lock:
+            page = self._pages.setdefault(url, {})
+            changed = page.get('content_hash') != content_hash
+            page['fetched_at'] = now
+            page['content_hash'] = content_hash
+            if changed:
+                page['changed_at'] = now
+                self.changed += 1
+            self.fetched += 1
+            return changed
+
+    def save(self):
+        """状態をファイルに書き出す"""
+        with self._lock:
+            data = json.dumps({'pages': self._pages}, ensure_ascii=False, indent=2)
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,186 @@
+"""
+日付・時刻の表記の正規化
+"""
+import re
+import unicodedata
+from collections import Counter
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import List, Any, Optional, Tuple
+
+
+# すでにISO形式の日付（最も多いため正規表現の前に判定する）
+ISO_DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+
+# 2024年8月12日（月） / 2024/8/12 / 2024.8.12 / 2024-8-12 / 令和6年8月12日
+FULL_DATE_PATTERN = re.compile(r'(令和|平成)?\s*(\d{1,4})\s*[年/\-.]\s*(\d{1,2})\s*[月/\-.]\s*(\d{1,2})')
+# 8月12日 / 8/12（年なし）
+MONTH_DAY_PATTERN = re.compile(r'(?<![\d/.\-])(\d{1,2})\s*[月/]\s*(\d{1,2})(?![\d/])')
+
+ERA_OFFSETS = {'令和': 2018, '平成': 1988}
+
+# 年のない日付が基準日よりこの日数以上前なら翌年の日付とみなす
+PAST_DAYS_LIMIT = 90
+
+# 18:00 / 18時 / 18時30分 と、開場・開演のラベル
+TIME_TOKEN_PATTERN = re.compile(
+    r'(?P<label>開場|開演|(?<![a-z])(?:open|doors?|start|show)(?![a-z]))|(?P<hour>\d{1,2})\s*(?::\s*(?P<minute>\d{2})|時\s*(?:(?P<jminute>\d{1,2})\s*分|半)?)',
+    re.IGNORECASE
+)
+OPEN_LABELS = ('開場', 'open', 'door')  # これ以外のラベルは開演
+# 18:00〜21:00 のように時刻の範囲をつなぐ記号
+RANGE_SEPARATOR_PATTERN = re.compile(r'\s*[〜~\-–—]\s*')
+
+
+def _normalize(value: Any) -> str:
+    return unicodedata.normalize('NFKC', str(value)).strip()
+
+
+def parse_date(value: Any, reference: Optional[date] = None) -> Optional[str]:
+    """日付の表記をISO形式（YYYY-MM-DD）にする。読み取れない場合はNone
+
+    referenceを渡した場合は年のない日付（8月12日など）も基準日に近い年として読む。
+    """
+    if not value:
+        return None
+    if isinstance(value, str) and len(value) == 10 and ISO_DATE_PATTERN.fullmatch(value):
+        try:
+            date.fromisoformat(value)
+            return value
+        except ValueError:
+            return None
+    return _parse_date(str(value), reference.isoformat() if reference else None)
+
+
+@lru_cache(maxsize=4096)
+def _parse_date(value: str, reference: Optional[str]) -> Optional[str]:
+    # 同じページの日付は何度も現れるため、表記ごとに結果をキャッシュする
+    text = _normalize(value)
+    match = FULL_DATE_PATTERN.search(text)
+    if match:
+        era, year, month, day = match.groups()
+        year = int(year) + ERA_OFFSETS[era] if era else int(year)
+        if year < 1000:
+            return None
+        return _iso(year, int(month), int(day))
+    if reference is None:
+        return None
+    match = MONTH_DAY_PATTERN.search(text)
+    if not match:
+        return None
+    base = date.fromisoformat(reference)
+    month, day = int(match.group(1)), int(match.group(2))
+    iso = _iso(base.year, month, day)
+    if iso and date.fromisoformat(iso) < base - timedelta(days=PAST_DAYS_LIMIT):
+        iso = _iso(base.year + 1, month, day)
+    return iso
+
+
+def _iso(year: int, month: int, day: int) -> Optional[str]:
+    try:
+        return date(year, month, day).isoformat()
+    except ValueError:
+        return None
+
+
+@lru_cache(maxsize=4096)
+def parse_times(value: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """「18:00開場・18:30開演」や「18:00〜21:00」などから(開場, 開演, 終演)をHH:MM形式で返す
+
+    ラベルは時刻の前後どちらにあってもよい。〜・~・- でつないだ時刻は開始・終了の範囲とみなす。
+    ラベルのない時刻は開演、範囲でない時刻が2つあれば開場・開演とみなす。
+    """
+    text = _normalize(value or '')
+    opened, started, ended = None, None, None
+    unlabeled = []
+    pending_label = None
+    last_time = None  # ラベルが付いていない直前の時刻
+    previous_end = None  # 直前の時刻の終わりの位置
+    for match in TIME_TOKEN_PATTERN.finditer(text):
+        label = match.group('label')
+        if label:
+            if last_time is not None:
+                # 18:00開場 の形（時刻の後ろのラベル）
+                unlabeled.remove(last_time)
+                if label.lower().startswith(OPEN_LABELS):
+                    opened = opened or last_time
+                else:
+                    started = started or last_time
+                last_time = None
+            else:
+                pending_label = label.lower()
+            continue
+        hour = int(match.group('hour'))
+        minute = match.group('minute') or match.group('jminute') or ('30' if match.group(0).endswith('半') else '0')
+        if hour > 29 or int(minute) > 59:
+            continue
+        time = f"{hour:02d}:{int(minute):02d}"
+        is_range_end = previous_end is not None and RANGE_SEPARATOR_PATTERN.fullmatch(text, previous_end, match.start())
+        previous_end = match.end()
+        if is_range_end and pending_label is None:
+            # 18:00〜21:00 の後ろの時刻（終演）
+            ended = ended or time
+            last_time = None
+        elif pending_label is not None:
+            # 開場18:00 の形（時刻の前のラベル）
+            if pending_label.startswith(OPEN_LABELS):
+                opened = opened or time
+            else:
+                started = started or time
+            pending_label = None
+        else:
+            unlabeled.append(time)
+            last_time = time
+    if unlabeled:
+        if len(unlabeled) >= 2 and opened is None and started is None:
+            opened, started = unlabeled[0], unlabeled[1]
+        elif started is None:
+            started = unlabeled[-1]
+        elif opened is None:
+            opened = unlabeled[0]
+    return opened, started, ended
+
+
+class DateTimeNormalizer:
+    """イベントの日付・時刻を正規化する処理段階
+
+    dateISO（YYYY-MM-DD）と openTime / startTime / endTime（HH:MM）を設定し、
+    読み取れなかった表記は数えておいて report で表示する。
+    """
+
+    def __init__(self, reference: Optional[date] = None):
+        # 年のない日付を読むときの基準日
+        self.reference = reference or date.today()
+        self.date_failures: Counter = Counter()
+        self.time_failures: Counter = Counter()
+
+    def normalize(self, events: List[Any]) -> List[Any]:
+        """Eventまたは辞書のリストの日付・時刻をまとめて正規化する"""
+        for event in events:
+            raw_date = event.get('date')
+            raw_time = event.get('time')
+            date_iso = parse_date(raw_date, self.reference)
+            if date_iso is None and raw_date:
+                self.date_failures[raw_date] += 1
+            opened, started, ended = parse_times(raw_time) if raw_time else (None, None, None)
+            if raw_time and opened is None and started is None and ended is None:
+                self.time_failures[raw_time] += 1
+            _set(event, 'dateISO', date_iso)
+            _set(event, 'openTime', opened)
+            _set(event, 'startTime', started)
+            _set(event, 'endTime', ended)
+        return events
+
+    def report(self, limit: int = 5):
+        """読み取れなかった日付・時刻を表示"""
+        for label, failures in (('dates', self.date_failures), ('times', self.time_failures)):
+            if failures:
+                examples = ', '.join(f"{value!r} x{count}" for value, count in failures.most_common(limit))
+                print(f"Could not parse {sum(failures.values())} {label}: {examples}")
+
+
+def _set(event: Any, field: str, value: Any):
+    if isinstance(event, dict):
+        event[field] = value
+    else:
+        setattr(event, field, value)
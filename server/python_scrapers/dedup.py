@@ -0,0 +1,314 @@
+"""
+イベントの重複判定・マージ用ユーティリティ
+"""
+import hashlib
+import re
+import unicodedata
+import zlib
+from collections import defaultdict
+from typing import List, Dict, Any, Tuple, NamedTuple, Iterable, Optional
+from urllib.parse import urlsplit
+
+from .dates import parse_date
+
+
+# 再スクレイピングで値が変わっても内容の変更とはみなさないフィールド
+VOLATILE_FIELDS = frozenset(['id', 'createdAt'])
+
+
+class MergeResult(NamedTuple):
+    """マージで追加・更新されたイベント"""
+    inserted: List[Dict[str, Any]]
+    updated: List[Tuple[Dict[str, Any], Dict[str, Any]]]  # (更新前, 更新後)
+    unchanged: int
+
+    def stats(self) -> Dict[str, int]:
+        return {'inserted': len(self.inserted), 'updated': len(self.updated), 'unchanged': self.unchanged}
+
+
+def normalize_text(value: Any) -> str:
+    """全角・半角や大文字・小文字、空白の違いを吸収した比較用の文字列"""
+    if value is None:
+        return ''
+    return ' '.join(unicodedata.normalize('NFKC', str(value)).lower().split())
+
+
+# タイトル比較で無視する記号・空白
+SYMBOL_PATTERN = re.compile(r'[\W_]+')
+
+# タイトルを読み取れなかったときにスクレイパーが付けるタイトル（別々のイベントでも同じになる）
+PLACEHOLDER_TITLE = '不明なイベント'
+
+
+def normalize_date(value: Any) -> str:
+    """日付の表記をISO形式（YYYY-MM-DD）に揃える。読み取れない場合は正規化した文字列を返す"""
+    # 年のない日付は実行した日によって年が変わるため、ここでは読まずに文字列のまま比較する
+    return parse_date(value) or normalize_text(value)
+
+
+def dedup_key(event: Dict[str, Any]) -> Tuple[str, str, str]:
+    """同じイベントかどうかを判定するキー（名前・日付・会場）"""
+    return (
+        normalize_text(event.get('name')),
+        # event_idと同じく日付の表記の違い（2024年8月12日 と 2024-08-12）は同じキーにする
+        normalize_date(event.get('date')),
+        normalize_text(event.get('location')),
+    )
+
+
+def content_changed(existing: Dict[str, Any], new: Dict[str, Any]) -> bool:
+    """再スクレイピングしたイベントに既存と異なるフィールドがあるか"""
+    return any(
+        existing.get(field) != value
+        for field, value in new.items()
+        if field not in VOLATILE_FIELDS
+    )
+
+
+def apply_update(existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """既存のIDと作成日時を保ったまま、再スクレイピングしたフィールドで更新したイベントを返す"""
+    updated = dict(existing)
+    updated.update((field, value) for field, value in new.items() if field not in VOLATILE_FIELDS)
+    return updated
+
+
+def event_id(event: Dict[str, Any]) -> int:
+    """取得元・名前・日付・会場から決まるイベントID
+
+    実行ごとに変わらないため、IDで既存イベントを引いたり前回との差分を取ったりできる。
+    ブラウザ側でも整数として扱えるよう52ビットに収める。
+    """
+    text = '\x1f'.join((
+        normalize_text(event.get('source')),
+        normalize_text(event.get('name')),
+        normalize_date(event.get('date')),
+        normalize_text(event.get('location')),
+    ))
+    return int(hashlib.sha1(text.encode('utf-8')).hexdigest()[:13], 16)
+
+
+# これより小さいIDは、内容から決まるIDになる前の連番のID（event_idが2^32未満になる確率は約100万分の1）
+LEGACY_ID_LIMIT = 1 << 32
+
+
+def rekey_legacy_events(events: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """連番のIDで保存されたイベントを内容から決まるIDに振り直す
+
+    保存形式（events.json / ストア）によらず同じIDになるよう、既存イベントを読み込むときに使う。
+    内容から決まるIDを持つイベントはそのままにする（更新でIDの元になった項目が変わっていても振り直さない）。
+    振り直して同じIDになったイベントは最初の1件だけを残す。
+    """
+    rekeyed, seen = [], set()
+    for event in events:
+        current = event.get('id')
+        if not isinstance(current, int) or current < LEGACY_ID_LIMIT:
+            event['id'] = event_id(event)
+        if event['id'] not in seen:
+            seen.add(event['id'])
+            rekeyed.append(event)
+    return rekeyed
+
+
+def merge_batch(new_events: List[Dict[str, Any]],
+                existing: Iterable[Dict[str, Any]]) -> Tuple[MergeResult, List[Dict[str, Any]]]:
+    """新しいイベントを既存イベントにマージする
+
+    existingには今回のイベントとIDまたは(名前, 日付, 会場)が重なる既存イベントだけを渡せばよい。
+    既存イベントはIDで引き、見つからなければ(名前, 日付, 会場)で引く。
+    マージ結果と、追加・更新されて書き込みが必要なイベントの最新の内容を返す。
+    """
+    current: Dict[Any, Dict[str, Any]] = {}
+    by_key: Dict[Tuple[str, str, str], Any] = {}
+    for event in existing:
+        current[event['id']] = event
+        by_key.setdefault(dedup_key(event), event['id'])
+
+    inserted, updated, unchanged = [], [], 0
+    changed_ids = {}
+    for new_event in new_events:
+        if new_event.get('id') is None:
+            new_event['id'] = event_id(new_event)
+        existing_id = new_event['id'] if new_event['id'] in current else by_key.get(dedup_key(new_event))
+        if existing_id is None:
+            current[new_event['id']] = new_event
+            by_key.setdefault(dedup_key(new_event), new_event['id'])
+            inserted.append(new_event)
+            existing_id = new_event['id']
+        elif content_changed(current[existing_id], new_event):
+            # 再スクレイピングで内容が変わったイベントは置き換える
+            previous = current[existing_id]
+            current[existing_id] = apply_update(previous, new_event)
+            updated.append((previous, current[existing_id]))
+        else:
+            unchanged += 1
+            continue
+        changed_ids[existing_id] = None
+    return MergeResult(inserted, updated, unchanged), [current[changed_id] for changed_id in changed_ids]
+
+
+class FuzzyDeduplicator:
+    """地域・日付が同じで掲載サイトが異なるイベントの中から、タイトルが似ているものを1件にまとめる
+
+    タイトルの文字2-gramからMinHashシグネチャを作り、(地域, 日付)のブロック内で
+    LSHのバンドが一致した組だけを比較するため、全組み合わせを比較せずに済む。
+    同じスクレイパーでもイベント一覧とライブハウスのサイトは別のサイトとして扱い、
+    同じサイトの同じ日の公演（Vol.1 と Vol.2 など）は別のイベントとして残す。
+    会場はサイトごとに表記が異なる（「Zepp Tokyo」と「Zepp Tokyo（お台場）」など）ためブロックには使わず、
+    比べる組の会場の表記が一方に含まれる場合だけまとめる。
+    日付・会場・タイトルを読み取れなかったイベントはまとめない（IDが同じイベントは常にまとめる）。
+    """
+
+    # MinHashの法とする素数（2^61 - 1）
+    PRIME = (1 << 61) - 1
+
+    def __init__(self, threshold: float = 0.5, num_perm: int = 32, bands: int = 16, ngram: int = 2):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        # 推定Jaccard係数がこの値以上なら同じイベントとみなす
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.ngram = ngram
+        # 実行ごとに結果が変わらないよう、ハッシュ関数の係数は固定のシードから作る
+        self._coefficients = [
+            (zlib.crc32(f"a{i}".encode()) | 1, zlib.crc32(f"b{i}".encode()))
+            for i in range(num_perm)
+        ]
+
+    def dedupe(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """重複をまとめたイベントのリストを返す（最初に現れたイベントを正とし、他のリンクを統合する）"""
+        blocks: Dict[Tuple[str, str], List[int]] = defaultdict(list)
+        venues: Dict[int, str] = {}
+        for position, event in enumerate(events):
+            # 年のない日付（8/12(月) など）も読めるよう、正規化の段階で求めたdateISOを使う
+            date_iso = event.get('dateISO') or parse_date(event.get('date'))
+            venue = _venue_key(event)
+            if not date_iso or not venue or normalize_text(event.get('name')) in ('', PLACEHOLDER_TITLE):
+                continue
+            venues[position] = venue
+            blocks[(normalize_text(event.get('region')), date_iso)].append(position)
+
+        parent = list(range(len(events)))
+        # 代表 → まとめたイベントの掲載サイト（同じサイトのイベントは同じクラスタに入れない）
+        origins = {position: {origin_site(event)} for position, event in enumerate(events)}
+
+        def find(position: int) -> int:
+            while parent[position] != position:
+                parent[position] = parent[parent[position]]
+                position = parent[position]
+            return position
+
+        def union(first: int, second: int):
+            # 先に現れたイベントを代表にする
+            root_first, root_second = find(first), find(second)
+            root, child = min(root_first, root_second), max(root_first, root_second)
+            parent[child] = root
+            origins[root] |= origins.pop(child)
+
+        # IDが同じイベント（同じ取得元・名前・日付・会場）は掲載ページが違っても同じイベントなのでまとめる
+        # （別々に残すと、マージで後のイベントが前のイベントを毎回上書きする）
+        first_positions: Dict[Any, int] = {}
+        for position, event in enumerate(events):
+            if event.get('id') is None:
+                continue
+            first = first_positions.setdefault(event['id'], position)
+            if first != position and find(first) != find(position):
+                union(first, position)
+
+        for positions in blocks.values():
+            if len(positions) < 2:
+                continue
+            signatures = {position: self.signature(events[position].get('name')) for position in positions}
+            for first, second in self._candidate_pairs(signatures):
+                venue_first, venue_second = venues[first], venues[second]
+                if venue_first not in venue_second and venue_second not in venue_first:
+                    continue
+                if self.similarity(signatures[first], signatures[second]) >= self.threshold:
+                    root_first, root_second = find(first), find(second)
+                    if root_first != root_second and not origins[root_first] & origins[root_second]:
+                        union(first, second)
+
+        clusters: Dict[int, List[int]] = defaultdict(list)
+        for position in range(len(events)):
+            clusters[find(position)].append(position)
+
+        deduped = []
+        for root in sorted(clusters):
+            members = [events[position] for position in clusters[root]]
+            deduped.append(merge_duplicates(members) if len(members) > 1 else members[0])
+        return deduped
+
+    def signature(self, title: Any) -> Tuple[int, ...]:
+        """タイトルの文字n-gramのMinHashシグネチャ"""
+        # 記号・空白の違い（「サマー・ロック」と「サマーロック」など）は無視する
+        text = SYMBOL_PATTERN.sub('', normalize_text(title))
+        if len(text) <= self.ngram:
+            grams = {text}
+        else:
+            grams = {text[i:i + self.ngram] for i in range(len(text) - self.ngram + 1)}
+        hashes = [zlib.crc32(gram.encode('utf-8')) for gram in grams]
+        return tuple(
+            min((a * value + b) % self.PRIME for value in hashes)
+            for a, b in self._coefficients
+        )
+
+    def similarity(self, first: Tuple[int, ...], second: Tuple[int, ...]) -> float:
+        """シグネチャから推定したJaccard係数"""
+        return sum(1 for x, y in zip(first, second) if x == y) / self.num_perm
+
+    def _candidate_pairs(self, signatures: Dict[int, Tuple[int, ...]]) -> Iterable[Tuple[int, int]]:
+        """LSHのいずれかのバンドが一致した組"""
+        seen = set()
+        for band in range(self.bands):
+            buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+            for position, signature in signatures.items():
+                buckets[signature[band * self.rows:(band + 1) * self.rows]].append(position)
+            for bucket in buckets.values():
+                for i, first in enumerate(bucket):
+                    for second in bucket[i + 1:]:
+                        pair = (first, second) if first < second else (second, first)
+                        if pair not in seen:
+                            seen.add(pair)
+                            yield pair
+
+
+def origin_site(event: Dict[str, Any]) -> str:
+    """イベントを掲載していたサイト（リンクのホスト）。リンクがなければ取得元のスクレイパー名"""
+    for link in event.get('links') or []:
+        host = urlsplit(link.get('url') or '').hostname
+        if host:
+            return host[4:] if host.startswith('www.') else host
+    return normalize_text(event.get('source'))
+
+
+def _venue_key(event: Dict[str, Any]) -> Optional[str]:
+    """会場の比較用の文字列。会場を読み取れず地域名が入っているイベントはNone"""
+    venue = SYMBOL_PATTERN.sub('', normalize_text(event.get('location')))
+    if not venue or venue == SYMBOL_PATTERN.sub('', normalize_text(event.get('region'))):
+        return None
+    return venue
+
+
+def merge_duplicates(events: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """同じイベントの複数の記録を1件にまとめる（先頭を正とし、リンク・アーティスト・空欄を補う）"""
+    canonical = dict(events[0])
+    links = list(canonical.get('links') or [])
+    link_urls = {link.get('url') for link in links}
+    artists = list(canonical.get('artists') or [])
+
+    for duplicate in events[1:]:
+        for link in duplicate.get('links') or []:
+            if link.get('url') not in link_urls:
+                link_urls.add(link.get('url'))
+                links.append(link)
+        for artist in duplicate.get('artists') or []:
+            if artist not in artists:
+                artists.append(artist)
+        for field, value in duplicate.items():
+            if field not in VOLATILE_FIELDS and value and not canonical.get(field):
+                canonical[field] = value
+
+    canonical['links'] = links
+    canonical['artists'] = artists
+    return canonical
@@ -0,0 +1,130 @@
+"""
+正規化済みのイベントレコード
+"""
+import json
+from sys import intern
+from typing import List, Dict, Any, Iterable, Optional
+
+
+# events.jsonに書き出すフィールド（この順で出力する）
+EVENT_FIELDS = (
+    'id', 'name', 'date', 'time', 'dateISO', 'openTime', 'startTime', 'endTime', 'location', 'artists',
+    'price', 'scale', 'links', 'genre', 'region', 'source', 'image', 'createdAt',
+)
+
+# 値の種類が少ないため、同じ文字列オブジェクトを共有させるフィールド
+INTERNED_FIELDS = ('scale', 'genre', 'region', 'source')
+
+
+class Event:
+    """1件のイベント
+
+    辞書よりも1件あたりのメモリが小さい__slots__クラス。
+    地域・ジャンル・規模・取得元の文字列はsys.internで全イベントに共有させる。
+    """
+
+    __slots__ = EVENT_FIELDS
+
+    def __init__(self, id: Optional[int] = None, name: str = '', date: str = '', time: str = '',
+                 dateISO: Optional[str] = None, openTime: Optional[str] = None, startTime: Optional[str] = None,
+                 endTime: Optional[str] = None, location: str = '', artists: Optional[List[str]] = None,
+                 price: str = '',
+                 scale: str = '中規模', links: Optional[List[Dict[str, str]]] = None, genre: str = 'その他',
+                 region: str = '', source: str = '', image: Optional[str] = None,
+                 createdAt: Optional[str] = None):
+        self.id = id
+        self.name = name
+        self.date = date
+        self.time = time
+        # DateTimeNormalizerで設定する（YYYY-MM-DD / HH:MM）
+        self.dateISO = dateISO
+        self.openTime = openTime
+        self.startTime = startTime
+        self.endTime = endTime
+        self.location = location
+        self.artists = artists if artists is not None else []
+        self.price = price
+        self.scale = intern(scale)
+        self.links = links if links is not None else []
+        self.genre = intern(genre)
+        self.region = intern(region)
+        self.source = intern(source)
+        self.image = image
+        self.createdAt = createdAt
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> 'Event':
+        """スクレイパーの出力や保存済みのイベントから作成（title/venue/ticket_priceも受け付ける）"""
+        return cls(
+            id=data.get('id'),
+            name=data.get('name') or data.get('title', ''),
+            date=data.get('date', ''),
+            time=data.get('time', ''),
+            dateISO=data.get('dateISO'),
+            openTime=data.get('openTime'),
+            startTime=data.get('startTime'),
+            endTime=data.get('endTime'),
+            location=data.get('location') or data.get('venue', ''),
+            artists=data.get('artists', []),
+            price=data.get('price') or data.get('ticket_price', ''),
+            scale=data.get('scale') or '中規模',
+            links=data.get('links', []),
+            genre=data.get('genre') or 'その他',
+            region=data.get('region') or '',
+            source=data.get('source') or '',
+            image=data.get('image'),
+            createdAt=data.get('createdAt'),
+        )
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'Event':
+        """to_rowで作ったリストから復元"""
+        return cls(*row)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in EVENT_FIELDS}
+
+    def to_row(self) -> List[Any]:
+        """EVENT_FIELDSの順に値を並べたリスト（キー名を繰り返さずにシリアライズできる）"""
+        return [getattr(self, field) for field in EVENT_FIELDS]
+
+    def get(self, field: str, default: Any = None) -> Any:
+        """辞書と同じようにフィールドを取得（dedup_keyなどの辞書向けの関数にそのまま渡せる）"""
+        return getattr(self, field, default) if field in EVENT_FIELDS else default
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Event) and self.to_row() == other.to_row()
+
+    def __repr__(self) -> str:
+        return f"Event(id={self.id!r}, name={self.name!r}, date={self.date!r}, region={self.region!r})"
+
+
+def normalize_events(events: Iterable[Dict[str, Any]]) -> List[Event]:
+    """スクレイパーの出力をまとめて正規化する（空の結果は捨てる）"""
+    return [Event.from_dict(event) for event in events if event]
+
+
+def intern_fields(event: Dict[str, Any]) -> Dict[str, Any]:
+    """読み込んだ辞書の地域・ジャンルなどの文字列を共有させる"""
+    for field in INTERNED_FIELDS:
+        value = event.get(field)
+        if isinstance(value, str):
+            event[field] = intern(value)
+    return event
+
+
+def dumps_events(events: Iterable[Event]) -> str:
+    """フィールド名を1回だけ書き、各イベントを値のリストとして書き出す"""
+    return json.dumps(
+        {'fields': EVENT_FIELDS, 'rows': [event.to_row() for event in events]},
+        ensure_ascii=False, separators=(',', ':')
+    )
+
+
+def loads_events(text: str) -> List[Event]:
+    """dumps_eventsで書き出したイベントを読み込む"""
+    data = json.loads(text)
+    if tuple(data['fields']) == EVENT_FIELDS:
+        return [Event.from_row(row) for row in data['rows']]
+    # フィールドの並びが異なる場合は名前で対応付ける
+    return [Event.from_dict(dict(zip(data['fields'], row))) for row in data['rows']]
@@ -0,0 +1,107 @@
+"""
+メモリ上のイベント索引
+"""
+import hashlib
+from bisect import bisect_left, bisect_right
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+
+from .dates import parse_date
+from .dedup import normalize_text
+
+
+# 二次索引を持つ項目（クエリの引数名 → 索引）
+INDEXED_FIELDS = ('region', 'genre', 'artist')
+
+
+class EventIndex:
+    """イベントを日付順に並べ、地域・ジャンル・出演者の二次索引を持つ読み取り専用の索引
+
+    各二次索引は値ごとにイベントの位置を昇順（＝日付順）で持つ。日付の範囲は位置の範囲になるため、
+    絞り込みと件数は二分探索で求まり、1ページ分のイベントだけを取り出せばよい。
+    """
+
+    def __init__(self, events: Iterable[Dict[str, Any]], version: Any = None):
+        dated, undated = [], []
+        for event in events:
+            date_iso = event.get('dateISO') or parse_date(event.get('date'))
+            if date_iso:
+                dated.append((date_iso, event))
+            else:
+                undated.append(event)
+        dated.sort(key=lambda item: (item[0], item[1].get('id') or 0))
+        # 日付のあるイベントを日付順に並べ、日付のないイベントはその後ろに置く
+        self.events: List[Dict[str, Any]] = [event for _, event in dated] + undated
+        self.dates: List[str] = [date_iso for date_iso, _ in dated]
+        self.version = version
+        self.etag = hashlib.sha1(f"{version!r}:{len(self.events)}".encode('utf-8')).hexdigest()[:16]
+
+        self.by_id: Dict[Any, int] = {}
+        self.postings: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        # 同じ出演者名は何度も現れるため、正規化した名前を使い回す
+        artist_keys: Dict[str, str] = {}
+        for position, event in enumerate(self.events):
+            self.by_id[event.get('id')] = position
+            for field, value in (('region', event.get('region')), ('genre', event.get('genre'))):
+                if value:
+                    self.postings[field].setdefault(value, []).append(position)
+            artists = set()
+            for artist in event.get('artists') or []:
+                key = artist_keys.get(artist)
+                if key is None:
+                    key = artist_keys[artist] = normalize_text(artist)
+                artists.add(key)
+            for artist in artists:
+                if artist:
+                    self.postings['artist'].setdefault(artist, []).append(position)
+        # 複数の条件を組み合わせたときに使う位置の集合（必要になった値だけ作る）
+        self._sets: Dict[Tuple[str, str], Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def get(self, event_id: Any) -> Optional[Dict[str, Any]]:
+        position = self.by_id.get(event_id)
+        return self.events[position] if position is not None else None
+
+    def values(self, field: str) -> Dict[str, int]:
+        """索引を持つ項目の値ごとのイベント数"""
+        return {value: len(positions) for value, positions in self.postings[field].items()}
+
+    def query(self, region: Optional[str] = None, genre: Optional[str] = None, artist: Optional[str] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None,
+              offset: int = 0, limit: int = 50) -> Tuple[int, List[Dict[str, Any]]]:
+        """条件に合うイベントの件数と、日付順でoffset件目からlimit件を返す
+
+        日付（YYYY-MM-DD）を指定した場合は日付のないイベントを含めない。
+        """
+        start, end = 0, len(self.events)
+        if date_from or date_to:
+            start = bisect_left(self.dates, date_from) if date_from else 0
+            end = bisect_right(self.dates, date_to) if date_to else len(self.dates)
+
+        filters = [(field, value) for field, value in
+                   (('region', region), ('genre', genre), ('artist', normalize_text(artist) if artist else None))
+                   if value]
+        if not filters:
+            total = max(0, end - start)
+            first = start + offset
+            return total, self.events[first:min(end, first + limit)]
+
+        # 日付の範囲に入る位置だけを切り出し、最も少ない条件の位置を他の条件の集合で絞る
+        candidates = []
+        for field, value in filters:
+            positions = self.postings[field].get(value, [])
+            candidates.append((positions[bisect_left(positions, start):bisect_left(positions, end)], field, value))
+        candidates.sort(key=lambda candidate: len(candidate[0]))
+        matches = candidates[0][0]
+        if len(candidates) > 1:
+            others = [self._position_set(field, value) for _, field, value in candidates[1:]]
+            matches = [position for position in matches if all(position in other for other in others)]
+        return len(matches), [self.events[position] for position in matches[offset:offset + limit]]
+
+    def _position_set(self, field: str, value: str) -> Set[int]:
+        key = (field, value)
+        positions = self._sets.get(key)
+        if positions is None:
+            positions = self._sets[key] = set(self.postings[field].get(value, []))
+        return positions
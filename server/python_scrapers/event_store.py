@@ -0,0 +1,306 @@
+"""
+追記型のイベントストア（JSON Linesのセグメントファイル）
+"""
+import json
+import os
+import re
+from itertools import groupby
+from typing import List, Dict, Any, Iterator, Iterable, Optional, Set, Tuple
+
+from .dedup import MergeResult, dedup_key, merge_batch
+
+
+SEGMENT_PATTERN = re.compile(r'^segment-(\d{6})\.jsonl$')
+
+
+class JsonLinesEventStore:
+    """イベントを1行1件でセグメントファイルに追記するストア
+
+    同じIDのイベントが複数回書かれた場合は最後に書かれたものが有効になる。
+    セグメントが増えたら compact で有効な記録だけを新しいセグメントにまとめる。
+    各セグメントには索引ファイル（segment-NNNNNN.idx、1行に[ID, 重複判定キー, 位置, 長さ]）を追記しておき、
+    upsert は今回のイベントとIDかキーが重なる記録だけを位置から読む（既存イベントを全件走査しない）。
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int = 8 * 1024 * 1024, max_segments: int = 16):
+        self.directory = directory
+        # アクティブなセグメントがこのサイズを超えたら次のセグメントに切り替える
+        self.segment_max_bytes = segment_max_bytes
+        # セグメント数がこれを超えたらupsertの後に圧縮する
+        self.max_segments = max_segments
+        # ID → 最後の記録の(セグメント番号, 位置, 長さ)と、重複判定キー → ID（最初に使うときに索引ファイルから読む）
+        self._index: Optional[Dict[Any, Tuple[int, int, int]]] = None
+        self._keys: Dict[str, List[Any]] = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def is_empty(self) -> bool:
+        return not any(os.path.getsize(path) for _, path in self._segments())
+
+    def version(self) -> Tuple[Tuple[str, int, int], ...]:
+        """ストアの版（セグメントの追記・圧縮で変わる。読み込み直す必要があるかの判定に使う）"""
+        version = []
+        for _, path in self._segments():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            version.append((os.path.basename(path), stat.st_size, stat.st_mtime_ns))
+        return tuple(version)
+
+    def iter_events(self) -> Iterator[Dict[str, Any]]:
+        """有効なイベントを1件ずつ返す（全件をメモリに載せない）"""
+        index = self._load_index()
+        # セグメントごとの有効な記録（各IDの最後の記録）の位置
+        live: Dict[int, Set[int]] = {}
+        for number, offset, _ in index.values():
+            live.setdefault(number, set()).add(offset)
+
+        for number, path in self._segments():
+            offsets = live.get(number)
+            if not offsets:
+                continue
+            with open(path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    # 上書きされた記録はパースせずに読み飛ばす
+                    if offset in offsets and line.endswith(b'\n'):
+                        yield json.loads(line)
+                    offset += len(line)
+
+    def append(self, events: Iterable[Dict[str, Any]]) -> int:
+        """イベントをアクティブなセグメントに追記し、書いた件数を返す"""
+        index = self._load_index()
+        count = 0
+        number, path = self._active_segment()
+        _truncate_partial_line(path)
+        f = open(path, 'ab')
+        # 索引はセグメントの記録をディスクに書いた後で追記する（索引が記録より先に進まないようにする）
+        entries: List[Tuple[int, List[Any]]] = []
+        try:
+            for event in events:
+                record = _encode(event)
+                entries.append((number, [event.get('id'), _encode_key(dedup_key(event)), f.tell(), len(record)]))
+                f.write(record)
+                count += 1
+                if f.tell() >= self.segment_max_bytes:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    f.close()
+                    number, path = self._new_segment()
+                    f = open(path, 'ab')
+            f.flush()
+            os.fsync(f.fileno())
+        finally:
+            f.close()
+        for segment in sorted({number for number, _ in entries}):
+            self._append_index(segment, [entry for entry_number, entry in entries if entry_number == segment])
+        for number, entry in entries:
+            self._add_to_index(index, self._keys, number, entry)
+        return count
+
+    def upsert(self, new_events: List[Dict[str, Any]]) -> MergeResult:
+        """新しいイベントをマージし、追加・更新されたイベントだけを追記する"""
+        # 今回のイベントとIDかキーが重なる既存イベントだけを索引の位置から読む
+        index = self._load_index()
+        wanted = set()
+        for new_event in new_events:
+            if new_event.get('id') in index:
+                wanted.add(new_event['id'])
+            wanted.update(self._keys.get(_encode_key(dedup_key(new_event)), ()))
+
+        result, changed = merge_batch(new_events, self._read(wanted))
+        self.append(changed)
+        if len(self._segments()) > self.max_segments:
+            self.compact()
+        return result
+
+    def compact(self) -> int:
+        """有効な記録だけを新しいセグメントに書き出し、古いセグメントを削除する"""
+        segments = self._segments()
+        if not segments:
+            return 0
+        number = segments[-1][0] + 1
+        path = self._segment_path(number)
+        tmp_path = path + '.tmp'
+        index_lines = []
+        with open(tmp_path, 'wb') as f:
+            for event in self.iter_events():
+                record = _encode(event)
+                index_lines.append(_encode_index([event.get('id'), _encode_key(dedup_key(event)), f.tell(), len(record)]))
+                f.write(record)
+            f.flush()
+            os.fsync(f.fileno())
+        index_path = self._index_path(number)
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+            f.write(''.join(index_lines))
+        # 置き換えは1回のrenameで行い、途中で止まっても有効な記録が失われないようにする
+        # （索引が残っていないセグメントは次に読むときに本体から索引を作り直す）
+        os.replace(tmp_path, path)
+        os.replace(index_path + '.tmp', index_path)
+        for old_number, old_path in segments:
+            os.remove(old_path)
+            try:
+                os.remove(self._index_path(old_number))
+            except FileNotFoundError:
+                pass
+        self._index = None
+        count = len(index_lines)
+        print(f"Compacted {len(segments)} segments into {os.path.basename(path)} ({count} events)")
+        return count
+
+    def export_json(self, filepath: str) -> int:
+        """既存APIが読むevents.json形式に書き出し、件数を返す"""
+        count = 0
+        tmp_path = filepath + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for event in self.iter_events():
+                f.write(',\n  ' if count else '\n  ')
+                f.write(json.dumps(event, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+                count += 1
+            f.write('\n]' if count else ']')
+        os.replace(tmp_path, filepath)
+        return count
+
+    def _read(self, ids: Iterable[Any]) -> List[Dict[str, Any]]:
+        """IDの最後の記録を位置から読む（書き込まれた順に返す）"""
+        locations = sorted(self._index[event_id] for event_id in ids)
+        events = []
+        for number, group in groupby(locations, key=lambda location: location[0]):
+            with open(self._segment_path(number), 'rb') as f:
+                for _, offset, length in group:
+                    f.seek(offset)
+                    events.append(json.loads(f.read(length)))
+        return events
+
+    def _load_index(self) -> Dict[Any, Tuple[int, int, int]]:
+        """索引ファイルを読む。索引が記録に追いついていないセグメントは本体を読んで索引を補う"""
+        if self._index is not None:
+            return self._index
+        index: Dict[Any, Tuple[int, int, int]] = {}
+        keys: Dict[str, List[Any]] = {}
+        for number, path in self._segments():
+            size = os.path.getsize(path)
+            index_path = self._index_path(number)
+            entries = []
+            try:
+                with open(index_path, 'r', encoding='utf-8') as f:
+                    entries = [json.loads(line) for line in f if line.endswith('\n')]
+            except FileNotFoundError:
+                pass
+            covered = max((offset + length for _, _, offset, length in entries), default=0)
+            if covered > size:
+                # 別のセグメントの索引が残っている（圧縮の途中で止まった）場合は作り直す
+                entries, covered = [], 0
+                os.remove(index_path)
+            if covered < size:
+                missing = list(_scan(path, covered))
+                self._append_index(number, missing)
+                entries.extend(missing)
+            for entry in entries:
+                self._add_to_index(index, keys, number, entry)
+        self._index, self._keys = index, keys
+        return index
+
+    def _add_to_index(self, index: Dict[Any, Tuple[int, int, int]], keys: Dict[str, List[Any]],
+                      number: int, entry: List[Any]):
+        event_id, key, offset, length = entry
+        index[event_id] = (number, offset, length)
+        ids = keys.setdefault(key, [])
+        if event_id not in ids:
+            ids.append(event_id)
+
+    def _append_index(self, number: int, entries: List[List[Any]]):
+        if not entries:
+            return
+        index_path = self._index_path(number)
+        _truncate_partial_line(index_path)
+        with open(index_path, 'a', encoding='utf-8') as f:
+            f.write(''.join(_encode_index(entry) for entry in entries))
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        segments = []
+        for name in os.listdir(self.directory):
+            match = SEGMENT_PATTERN.match(name)
+            if match:
+                segments.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(segments)
+
+    def _active_segment(self) -> Tuple[int, str]:
+        segments = self._segments()
+        if not segments or os.path.getsize(segments[-1][1]) >= self.segment_max_bytes:
+            return self._new_segment()
+        return segments[-1]
+
+    def _new_segment(self) -> Tuple[int, str]:
+        segments = self._segments()
+        number = segments[-1][0] + 1 if segments else 1
+        path = self._segment_path(number)
+        # 排他的に作成し、既存のセグメントを上書きしないようにする
+        open(path, 'x', encoding='utf-8').close()
+        try:
+            # 以前の同じ番号のセグメントの索引が残っていれば消す
+            os.remove(self._index_path(number))
+        except FileNotFoundError:
+            pass
+        return number, path
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment-{number:06d}.jsonl")
+
+    def _index_path(self, number: int) -> str:
+        return os.path.join(self.directory, f"segment-{number:06d}.idx")
+
+
+def _encode(event: Dict[str, Any]) -> bytes:
+    """1件のイベントを1行のJSONにする"""
+    return (json.dumps(event, ensure_ascii=False, separators=(',', ':')) + '\n').encode('utf-8')
+
+
+def _encode_key(key: Tuple[str, str, str]) -> str:
+    """dedup_keyを索引の1つの値にする"""
+    return '\x1f'.join(key)
+
+
+def _encode_index(entry: List[Any]) -> str:
+    return json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n'
+
+
+def _scan(path: str, start: int) -> Iterator[List[Any]]:
+    """セグメントのstartより後の完全な記録の索引を作る"""
+    with open(path, 'rb') as f:
+        f.seek(start)
+        offset = start
+        for line in f:
+            # 追記中に中断された末尾の不完全な行は含めない
+            if not line.endswith(b'\n'):
+                break
+            event = json.loads(line)
+            yield [event.get('id'), _encode_key(dedup_key(event)), offset, len(line)]
+            offset += len(line)
+
+
+def _truncate_partial_line(path: str, chunk_size: int = 64 * 1024):
+    """追記中に中断されて末尾に残った不完全な行を切り詰める
+
+    そのまま追記すると次の記録が不完全な行の続きになり、読み込めない1行になってしまう。
+    """
+    try:
+        f = open(path, 'rb+')
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            f.seek(start)
+            chunk = f.read(position - start)
+            if position == end and chunk.endswith(b'\n'):
+                return
+            newline = chunk.rfind(b'\n')
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        f.truncate(position)
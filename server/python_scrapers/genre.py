@@ -0,0 +1,86 @@
+"""
+キーワード表によるジャンル判定
+"""
+import re
+from typing import List, Dict, Iterable, Sequence, Tuple
+
+
+# タイトル・出演者に含まれるキーワードとジャンル（上にあるジャンルほど優先）
+KEYWORD_GENRES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ('ロック', ('rock', 'ロック')),
+    ('ジャズ', ('jazz', 'ジャズ')),
+    ('クラシック', ('classical', 'クラシック', 'classic')),
+    ('EDM', ('edm', 'electronic', 'エレクトロ')),
+)
+# どのキーワードにも当てはまらない場合のジャンル
+DEFAULT_GENRE = 'ポップ'
+
+# 札幌教育文化会館のカテゴリとジャンルの対応
+CATEGORY_GENRES: Dict[str, str] = {
+    '音楽': 'クラシック',
+    '洋舞・邦舞': 'ダンス',
+    '展示': '展示',
+    'オペラ': 'クラシック',
+    '演劇': '演劇',
+    'その他': 'その他',
+}
+DEFAULT_CATEGORY_GENRE = 'その他'
+
+
+def keyword_pattern(keywords: Iterable[str]) -> str:
+    """キーワードのいずれかに一致する正規表現（長いキーワードを先に試す）"""
+    return '|'.join(re.escape(keyword.lower()) for keyword in sorted(keywords, key=len, reverse=True))
+
+
+class GenreClassifier:
+    """キーワード表でジャンルを判定する
+
+    タイトルと出演者を1つの文字列にまとめ、表の優先順に部分文字列として探す
+    （CPythonでは単純なキーワードの検索は正規表現の選択よりも部分文字列検索の方が速い）。
+    同じ(タイトル, 出演者)の判定結果はキャッシュし、同じ文字列を判定し直さない。
+    """
+
+    def __init__(self, table: Sequence[Tuple[str, Sequence[str]]] = KEYWORD_GENRES,
+                 default: str = DEFAULT_GENRE, cache_size: int = 65536):
+        self.table = [(genre, tuple(keyword.lower() for keyword in keywords)) for genre, keywords in table]
+        self.default = default
+        # (タイトル, 出演者)→ジャンル。上限に達したら空にする
+        self.cache_size = cache_size
+        self._cache: Dict[Tuple[str, Tuple[str, ...]], str] = {}
+
+    def classify(self, title: str, artists: Sequence[str] = ()) -> str:
+        """タイトルと出演者からジャンルを判定"""
+        return self.classify_many([(title, artists)])[0]
+
+    def classify_many(self, items: Iterable[Tuple[str, Sequence[str]]]) -> List[str]:
+        """(タイトル, 出演者)の組をまとめて判定（判定済みの組はキャッシュから返す）"""
+        cache = self._cache
+        classify_text = self._classify_text
+        genres = []
+        for title, artists in items:
+            key = (title or '', tuple(artists))
+            genre = cache.get(key)
+            if genre is None:
+                genre = classify_text(*key)
+                if len(cache) >= self.cache_size:
+                    cache.clear()
+                cache[key] = genre
+            genres.append(genre)
+        return genres
+
+    def _classify_text(self, title: str, artists: Tuple[str, ...]) -> str:
+        text = f"{title} {' '.join(artists)}".lower()
+        for genre, keywords in self.table:
+            for keyword in keywords:
+                if keyword in text:
+                    return genre
+        return self.default
+
+
+def normalize_category(category: str) -> str:
+    """札幌教育文化会館のカテゴリをジャンルに変換"""
+    return CATEGORY_GENRES.get(category, DEFAULT_CATEGORY_GENRE)
+
+
+# 全スクレイパーで共有し、判定結果のキャッシュも共有する
+genre_classifier = GenreClassifier()
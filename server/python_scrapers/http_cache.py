@@ -0,0 +1,163 @@
+"""
+条件付きGET用のHTTPレスポンスキャッシュ
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import List, Dict, Any, Optional
+
+
+class HttpCache:
+    """ETag/Last-Modifiedと本文をディスクに保存し、304応答のときに本文を再利用する
+
+    本文から抽出したイベントもURLごとに保存しておき、304応答のページは解析せずにそれを使う。
+    """
+
+    def __init__(self, cache_dir: str, ttl: float = 7 * 24 * 3600, max_bytes: int = 200 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        # 最後に検証されてからこの秒数を過ぎたエントリは使わずに取り直す
+        self.ttl = ttl
+        # 本文の合計サイズの上限（超えたら古く使われていないものから削除）
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._total_bytes: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """有効期限内のエントリのメタデータを返す"""
+        meta = self._read_meta(url)
+        if meta is None:
+            return None
+        if time.time() - meta.get('validated_at', 0) > self.ttl:
+            with self._lock:
+                self._remove(self._key(url))
+                if self._total_bytes is not None:
+                    self._total_bytes -= meta.get('size', 0)
+            return None
+        return meta
+
+    def validators(self, meta: Dict[str, Any]) -> Dict[str, str]:
+        """条件付きGETのリクエストヘッダーを作成"""
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def load_body(self, url: str) -> Optional[bytes]:
+        """キャッシュした本文を読み込む"""
+        path = self._body_path(self._key(url))
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+        except OSError:
+            return None
+        # 最近使ったエントリとして削除対象から外れるようにする
+        os.utime(path)
+        return content
+
+    def store(self, url: str, content: bytes, headers: Dict[str, str]):
+        """200応答の本文と検証用ヘッダーを保存"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            # 条件付きGETに使えないレスポンスは保存しない
+            return
+        key = self._key(url)
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'validated_at': time.time(),
+            'size': len(content),
+        }
+        with self._lock:
+            old = self._read_meta(url)
+            # 以前の本文から抽出したイベントは使えなくなる
+            self._remove_file(self._events_path(key))
+            self._write_file(self._body_path(key), content)
+            self._write_file(self._meta_path(key), json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+            if self._total_bytes is not None:
+                self._total_bytes += len(content) - (old['size'] if old else 0)
+            self._evict_if_needed()
+
+    def load_events(self, url: str, parser_id: str) -> Optional[List[Dict[str, Any]]]:
+        """キャッシュした本文を同じパーサーで解析したときのイベントを返す"""
+        try:
+            with open(self._events_path(self._key(url)), 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return saved['events'] if saved.get('parser') == parser_id else None
+
+    def store_events(self, url: str, parser_id: str, events: List[Dict[str, Any]]):
+        """キャッシュした本文から抽出したイベントを保存（本文を保存していないURLは何もしない）"""
+        key = self._key(url)
+        data = json.dumps({'parser': parser_id, 'events': events}, ensure_ascii=False).encode('utf-8')
+        with self._lock:
+            if os.path.exists(self._meta_path(key)):
+                self._write_file(self._events_path(key), data)
+
+    def revalidated(self, url: str):
+        """304応答を受けたエントリの有効期限を延ばす"""
+        with self._lock:
+            meta = self._read_meta(url)
+            if meta is not None:
+                meta['validated_at'] = time.time()
+                self._write_file(self._meta_path(self._key(url)), json.dumps(meta, ensure_ascii=False).encode('utf-8'))
+
+    def _evict_if_needed(self):
+        if self._total_bytes is None:
+            self._total_bytes = sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith('.body'))
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        # 最後に使われたのが古い順に、上限の9割まで削除する
+        bodies = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.body')),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in bodies:
+            if self._total_bytes <= self.max_bytes * 0.9:
+                break
+            self._total_bytes -= entry.stat().st_size
+            self._remove(entry.name[:-len('.body')])
+
+    def _read_meta(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._meta_path(self._key(url)), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _write_file(self, path: str, data: bytes):
+        # 途中で中断しても壊れたファイルが残らないよう、一時ファイルから置き換える
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _remove(self, key: str):
+        for path in (self._body_path(key), self._meta_path(key), self._events_path(key)):
+            self._remove_file(path)
+
+    def _remove_file(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _key(self, url: str) -> str:
+        return hashlib.sha1(url.encode('utf-8')).hexdigest()
+
+    def _body_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.body")
+
+    def _meta_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _events_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.events.json")
@@ -0,0 +1,202 @@
+"""
+スクレイピング実行の計測と実行レポート
+"""
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, Any, Callable, Iterator, Optional
+
+
+# リクエスト所要時間のヒストグラムの区切り（秒。最後の区間は上限なし）
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RunMetrics:
+    """取得・解析・マージ・保存の所要時間と件数を集計する
+
+    複数のスレッドから記録できる。段階ごとの時間は各スレッドでの所要時間の合計のため、
+    並列実行では実行全体の経過時間より長くなることがある。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """集計を空にして計測を始め直す"""
+        with self._lock:
+            self.started_at = time.time()
+            self._started = time.perf_counter()
+            # 段階名 → 秒数（sleep / fetch / parse / normalize / merge / save など）
+            self.stages: Dict[str, float] = {}
+            self.hosts: Dict[str, Dict[str, Any]] = {}
+            self.parsers: Dict[str, Dict[str, Any]] = {}
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """with文の中の処理時間を段階の時間に加える"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - start)
+
+    def add_time(self, stage: str, seconds: float):
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def record_sleep(self, host: str, seconds: float):
+        """レート制限・バックオフで待った時間を記録"""
+        with self._lock:
+            self.stages['sleep'] = self.stages.get('sleep', 0.0) + seconds
+            self._host(host)['sleep_seconds'] += seconds
+
+    def record_request(self, host: str, seconds: float, size: int, status: Optional[int]):
+        """1リクエストの所要時間・受信バイト数・ステータス（失敗した場合はNone）を記録"""
+        with self._lock:
+            self.stages['fetch'] = self.stages.get('fetch', 0.0) + seconds
+            stats = self._host(host)
+            stats['requests'] += 1
+            stats['bytes'] += size
+            stats['seconds'] += seconds
+            stats['max_seconds'] = max(stats['max_seconds'], seconds)
+            stats['latency_histogram'][bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            key = str(status) if status is not None else 'error'
+            stats['statuses'][key] = stats['statuses'].get(key, 0) + 1
+
+    def record_parse(self, parser: str, seconds: float, events: int, element_errors: int = 0):
+        """1ページの解析時間・抽出したイベント数・要素単位の解析エラー数を記録"""
+        with self._lock:
+            self.stages['parse'] = self.stages.get('parse', 0.0) + seconds
+            stats = self._parser(parser)
+            stats['pages'] += 1
+            stats['events'] += events
+            stats['seconds'] += seconds
+            stats['element_errors'] += element_errors
+
+    def record_parse_failure(self, parser: str):
+        """ページ全体の解析に失敗したことを記録"""
+        with self._lock:
+            self._parser(parser)['page_errors'] += 1
+
+    def record_cached_parse(self, parser: str, events: int):
+        """解析キャッシュの結果を使ったページを記録"""
+        with self._lock:
+            stats = self._parser(parser)
+            stats['cached_pages'] += 1
+            stats['events'] += events
+
+    def report(self) -> Dict[str, Any]:
+        """実行レポート（JSONに変換できる辞書）"""
+        with self._lock:
+            hosts = {}
+            for host, stats in self.hosts.items():
+                labels = [f"<={bound:g}s" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]:g}s"]
+                hosts[host] = dict(
+                    stats,
+                    seconds=round(stats['seconds'], 3),
+                    max_seconds=round(stats['max_seconds'], 3),
+                    sleep_seconds=round(stats['sleep_seconds'], 3),
+                    mean_seconds=round(stats['seconds'] / stats['requests'], 3) if stats['requests'] else None,
+                    latency_histogram=dict(zip(labels, stats['latency_histogram'])),
+                    statuses=dict(stats['statuses']),
+                )
+            parsers = {}
+            for parser, stats in self.parsers.items():
+                pages = stats['pages'] + stats['cached_pages']
+                parsers[parser] = dict(
+                    stats,
+                    seconds=round(stats['seconds'], 3),
+                    events_per_page=round(stats['events'] / pages, 1) if pages else None,
+                )
+            return {
+                'started_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started_at)),
+                'elapsed_seconds': round(time.perf_counter() - self._started, 3),
+                'stages': {stage: round(seconds, 3) for stage, seconds in self.stages.items()},
+                'totals': {
+                    'requests': sum(stats['requests'] for stats in self.hosts.values()),
+                    'bytes': sum(stats['bytes'] for stats in self.hosts.values()),
+                    'pages_parsed': sum(stats['pages'] for stats in self.parsers.values()),
+                    'parse_errors': sum(stats['page_errors'] + stats['element_errors'] for stats in self.parsers.values()),
+                },
+                'hosts': hosts,
+                'parsers': parsers,
+            }
+
+    def save(self, path: str, **extra: Any) -> Dict[str, Any]:
+        """実行レポートをJSONファイルに保存（extraはレポートにそのまま加える）"""
+        report = self.report()
+        report.update(extra)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        return report
+
+    def print_summary(self):
+        """段階ごとの時間と、ホスト・パーサーごとの概要を表示"""
+        report = self.report()
+        stages = ', '.join(f"{stage} {seconds:.2f}s" for stage, seconds in report['stages'].items())
+        print(f"Run took {report['elapsed_seconds']:.2f}s ({stages})")
+        for host, stats in report['hosts'].items():
+            print(f"  {host}: {stats['requests']} requests, {stats['bytes'] / 1024:.0f}KB, "
+                  f"mean {stats['mean_seconds'] or 0:.3f}s, max {stats['max_seconds']:.3f}s, slept {stats['sleep_seconds']:.1f}s")
+        for parser, stats in report['parsers'].items():
+            print(f"  {parser}: {stats['pages']} pages parsed ({stats['cached_pages']} cached), "
+                  f"{stats['events_per_page'] or 0} events/page, {stats['seconds']:.2f}s, "
+                  f"{stats['page_errors'] + stats['element_errors']} errors")
+
+    def _host(self, host: str) -> Dict[str, Any]:
+        stats = self.hosts.get(host)
+        if stats is None:
+            stats = self.hosts[host] = {
+                'requests': 0, 'bytes': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'sleep_seconds': 0.0,
+                'latency_histogram': [0] * (len(LATENCY_BUCKETS) + 1), 'statuses': {},
+            }
+        return stats
+
+    def _parser(self, parser: str) -> Dict[str, Any]:
+        stats = self.parsers.get(parser)
+        if stats is None:
+            stats = self.parsers[parser] = {
+                'pages': 0, 'cached_pages': 0, 'events': 0, 'seconds': 0.0, 'page_errors': 0, 'element_errors': 0,
+            }
+        return stats
+
+
+def timed(stage: str) -> Callable:
+    """メソッドの処理時間を self.metrics の段階の時間に加えるデコレーター"""
+    def decorator(method: Callable) -> Callable:
+        @wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.timer(stage):
+                return method(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def profiled(path: Optional[str], limit: int = 30) -> Iterator[None]:
+    """pathを指定した場合はwith文の中をcProfileで計測し、統計を保存して上位を表示する
+
+    cProfileは呼び出したスレッドだけを計測するため、全体を見る場合は --workers 1 で実行する。
+    保存した統計は `python -m pstats <path>` や snakeviz などで開ける。
+    """
+    if not path:
+        yield
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"Profile saved to {path}")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(limit)
@@ -0,0 +1,73 @@
+"""
+ページ本文のハッシュをキーにした解析結果キャッシュ
+"""
+import hashlib
+import json
+import os
+import threading
+from typing import List, Dict, Any, Optional
+
+
+class ParseCache:
+    """同じ本文・同じパーサーの組み合わせなら、soupを作らずに前回抽出したイベントを返す"""
+
+    def __init__(self, cache_dir: str, max_entries: int = 5000):
+        self.cache_dir = cache_dir
+        # 保存するエントリ数の上限（超えたら古く使われていないものから削除）
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: Optional[int] = None
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def key(self, content: bytes, parser_id: str) -> str:
+        """本文とパーサー（クラス・バージョン・メソッド・引数）からキーを作成"""
+        digest = hashlib.sha256(content)
+        digest.update(b'\0')
+        digest.update(parser_id.encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """保存済みの解析結果を返す"""
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                events = json.load(f)
+        except (OSError, ValueError):
+            return None
+        # 最近使ったエントリとして削除対象から外れるようにする
+        os.utime(path)
+        return events
+
+    def put(self, key: str, events: List[Dict[str, Any]]):
+        """解析結果を保存"""
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with self._lock:
+            exists = os.path.exists(path)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(events, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            if self._entries is not None and not exists:
+                self._entries += 1
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        if self._entries is None:
+            self._entries = sum(1 for name in os.listdir(self.cache_dir) if name.endswith('.json'))
+        if self._entries <= self.max_entries:
+            return
+
+        # 最後に使われたのが古い順に、上限の9割まで削除する
+        entries = sorted(
+            (entry for entry in os.scandir(self.cache_dir) if entry.name.endswith('.json')),
+            key=lambda entry: entry.stat().st_mtime
+        )
+        for entry in entries[:self._entries - int(self.max_entries * 0.9)]:
+            try:
+                os.remove(entry.path)
+                self._entries -= 1
+            except OSError:
+                pass
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
@@ -0,0 +1,73 @@
+"""
+ページ解析用のプロセスプール
+"""
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+
+# ワーカープロセスごとのスクレイパー（クラス → インスタンス）
+_worker_scrapers: Dict[type, Any] = {}
+
+
+def _parse_page(scraper_class: type, settings: Dict[str, Any], parser: str, args: Tuple[Any, ...],
+                content: bytes) -> Tuple[List[Dict[str, Any]], float, int]:
+    """ワーカープロセスでページを解析し、(イベント, 解析秒数, 要素の解析エラー数)を返す
+
+    例外は呼び出し元のプロセスで再送出される。
+    """
+    scraper = _worker_scrapers.get(scraper_class)
+    if scraper is None:
+        # スクレイパーは引数なしで作成できる必要がある（scraper_registry.createと同じ）
+        scraper = scraper_class()
+        _worker_scrapers[scraper_class] = scraper
+    # 呼び出し元のスクレイパーと同じ設定で解析する
+    for name, value in settings.items():
+        setattr(scraper, name, value)
+    return scraper.measure_parse(parser, args, content)
+
+
+class ParsePool:
+    """BeautifulSoupによる解析を別プロセスで行い、取得と解析を別々のコアで進める
+
+    取得したページは有界のキューで受け渡し、解析中のページ数もプロセス数の数倍までに
+    抑えるため、解析が追いつかないときは取得側が待つ。
+    """
+
+    def __init__(self, processes: int, queue_size: Optional[int] = None):
+        self.processes = max(1, processes)
+        # 取得済みで解析を待つページ数の上限
+        self.queue_size = queue_size or self.processes * 4
+        # 解析中（プロセスに渡したが結果を受け取っていない）ページ数の上限
+        self._slots = threading.BoundedSemaphore(self.processes * 2)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def submit(self, scraper, parser: str, args: Tuple[Any, ...], content: bytes) -> Future:
+        """ページの解析をワーカープロセスに渡す（空きがなければ待つ）
+
+        Futureの結果は scraper.measure_parse と同じ (イベント, 解析秒数, 要素の解析エラー数)。
+        """
+        self._slots.acquire()
+        try:
+            future = self._get_executor().submit(
+                _parse_page, type(scraper), scraper.parse_settings(), parser, args, content
+            )
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def close(self):
+        """ワーカープロセスを終了する（次にsubmitしたときに作り直す）"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor:
+            executor.shutdown()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.processes)
+            return self._executor
@@ -0,0 +1,145 @@
+"""
+ホストごとのトークンバケット方式レートリミッター
+"""
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional
+
+
+# 待ってから再試行するステータスコード
+RETRY_STATUSES = (429, 503)
+
+
+class TokenBucket:
+    """1ホスト分のトークンバケット"""
+
+    def __init__(self, rate: float, burst: int):
+        # 1秒あたりに補充されるトークン数と、バケットの容量
+        self.rate = rate
+        self.base_rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        # 429/503を受けてリクエストを止めておく時刻
+        self.blocked_until = 0.0
+        # 連続で429/503を受けた回数
+        self.failures = 0
+        # 統計
+        self.requests = 0
+        self.throttled = 0.0
+        self.backoffs = 0
+
+    def reserve(self, now: float) -> float:
+        """トークンを1つ予約し、使えるようになるまでの待ち秒数を返す"""
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # 足りない分はマイナスとして予約し、後続のリクエストはさらに後ろに並ぶ
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        wait = max(wait, self.blocked_until - now)
+        self.requests += 1
+        self.throttled += wait
+        return wait
+
+
+class HostRateLimiter:
+    """ホストごとにトークンバケットを持ち、予算を使い切ったときだけ待たせるリミッター"""
+
+    def __init__(self, rate: float = 0.5, burst: int = 2, max_backoff: float = 300.0):
+        self.default_rate = rate
+        self.default_burst = burst
+        self.max_backoff = max_backoff
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, host: str, rate: float, burst: int):
+        """ホストのレートと容量を設定"""
+        with self._lock:
+            bucket = self._bucket(host, rate, burst)
+            bucket.rate = bucket.base_rate = rate
+            bucket.burst = burst
+
+    def reserve(self, host: str, rate: Optional[float] = None, burst: Optional[int] = None) -> float:
+        """リクエスト枠を予約して待ち秒数を返す（rate/burstは未設定のホストの初期値）"""
+        with self._lock:
+            return self._bucket(host, rate, burst).reserve(time.monotonic())
+
+    def acquire(self, host: str, rate: Optional[float] = None, burst: Optional[int] = None):
+        """リクエストできるまでスレッドを待たせる"""
+        wait = self.reserve(host, rate, burst)
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, host: str, rate: Optional[float] = None, burst: Optional[int] = None):
+        """リクエストできるまでイベントループを止めずに待つ"""
+        # asyncioの読み込みは重いため、asyncバックエンドを使うときだけimportする
+        import asyncio
+        wait = self.reserve(host, rate, burst)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def backoff(self, host: str, retry_after: Optional[float] = None) -> float:
+        """429/503を受けたホストを一時停止し、レートを下げる。停止秒数を返す"""
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.failures += 1
+            bucket.backoffs += 1
+            if retry_after is None:
+                # Retry-Afterがなければ連続失敗回数に応じて指数的に延ばす
+                retry_after = (1.0 / bucket.base_rate) * (2 ** bucket.failures)
+            delay = min(self.max_backoff, max(0.0, retry_after))
+            bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+            bucket.rate = max(bucket.base_rate / 16, bucket.rate / 2)
+            # 停止が明けた時点で1リクエスト分だけ使えるようにする
+            bucket.tokens = 1.0
+            bucket.updated = bucket.blocked_until
+            return delay
+
+    def success(self, host: str):
+        """成功したリクエストを記録し、下げたレートを少しずつ戻す"""
+        with self._lock:
+            bucket = self._bucket(host)
+            bucket.failures = 0
+            if bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate / 4)
+
+    def report(self) -> Dict[str, Dict[str, Any]]:
+        """ホストごとのリクエスト数・待ち時間・バックオフ回数を返す"""
+        with self._lock:
+            return {
+                host: {
+                    'requests': bucket.requests,
+                    'throttled_seconds': round(bucket.throttled, 3),
+                    'backoffs': bucket.backoffs,
+                }
+                for host, bucket in self._buckets.items()
+            }
+
+    def _bucket(self, host: str, rate: Optional[float] = None, burst: Optional[int] = None) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = TokenBucket(rate or self.default_rate, burst or self.default_burst)
+            self._buckets[host] = bucket
+        return bucket
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Retry-Afterヘッダー（秒数またはHTTP日付）を秒数に変換"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+# 全スクレイパーで共有し、別スレッドからの同一ホストへのリクエストもまとめて制限する
+shared_rate_limiter = HostRateLimiter()
@@ -0,0 +1,82 @@
+"""
+スクレイパーの登録と遅延読み込み
+"""
+import importlib
+from typing import Dict, List, Type, Union
+
+
+# 地域名 → "モジュール:クラス"（モジュールは使うときに初めてimportする）
+BUILTIN_SCRAPERS: Dict[str, str] = {
+    'sapporo': '.sapporo_scraper:SapporoKyobunScraper',
+    'tokyo': '.tokyo_scraper:TokyoMusicScraper',
+    'osaka': '.osaka_scraper:OsakaMusicScraper',
+}
+
+# 別パッケージのスクレイパーを登録するエントリポイントのグループ
+# 例（pyproject.toml）: [project.entry-points."music_events.scrapers"] fukuoka = "fukuoka_scraper:FukuokaScraper"
+ENTRY_POINT_GROUP = 'music_events.scrapers'
+
+
+class ScraperRegistry:
+    """地域名からスクレイパーのクラスを引く登録簿
+
+    クラスは最初に使われたときにimportするため、1地域だけを実行する場合は
+    他の地域のモジュールを読み込まない。
+    """
+
+    def __init__(self):
+        self._targets: Dict[str, Union[str, type]] = dict(BUILTIN_SCRAPERS)
+        self._classes: Dict[str, type] = {}
+        self._plugins_loaded = False
+
+    def register(self, region: str, target: Union[str, type]):
+        """スクレイパーを登録（targetはクラスか "モジュール:クラス"）"""
+        self._targets[region] = target
+        self._classes.pop(region, None)
+
+    def regions(self) -> List[str]:
+        """登録されている地域名（エントリポイントのプラグインを含む）"""
+        self._load_plugins()
+        return list(self._targets)
+
+    def __contains__(self, region: str) -> bool:
+        if region not in self._targets:
+            self._load_plugins()
+        return region in self._targets
+
+    def load(self, region: str) -> Type:
+        """地域のスクレイパークラスを返す（必要ならここでimportする）"""
+        scraper_class = self._classes.get(region)
+        if scraper_class is not None:
+            return scraper_class
+        if region not in self:
+            raise ValueError(f"Unknown region: {region} (available: {', '.join(self.regions())})")
+        target = self._targets[region]
+        if isinstance(target, str):
+            module_name, _, class_name = target.partition(':')
+            module = importlib.import_module(module_name, package=__package__)
+            target = getattr(module, class_name)
+        self._classes[region] = target
+        return target
+
+    def create(self, region: str):
+        """地域のスクレイパーを作成"""
+        return self.load(region)()
+
+    def _load_plugins(self):
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+        # importlib.metadataの読み込みにも時間がかかるため、組み込み以外の地域が必要になるまで遅らせる
+        from importlib.metadata import entry_points
+        try:
+            plugins = entry_points(group=ENTRY_POINT_GROUP)
+        except TypeError:
+            # Python 3.9以前
+            plugins = entry_points().get(ENTRY_POINT_GROUP, [])
+        for plugin in plugins:
+            self._targets.setdefault(plugin.name, plugin.value)
+
+
+# 全体で共有する登録簿
+scraper_registry = ScraperRegistry()
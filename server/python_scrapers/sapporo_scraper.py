@@ -1,7 +1,8 @@
 """
 札幌教育文化会館のイベント情報スクレイパー
 """
-from .base_scraper import BaseScraper
+from .base_scraper import BaseScraper, PageJob
+from .genre import normalize_category
 from bs4 import BeautifulSoup
 from typing import List, Dict, Any
 import re
@@ -9,157 +10,167 @@ from datetime import datetime, timedelta
 from urllib.parse import urljoin
 
 
+# 日付・開場/開演時間・会場・ジャンルを1回の走査で見つけるためのパターン
+# （時間は【開場】単独より先に試す）
+EVENT_TOKEN_PATTERN = re.compile(
+    r'(?P<date>\d{4}年\d{1,2}月\d{1,2}日（[月火水木金土日]）)'
+    r'|(?P<time>【開場】(?P<open>\d{1,2}:\d{2})\s*【開演】(?P<start>\d{1,2}:\d{2}))'
+    r'|(?P<venue>大ホール|小ホール|ギャラリー)'
+    r'|(?P<genre>音楽|洋舞・邦舞|展示|オペラ|演劇)'
+    r'|(?P<other>その他)'
+    r'|(?P<mark>【開場】|【開演】)'
+)
+
+# タイトルの終わりとみなすトークン（「その他」はタイトルに含まれうるので区切りにしない）
+TITLE_BOUNDARIES = frozenset(['time', 'venue', 'genre', 'mark'])
+
+# (含まれていなければ一致しえない文字, パターン)
+ARTIST_PATTERNS = [
+    ('「', re.compile(r'「([^」]+)」')),
+    ('『', re.compile(r'『([^』]+)』')),
+    ('＆&', re.compile(r'([^、。\n]+?)(?:＆|&)([^、。\n]+)')),
+]
+
+
+class _EventSpan:
+    """1イベント分のテキスト範囲と、その中で最初に見つかったトークン"""
+    
+    __slots__ = ('start', 'date', 'title_start', 'title_end', 'venue', 'genre', 'time')
+    
+    def __init__(self, start: int, date: str, title_start: int):
+        self.start = start
+        self.date = date
+        self.title_start = title_start
+        self.title_end = None
+        self.venue = None
+        self.genre = None
+        self.time = ""
+    
+    def add(self, match: 're.Match'):
+        kind = match.lastgroup
+        if kind == 'venue':
+            if self.venue is None:
+                self.venue = match.group()
+        elif kind == 'genre' or kind == 'other':
+            if self.genre is None:
+                self.genre = match.group()
+        elif kind == 'time':
+            if not self.time:
+                self.time = f"{match.group('open')}開場・{match.group('start')}開演"
+        if self.title_end is None and kind in TITLE_BOUNDARIES and match.start() >= self.title_start:
+            self.title_end = match.start()
+
+
 class SapporoKyobunScraper(BaseScraper):
     """札幌教育文化会館のイベント情報をスクレイピング"""
     
+    # 月別のスケジュールページを月数で指定する
+    horizon_in_months = True
+    
     def __init__(self):
         super().__init__("https://www.kyobun.org")
     
     def scrape_events(self, months: int = 3) -> List[Dict[str, Any]]:
         """札幌教育文化会館のイベントをスクレイピング"""
-        events = []
+        jobs = []
         
-        # 指定された月数分スクレイピング
+        # 指定された月数分スクレイピング（月ごとのページは独立して取得できる）
         for i in range(months):
             target_date = datetime.now() + timedelta(days=30 * i)
             year_month = target_date.strftime("%Y%m")
-            
-            try:
-                month_events = self._scrape_month(year_month)
-                events.extend(month_events)
-                print(f"Scraped {len(month_events)} events for {year_month}")
-            except Exception as e:
-                print(f"Error scraping {year_month}: {e}")
-                continue
+            jobs.append(self._month_job(year_month, i))
         
-        return events
+        return self.scrape_pages(jobs)
     
     def _scrape_month(self, year_month: str) -> List[Dict[str, Any]]:
         """指定された年月のイベントをスクレイピング"""
-        events = []
-        
+        return self.scrape_pages([self._month_job(year_month)])
+    
+    def _month_job(self, year_month: str, months_ahead: int = 0) -> PageJob:
+        """指定された年月のスケジュールページのジョブを作成"""
         # URL構築
         url = f"{self.base_url}/event_schedule.html?k=lst&ym={year_month}"
-        
-        try:
-            soup = self.get_page(url)
-            if not soup:
-                return events
-            
-            # イベント要素を直接抽出
-            event_elements = self._extract_event_elements(soup)
-            
-            for element in event_elements:
-                try:
-                    event_data = self._parse_event_element(element, year_month)
-                    if event_data:
-                        events.append(event_data)
-                except Exception as e:
-                    print(f"Error parsing event element: {e}")
-                    continue
-            
-        except Exception as e:
-            print(f"Error scraping month {year_month}: {e}")
-        
+        return PageJob(url, '_parse_month', (year_month,), months_ahead)
+    
+    def _parse_month(self, soup: BeautifulSoup, year_month: str) -> List[Dict[str, Any]]:
+        """月別スケジュールページをパース"""
+        # _extract_event_elementsは解析済みのイベントデータを返す
+        events = self._extract_event_elements(soup)
+        print(f"Scraped {len(events)} events for {year_month}")
         return events
     
     def _extract_event_elements(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
         """イベント要素を抽出"""
         events = []
         
-        # 日付のパターン: YYYY年M月D日（曜日）
-        date_pattern = r'(\d{4}年\d{1,2}月\d{1,2}日（[月火水木金土日]）)'
-        
         # ページ全体のテキストを取得
         page_text = soup.get_text()
         
-        # 日付で分割して各イベントを抽出
-        date_matches = list(re.finditer(date_pattern, page_text))
+        # 1回の走査で日付ごとにイベントを区切り、その間のトークンから会場・ジャンル・時間を決める
+        span = None
+        for match in EVENT_TOKEN_PATTERN.finditer(page_text):
+            if match.lastgroup == 'date':
+                if span is not None:
+                    self._append_event(events, page_text, span, match.start())
+                span = _EventSpan(match.start(), match.group(), match.end())
+            elif span is not None:
+                span.add(match)
         
-        for i, date_match in enumerate(date_matches):
-            try:
-                # 現在の日付の位置
-                current_pos = date_match.start()
-                
-                # 次の日付の位置（最後の場合はページの終わり）
-                if i + 1 < len(date_matches):
-                    next_pos = date_matches[i + 1].start()
-                else:
-                    next_pos = len(page_text)
-                
-                # この日付のイベント情報を抽出
-                event_text = page_text[current_pos:next_pos]
-                
-                # イベントデータを解析
-                event_data = self._parse_event_text(event_text, date_match.group(1))
-                if event_data:
-                    events.append(event_data)
-                    
-            except Exception as e:
-                print(f"Error extracting event {i}: {e}")
-                continue
+        if span is not None:
+            self._append_event(events, page_text, span, len(page_text))
         
         return events
     
+    def _append_event(self, events: List[Dict[str, Any]], text: str, span: '_EventSpan', end: int):
+        """区切ったイベントのデータを構築して追加"""
+        try:
+            event_data = self._build_event(text, span, end)
+            if event_data:
+                events.append(event_data)
+        except Exception as e:
+            self.element_error(f"Error extracting event at {span.start}: {e}")
+    
     def _parse_event_text(self, event_text: str, date_str: str) -> Dict[str, Any]:
         """イベントテキストを解析"""
         try:
-            # 会場を抽出
-            venue_match = re.search(r'(大ホール|小ホール|ギャラリー)', event_text)
-            venue = venue_match.group(1) if venue_match else "不明"
-            
-            # ジャンルを抽出
-            genre_match = re.search(r'(音楽|洋舞・邦舞|展示|オペラ|演劇|その他)', event_text)
-            genre = genre_match.group(1) if genre_match else "その他"
-            
-            # タイトルを抽出
             # 日付の後のテキストから、会場やジャンル、時間情報の前までをタイトルとする
-            title_start = event_text.find(date_str) + len(date_str)
-            title_end = len(event_text)
-            
-            # 会場、ジャンル、時間情報の位置をチェック
-            for pattern in [r'大ホール', r'小ホール', r'ギャラリー', r'音楽', r'洋舞・邦舞', r'展示', r'オペラ', r'演劇', r'【開場】', r'【開演】']:
-                match = re.search(pattern, event_text[title_start:])
-                if match and match.start() < title_end - title_start:
-                    title_end = title_start + match.start()
-            
-            title = event_text[title_start:title_end].strip()
-            if not title:
-                title = "不明なイベント"
-            
-            # 時間を抽出
-            time_pattern = r'【開場】(\d{1,2}:\d{2})\s*【開演】(\d{1,2}:\d{2})'
-            time_match = re.search(time_pattern, event_text)
-            time_str = ""
-            if time_match:
-                open_time = time_match.group(1)
-                start_time = time_match.group(2)
-                time_str = f"{open_time}開場・{start_time}開演"
-            
-            # アーティスト情報を抽出
-            artists = self._extract_artists(event_text)
-            
-            # イベントデータを構築
-            event_data = {
-                'name': title,
-                'date': date_str,
-                'time': time_str,
-                'location': f"札幌教育文化会館 {venue}",
-                'artists': artists,
-                'price': '要確認',
-                'scale': self._estimate_scale(venue, genre),
-                'links': [],  # 詳細ページへのリンクは別途取得が必要
-                'genre': self._normalize_genre(genre),
-                'region': '札幌',
-                'source': '札幌教育文化会館'
-            }
-            
-            return event_data
-            
+            span = _EventSpan(0, date_str, event_text.find(date_str) + len(date_str))
+            for match in EVENT_TOKEN_PATTERN.finditer(event_text):
+                if match.lastgroup != 'date':
+                    span.add(match)
+            return self._build_event(event_text, span, len(event_text))
         except Exception as e:
-            print(f"Error parsing event text: {e}")
+            self.element_error(f"Error parsing event text: {e}")
             return {}
     
+    def _build_event(self, text: str, span: '_EventSpan', end: int) -> Dict[str, Any]:
+        """走査で見つけたトークンからイベントデータを構築"""
+        venue = span.venue or "不明"
+        genre = span.genre or "その他"
+        
+        title_end = span.title_end if span.title_end is not None else end
+        title = text[span.title_start:title_end].strip()
+        if not title:
+            title = "不明なイベント"
+        
+        # アーティスト情報を抽出
+        artists = self._extract_artists(text[span.start:end])
+        
+        # イベントデータを構築
+        return {
+            'name': title,
+            'date': span.date,
+            'time': span.time,
+            'location': f"札幌教育文化会館 {venue}",
+            'artists': artists,
+            'price': '要確認',
+            'scale': self._estimate_scale(venue, genre),
+            'links': [],  # 詳細ページへのリンクは別途取得が必要
+            'genre': self._normalize_genre(genre),
+            'region': '札幌',
+            'source': '札幌教育文化会館'
+        }
+    
     def _parse_event_element(self, element: BeautifulSoup, year_month: str) -> Dict[str, Any]:
         """イベント要素をパース（後方互換性のため残す）"""
         return self._parse_event_text(element.get_text(), "")
@@ -177,15 +188,7 @@ class SapporoKyobunScraper(BaseScraper):
     
     def _normalize_genre(self, genre: str) -> str:
         """ジャンルを正規化"""
-        genre_mapping = {
-            '音楽': 'クラシック',
-            '洋舞・邦舞': 'ダンス',
-            '展示': '展示',
-            'オペラ': 'クラシック',
-            '演劇': '演劇',
-            'その他': 'その他'
-        }
-        return genre_mapping.get(genre, 'その他')
+        return normalize_category(genre)
     
     def _extract_artists(self, text: str) -> List[str]:
         """アーティスト情報を抽出"""
@@ -193,18 +196,15 @@ class SapporoKyobunScraper(BaseScraper):
         
         # アーティスト名のパターンを検索
         # 例: "○○○"、"○○○＆○○○" などのパターン
-        artist_patterns = [
-            r'「([^」]+)」',
-            r'『([^』]+)』',
-            r'([^、。\n]+?)(?:＆|&)([^、。\n]+)',
-        ]
-        
-        for pattern in artist_patterns:
-            matches = re.findall(pattern, text)
-            for match in matches:
+        for marker, pattern in ARTIST_PATTERNS:
+            # 目印の文字がなければ正規表現を走らせない（「＆」のパターンは全位置から探索するため重い）
+            if not any(char in text for char in marker):
+                continue
+            for match in pattern.findall(text):
                 if isinstance(match, tuple):
                     artists.extend([m.strip() for m in match if m.strip()])
                 else:
                     artists.append(match.strip())
         
-        return list(set(artists))  # 重複を除去 
\ No newline at end of file
+        # 重複を除去（出現順を保つ）
+        return list(dict.fromkeys(artists))
\ No newline at end of file
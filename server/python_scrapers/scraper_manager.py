@@ -4,26 +4,109 @@
 """
 import json
 import os
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional
 from datetime import datetime
-from .tokyo_scraper import TokyoMusicScraper
-from .osaka_scraper import OsakaMusicScraper
-from .sapporo_scraper import SapporoKyobunScraper
+from concurrent.futures import ThreadPoolExecutor
+from .registry import scraper_registry
+from .rate_limiter import HostRateLimiter
+from .connection_limiter import ConnectionLimiter
+from .http_cache import HttpCache
+from .dedup import (MergeResult, FuzzyDeduplicator, dedup_key, event_id, content_changed, apply_update,
+                    rekey_legacy_events)
+from .parse_cache import ParseCache
+from .parse_pool import ParsePool
+from .metrics import RunMetrics, timed
+from .event_store import JsonLinesEventStore
+from .sqlite_store import SqliteEventStore
+from .crawl_state import CrawlState
+from .search_index import SearchIndex
+from .views import MaterializedViews
+from .change_feed import ChangeFeed, ChangeSet
+from .event import normalize_events, intern_fields
+from .dates import DateTimeNormalizer
 
 
 class ScraperManager:
     """複数のスクレイパーを管理するクラス"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", workers: int = 1, fetch_backend: str = "sync",
+                 use_cache: bool = True, parser_backend: str = "lxml", storage: str = "json",
+                 incremental: bool = False, regions: Optional[List[str]] = None, parse_workers: int = 0):
         self.data_dir = data_dir
-        self.scrapers = {
-            'sapporo': SapporoKyobunScraper(),
-            'tokyo': TokyoMusicScraper(),
-            'osaka': OsakaMusicScraper(),
-        }
         
         # データディレクトリを作成
         os.makedirs(data_dir, exist_ok=True)
+        
+        # 1より大きい場合は地域・ページを並列にスクレイピングする
+        self.workers = max(1, workers)
+        # 実行する地域（省略時は登録されている全地域）
+        self.regions = list(regions) if regions else scraper_registry.regions()
+        for region in self.regions:
+            if region not in scraper_registry:
+                raise ValueError(f"Unknown region: {region} (available: {', '.join(scraper_registry.regions())})")
+        # スクレイパーはget_scraperで最初に使うときに作成する
+        self.scrapers = {}
+        self.fetch_backend = fetch_backend
+        self.parser_backend = parser_backend
+        # 全スクレイパーで1つのリミッターを共有し、同じホストへの予算をまとめて管理する
+        self.rate_limiter = HostRateLimiter()
+        # asyncバックエンドの同時接続数も全スクレイパー（地域ごとのイベントループ）で共有する
+        self.connection_limiter = ConnectionLimiter()
+        # 前回取得したページは条件付きGETで変更の有無だけを確認する
+        self.http_cache = HttpCache(os.path.join(data_dir, 'http_cache')) if use_cache else None
+        # 本文が前回と同じページは解析せずに前回抽出したイベントを使う
+        self.parse_cache = ParseCache(os.path.join(data_dir, 'parse_cache')) if use_cache else None
+        # 差分モードでは再取得の間隔を過ぎたページだけを取得する
+        self.crawl_state = CrawlState(os.path.join(data_dir, 'crawl_state.json')) if incremental else None
+        # 1以上の場合はページの解析を別プロセスで行い、取得と解析を並行に進める（全地域で共有）
+        self.parse_pool = ParsePool(parse_workers) if parse_workers > 0 else None
+        # 取得・解析・マージ・保存の時間と件数（実行ごとにrun_report.jsonに書き出す）
+        self.metrics = RunMetrics()
+        self.report_path = os.path.join(data_dir, 'run_report.json')
+        # 地域ごとのイベント数と所要時間
+        self.region_stats: Dict[str, Dict[str, Any]] = {}
+        # イベント名・出演者の検索索引（ストアと同じデータディレクトリに保存する）
+        self.search_index_dir = os.path.join(data_dir, 'search_index')
+        # 地域・月・ジャンル別などの一覧表示用のビュー
+        self.views_dir = os.path.join(data_dir, 'views')
+        # ストアから最後にevents.jsonを書き出したときのストアの版
+        self.export_state_path = os.path.join(data_dir, 'export_state.json')
+        # 実行ごとの変更履歴
+        self.change_feed = ChangeFeed(os.path.join(data_dir, 'changes'))
+        # サイトをまたいだ表記ゆれの重複を検出する
+        self.deduplicator = FuzzyDeduplicator()
+        # 直近のmerge_eventsで追加・更新されたイベント
+        self.last_merge = MergeResult([], [], 0)
+        # 直近のrecord_changesで記録した変更の件数
+        self.last_changes: Dict[str, int] = {}
+        # "jsonl"/"sqlite"の場合はストアに差分だけを書き込み、events.jsonは書き出しにだけ使う
+        if storage == "jsonl":
+            self.store = JsonLinesEventStore(os.path.join(data_dir, 'events.d'))
+        elif storage == "sqlite":
+            self.store = SqliteEventStore(os.path.join(data_dir, 'events.db'))
+        elif storage == "json":
+            self.store = None
+        else:
+            raise ValueError(f"Unknown storage: {storage}")
+    
+    def get_scraper(self, region: str):
+        """地域のスクレイパーを返す（初回はモジュールを読み込んで作成し、共有の設定を渡す）"""
+        scraper = self.scrapers.get(region)
+        if scraper is None:
+            scraper = scraper_registry.create(region)
+            scraper.crawl_state = self.crawl_state
+            scraper.rate_limiter = self.rate_limiter
+            scraper.connection_limiter = self.connection_limiter
+            scraper.http_cache = self.http_cache
+            scraper.parse_cache = self.parse_cache
+            scraper.parse_pool = self.parse_pool
+            scraper.metrics = self.metrics
+            scraper.workers = self.workers
+            scraper.fetch_backend = self.fetch_backend
+            scraper.parser_backend = self.parser_backend
+            self.scrapers[region] = scraper
+        return scraper
     
     def run_all_scrapers(self, days: int = 30) -> List[Dict[str, Any]]:
         """全てのスクレイパーを実行"""
@@ -31,28 +114,66 @@ class ScraperManager:
         
         print(f"Starting scraping for the next {days} days...")
         
-        for region, scraper in self.scrapers.items():
-            try:
-                print(f"Scraping {region} events...")
-                if region == 'sapporo':
-                    # 札幌は月単位でスクレイピング
-                    months = max(1, days // 30)
-                    events = scraper.scrape_events(months)
-                else:
-                    events = scraper.scrape_events(days)
-                print(f"Found {len(events)} events in {region}")
-                all_events.extend(events)
-            except Exception as e:
-                print(f"Error scraping {region}: {e}")
-                continue
-        
-        # イベントにIDを付与
-        for i, event in enumerate(all_events):
-            event['id'] = i + 1
-            event['createdAt'] = datetime.now().isoformat()
-        
-        return all_events
+        regions = self.regions
+        for region in regions:
+            self.get_scraper(region)
+        try:
+            if self.workers > 1:
+                # 地域ごとにホストが異なるため並列に実行しても各サイトへの負荷は変わらない
+                with ThreadPoolExecutor(max_workers=len(regions)) as executor:
+                    results = list(executor.map(lambda region: self._run_scraper(region, days), regions))
+            else:
+                results = [self._run_scraper(region, days) for region in regions]
+        finally:
+            if self.parse_pool:
+                self.parse_pool.close()
+        
+        for events in results:
+            all_events.extend(events)
+        
+        for host, stats in self.rate_limiter.report().items():
+            print(f"Throttled {stats['throttled_seconds']:.1f}s over {stats['requests']} requests to {host}")
+        
+        if self.crawl_state:
+            state = self.crawl_state
+            print(f"Incremental crawl: {state.fetched} pages fetched ({state.changed} changed), {state.skipped} fresh pages skipped")
+            state.save()
+        
+        with self.metrics.timer('normalize'):
+            # 全スクレイパーの出力をまとめて正規化し、内容から決まるIDを付与（実行ごとに変わらない）
+            records = normalize_events(all_events)
+            # 日付・時刻をISO形式・HH:MMに揃え、読み取れなかった表記を表示する
+            date_normalizer = DateTimeNormalizer()
+            date_normalizer.normalize(records)
+            date_normalizer.report()
+            created_at = datetime.now().isoformat()
+            for record in records:
+                record.id = event_id(record)
+                record.createdAt = created_at
+            
+            return [record.to_dict() for record in records]
     
+    def _run_scraper(self, region: str, days: int) -> List[Dict[str, Any]]:
+        """1地域のスクレイパーを実行"""
+        scraper = self.get_scraper(region)
+        started = time.perf_counter()
+        try:
+            print(f"Scraping {region} events...")
+            if scraper.horizon_in_months:
+                # 月別ページのサイト（札幌など）は月単位でスクレイピング
+                months = max(1, days // 30)
+                events = scraper.scrape_events(months)
+            else:
+                events = scraper.scrape_events(days)
+            print(f"Found {len(events)} events in {region}")
+            self.region_stats[region] = {'events': len(events), 'seconds': round(time.perf_counter() - started, 3)}
+            return events
+        except Exception as e:
+            print(f"Error scraping {region}: {e}")
+            self.region_stats[region] = {'events': 0, 'seconds': round(time.perf_counter() - started, 3), 'error': str(e)}
+            return []
+    
+    @timed('save')
     def save_events(self, events: List[Dict[str, Any]], filename: str = "events.json") -> str:
         """イベントデータをJSONファイルに保存"""
         filepath = os.path.join(self.data_dir, filename)
@@ -67,6 +188,7 @@ class ScraperManager:
             print(f"Error saving events: {e}")
             raise
     
+    @timed('load')
     def load_events(self, filename: str = "events.json") -> List[Dict[str, Any]]:
         """既存のイベントデータを読み込み"""
         filepath = os.path.join(self.data_dir, filename)
@@ -74,7 +196,8 @@ class ScraperManager:
         try:
             if os.path.exists(filepath):
                 with open(filepath, 'r', encoding='utf-8') as f:
-                    events = json.load(f)
+                    # 地域・ジャンルなどの文字列は全イベントで共有させる
+                    events = [intern_fields(event) for event in json.load(f)]
                 print(f"Loaded {len(events)} events from {filepath}")
                 return events
             else:
@@ -84,52 +207,211 @@ class ScraperManager:
             print(f"Error loading events: {e}")
             return []
     
+    def iter_events(self, filename: str = "events.json") -> Iterator[Dict[str, Any]]:
+        """既存のイベントを1件ずつ返す"""
+        if self.store is not None:
+            return self.store.iter_events()
+        return iter(self.load_events(filename))
+    
+    def data_version(self, filename: str = "events.json") -> Any:
+        """保存済みデータの版（ストアまたはevents.jsonが書き換わると変わる）"""
+        if self.store is not None:
+            return self.store.version()
+        try:
+            stat = os.stat(os.path.join(self.data_dir, filename))
+        except OSError:
+            return None
+        return (stat.st_size, stat.st_mtime_ns)
+    
+    @timed('dedupe')
+    def dedupe_events(self, events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """地域・日付が同じでタイトルが似ているイベントをまとめる"""
+        deduped = self.deduplicator.dedupe(events)
+        if len(deduped) < len(events):
+            print(f"Merged {len(events) - len(deduped)} near-duplicate events across sources")
+        return deduped
+    
+    @timed('merge')
     def merge_events(self, new_events: List[Dict[str, Any]], existing_events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """新しいイベントと既存イベントをマージ"""
-        # 既存イベントのIDを保持
-        existing_ids = {event.get('id', 0) for event in existing_events}
-        
-        # 新しいイベントにIDを付与
-        next_id = max(existing_ids) + 1 if existing_ids else 1
-        for event in new_events:
-            if 'id' not in event:
-                event['id'] = next_id
-                next_id += 1
-        
-        # 重複を避けてマージ
+        # IDと正規化した(名前, 日付, 会場)から既存イベントの位置を引けるようにする
+        # （IDが内容から決まる前に保存されたイベントは(名前, 日付, 会場)で見つける）
         merged = existing_events.copy()
+        by_id, by_key = {}, {}
+        for position, event in enumerate(merged):
+            by_id.setdefault(event.get('id'), position)
+            by_key.setdefault(dedup_key(event), position)
+        
+        inserted, updated, unchanged = [], [], 0
         for new_event in new_events:
-            # 同じ名前と日付のイベントが既に存在するかチェック
-            is_duplicate = any(
-                existing.get('name') == new_event.get('name') and 
-                existing.get('date') == new_event.get('date')
-                for existing in existing_events
-            )
-            
-            if not is_duplicate:
+            if 'id' not in new_event:
+                new_event['id'] = event_id(new_event)
+            key = dedup_key(new_event)
+            position = by_id.get(new_event['id'])
+            if position is None:
+                position = by_key.get(key)
+            if position is None:
+                by_id[new_event['id']] = by_key[key] = len(merged)
                 merged.append(new_event)
+                inserted.append(new_event)
+            elif content_changed(merged[position], new_event):
+                # 再スクレイピングで内容が変わったイベントは置き換える
+                previous = merged[position]
+                merged[position] = apply_update(previous, new_event)
+                updated.append((previous, merged[position]))
+            else:
+                unchanged += 1
         
+        self.last_merge = MergeResult(inserted, updated, unchanged)
+        stats = self.last_merge.stats()
+        print(f"Merged events: {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged")
         return merged
     
     def run_scraping_pipeline(self, days: int = 30, filename: str = "events.json") -> str:
         """完全なスクレイピングパイプラインを実行"""
         print("Starting scraping pipeline...")
+        self.metrics.reset()
+        self.region_stats = {}
+        
+        if self.store is not None:
+            filepath = self._run_store_pipeline(days, filename)
+            self.write_report()
+            return filepath
         
-        # 既存データを読み込み
-        existing_events = self.load_events(filename)
+        # 既存データを読み込み（連番のIDはストアに取り込むときと同じく内容から決まるIDに振り直す）
+        existing_events = rekey_legacy_events(self.load_events(filename))
         
         # 新しいデータをスクレイピング
         new_events = self.run_all_scrapers(days)
         
+        # 複数のサイトに掲載された同じイベントを1件にまとめる
+        new_events = self.dedupe_events(new_events)
+        
         # データをマージ
         merged_events = self.merge_events(new_events, existing_events)
         
         # 保存
         filepath = self.save_events(merged_events, filename)
+        changes = self.record_changes(merged_events)
+        self.update_search_index(filename, changes)
+        self.update_views(filename, changes)
         
         print(f"Scraping pipeline completed. Total events: {len(merged_events)}")
+        self.write_report()
+        return filepath
+    
+    def _run_store_pipeline(self, days: int, filename: str) -> str:
+        """ストアを使うパイプライン（既存イベントを全件メモリに読み込まない）"""
+        filepath = os.path.join(self.data_dir, filename)
+        
+        # 初回は既存のevents.jsonをストアに取り込む
+        if self.store.is_empty() and os.path.exists(filepath):
+            # 以前の連番のIDは重複している場合もあるため、内容から決まるIDに振り直して取り込む
+            legacy_events = rekey_legacy_events(self.load_events(filename))
+            with self.metrics.timer('merge'):
+                imported = self.store.upsert(legacy_events)
+            print(f"Imported {len(imported.inserted)} events from {filepath}")
+        
+        new_events = self.run_all_scrapers(days)
+        new_events = self.dedupe_events(new_events)
+        
+        # 追加・更新されたイベントだけをストアに追記する
+        with self.metrics.timer('merge'):
+            self.last_merge = self.store.upsert(new_events)
+        stats = self.last_merge.stats()
+        print(f"Merged events: {stats['inserted']} inserted, {stats['updated']} updated, {stats['unchanged']} unchanged")
+        
+        if self._export_is_current(filepath) and self.change_feed.exists():
+            # ストアが前回の書き出しから変わっていなければ、全件の書き出しと変更履歴の比較を省く
+            print(f"No changes since the last export to {filepath}")
+            changes = self.record_no_changes()
+        else:
+            # Express APIが読むevents.jsonはストアから1件ずつ書き出す
+            with self.metrics.timer('save'):
+                total = self.store.export_json(filepath)
+            print(f"Exported {total} events to {filepath}")
+            changes = self.record_changes(self.store.iter_events())
+            # 書き出したときのストアの版を記録し、次の実行で変わっていなければ書き出しを省く
+            with open(self.export_state_path, 'w', encoding='utf-8') as f:
+                json.dump({'filepath': filepath, 'version': self.store.version()}, f)
+        self.update_search_index(filename, changes)
+        self.update_views(filename, changes)
+        
+        print("Scraping pipeline completed.")
         return filepath
+    
+    def _export_is_current(self, filepath: str) -> bool:
+        """events.jsonを書き出してからストアが書き換わっていないか"""
+        try:
+            with open(self.export_state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return False
+        # 版はJSONに保存するとタプルがリストになるため、同じ形にして比べる
+        version = json.loads(json.dumps(self.store.version()))
+        return state.get('filepath') == filepath and state.get('version') == version and os.path.exists(filepath)
+    
+    @timed('search_index')
+    def update_search_index(self, filename: str, changes: ChangeSet) -> SearchIndex:
+        """前回の実行から追加・更新・削除されたイベントを検索索引に反映する
 
+        索引がない場合や、変更履歴の起点を記録しただけで差分がわからない場合は全件から作る。
+        """
+        index = SearchIndex.open(self.search_index_dir)
+        if changes.baseline or index.is_empty():
+            index.rebuild(self.iter_events(filename))
+            print(f"Built search index for {len(index)} events")
+        else:
+            # 更新されたイベントはIDが変わらないため、同じIDの文書が置き換わる
+            index.update(changes.upserted, changes.deleted)
+            print(f"Updated search index with {len(changes.upserted)} events, removed {len(changes.deleted)}")
+        return index
+    
+    @timed('views')
+    def update_views(self, filename: str, changes: ChangeSet) -> MaterializedViews:
+        """前回の実行から追加・更新・削除されたイベントが入るビューだけを書き直す
+
+        ビューがない場合や、変更履歴の起点を記録しただけで差分がわからない場合は全件から作る。
+        """
+        views = MaterializedViews(self.views_dir)
+        if changes.baseline or not views.exists():
+            count = views.rebuild(self.iter_events(filename))
+            print(f"Built {count} views in {self.views_dir}")
+        else:
+            count = views.update(changes.upserted, changes.deleted)
+            print(f"Updated {count} views in {self.views_dir}")
+        return views
+    
+    @timed('changes')
+    def record_changes(self, events: Iterable[Dict[str, Any]]) -> ChangeSet:
+        """前回の実行からの追加・更新・削除を変更履歴に記録する"""
+        changes = self.change_feed.record(events)
+        counts = self.last_changes = changes.counts
+        print(f"Recorded changes: {counts['insert']} inserted, {counts['update']} updated, "
+              f"{counts['delete']} deleted (head {self.change_feed.head()})")
+        return changes
+    
+    def record_no_changes(self) -> ChangeSet:
+        """ストアが変わっていない実行の変更（変更履歴は書き換えない）"""
+        changes = ChangeSet([], [], {'insert': 0, 'update': 0, 'delete': 0}, False)
+        self.last_changes = changes.counts
+        return changes
+    
+    def write_report(self) -> Dict[str, Any]:
+        """実行レポートを表示し、report_pathにJSONで保存"""
+        extra = {
+            'regions': self.region_stats,
+            'merge': self.last_merge.stats(),
+            'changes': self.last_changes,
+            'throttle': self.rate_limiter.report(),
+        }
+        if self.crawl_state:
+            state = self.crawl_state
+            extra['incremental'] = {'fetched': state.fetched, 'changed': state.changed, 'skipped': state.skipped}
+        self.metrics.print_summary()
+        report = self.metrics.save(self.report_path, **extra)
+        print(f"Run report saved to {self.report_path}")
+        return report
 
 def main():
     """メイン実行関数"""
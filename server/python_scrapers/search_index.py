@@ -0,0 +1,293 @@
+"""
+イベント名・出演者の全文検索索引（文字n-gramの転置索引）
+"""
+import json
+import os
+from array import array
+from bisect import bisect_left
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Set, Tuple
+
+from .dedup import normalize_text
+
+
+# n-gramの文字数（かな・漢字は語の区切りがないため、2文字ずつずらして切り出す）
+GRAM_SIZE = 2
+
+# 検索結果のスコア（出演者名と完全一致 > 出演者名に含まれる > イベント名に含まれる）
+SCORE_ARTIST_EXACT = 3
+SCORE_ARTIST = 2
+SCORE_NAME = 1
+
+# 保存するファイル
+DOCS_FILE = 'docs.jsonl'
+LEXICON_FILE = 'lexicon.json'
+POSTINGS_FILE = 'postings.bin'
+JOURNAL_FILE = 'journal.jsonl'
+
+
+def ngrams(text: str, n: int = GRAM_SIZE) -> Set[str]:
+    """文字n-gram（空白も1文字として扱い、語をまたぐgramも作る。n文字以下の文字列はそのまま）"""
+    if len(text) <= n:
+        return {text} if text else set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+def query_grams(text: str, n: int = GRAM_SIZE) -> Set[str]:
+    """検索語のn-gram（n文字未満の検索語は他の文字列の一部にも一致するためgramにしない）"""
+    if len(text) < n:
+        return set()
+    return {text[i:i + n] for i in range(len(text) - n + 1)}
+
+
+class SearchIndex:
+    """イベント名と出演者名の転置索引
+
+    イベントごとに文書番号を振り、n-gramごとに文書番号の昇順の配列（posting list）を持つ。
+    検索語のn-gramをすべて含む文書を最も短いposting listから順に調べ、実際に検索語を含むかを
+    確かめて上位k件に達したら打ち切る。
+    内容が変わったイベントは古い文書を削除済みにして新しい文書番号で追加し、削除されたイベントは
+    文書を削除済みにする。保存時は追加・削除をジャーナルに追記する（ジャーナルが長くなったら全体を書き直す）。
+    """
+
+    def __init__(self, directory: Optional[str] = None, journal_limit: int = 10000):
+        self.directory = directory
+        # ジャーナルの行数がこれを超えたら全体を書き直す
+        self.journal_limit = journal_limit
+        self._reset()
+
+    @classmethod
+    def open(cls, directory: str, **kwargs) -> 'SearchIndex':
+        """保存済みの索引を読み込む（なければ空の索引）"""
+        index = cls(directory, **kwargs)
+        index.load()
+        return index
+
+    @staticmethod
+    def version(directory: str) -> Tuple[Tuple[str, int, int], ...]:
+        """保存済みの索引の版（保存・追記で変わる）"""
+        version = []
+        for name in (DOCS_FILE, POSTINGS_FILE, JOURNAL_FILE):
+            try:
+                stat = os.stat(os.path.join(directory, name))
+            except OSError:
+                continue
+            version.append((name, stat.st_size, stat.st_mtime_ns))
+        return tuple(version)
+
+    def __len__(self) -> int:
+        return len(self.doc_of)
+
+    def is_empty(self) -> bool:
+        return not self.doc_of
+
+    def add(self, events: Iterable[Dict[str, Any]]) -> int:
+        """イベントを索引に加える（同じIDのイベントは置き換える）。加えた件数を返す"""
+        count = 0
+        for event in events:
+            self._add_document(event.get('id'), normalize_text(event.get('name')),
+                               tuple(normalize_text(artist) for artist in event.get('artists') or []))
+            count += 1
+        return count
+
+    def update(self, events: List[Dict[str, Any]], deleted: Iterable[Any] = ()):
+        """追加・変更されたイベントと削除されたイベントのIDを索引に反映し、ジャーナルに追記する"""
+        removed = [event_id for event_id in deleted if self.remove(event_id)]
+        if not events and not removed:
+            return
+        start = len(self.ids)
+        self.add(events)
+        if not self.directory:
+            return
+        if self._journal_lines + len(events) + len(removed) > self.journal_limit:
+            self.save()
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, JOURNAL_FILE), 'a', encoding='utf-8') as f:
+            # 削除は [ID] の1要素の行で記録する
+            for event_id in removed:
+                f.write(json.dumps([event_id]) + '\n')
+            for doc in range(start, len(self.ids)):
+                f.write(json.dumps([self.ids[doc], self.names[doc], self.artists[doc]], ensure_ascii=False) + '\n')
+        self._journal_lines += len(removed) + len(self.ids) - start
+
+    def remove(self, event_id: Any) -> bool:
+        """イベントの文書を削除済みにする。索引になかった場合はFalse"""
+        doc = self.doc_of.pop(event_id, None)
+        if doc is None:
+            return False
+        self.ids[doc] = None
+        self._deleted += 1
+        return True
+
+    def rebuild(self, events: Iterable[Dict[str, Any]]):
+        """全イベントから索引を作り直して保存する"""
+        self._reset()
+        self.add(events)
+        if self.directory:
+            self.save()
+
+    def search(self, query: str, limit: int = 20) -> List[Tuple[Any, int]]:
+        """検索語を含むイベントの(ID, スコア)をスコアの高い順に最大limit件返す
+
+        同じスコアのイベントは索引に加えた順に並ぶ。
+        """
+        text = normalize_text(query)
+        if not text or limit <= 0:
+            return []
+        results: List[Tuple[Any, int]] = []
+        seen: Set[int] = set()
+        artists, names = self.artists, self.names
+        tiers = (
+            (self.exact_artists.get(text, ()), SCORE_ARTIST_EXACT, None),
+            (self._candidates('artist', text), SCORE_ARTIST, lambda doc: any(text in artist for artist in artists[doc])),
+            (self._candidates('name', text), SCORE_NAME, lambda doc: text in names[doc]),
+        )
+        for docs, score, matches in tiers:
+            for doc in docs:
+                event_id = self.ids[doc]
+                if event_id is None or doc in seen or (matches and not matches(doc)):
+                    continue
+                seen.add(doc)
+                results.append((event_id, score))
+                if len(results) >= limit:
+                    return results
+        return results
+
+    def save(self):
+        """索引全体を書き出し、ジャーナルを空にする（削除済みの文書はここで取り除く）"""
+        if self._deleted:
+            self._compact()
+        os.makedirs(self.directory, exist_ok=True)
+        docs_path = os.path.join(self.directory, DOCS_FILE)
+        with open(f"{docs_path}.tmp", 'w', encoding='utf-8') as f:
+            for doc in range(len(self.ids)):
+                f.write(json.dumps([self.ids[doc], self.names[doc], self.artists[doc]], ensure_ascii=False) + '\n')
+
+        # posting listは1つのバイナリファイルに連結し、gramごとの位置と長さを別に持つ
+        lexicon: Dict[str, Dict[str, List[int]]] = {}
+        postings_path = os.path.join(self.directory, POSTINGS_FILE)
+        offset = 0
+        with open(f"{postings_path}.tmp", 'wb') as f:
+            for field, postings in (('name', self.postings['name']), ('artist', self.postings['artist']),
+                                    ('exact', self.exact_artists)):
+                lexicon[field] = {}
+                for gram, docs in postings.items():
+                    docs.tofile(f)
+                    lexicon[field][gram] = [offset, len(docs)]
+                    offset += len(docs)
+        lexicon_path = os.path.join(self.directory, LEXICON_FILE)
+        with open(f"{lexicon_path}.tmp", 'w', encoding='utf-8') as f:
+            json.dump({'itemsize': array('I').itemsize, 'fields': lexicon}, f, ensure_ascii=False)
+
+        for path in (docs_path, postings_path, lexicon_path):
+            os.replace(f"{path}.tmp", path)
+        journal_path = os.path.join(self.directory, JOURNAL_FILE)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        self._journal_lines = 0
+
+    def load(self):
+        """保存済みの索引とジャーナルを読み込む"""
+        self._reset()
+        docs_path = os.path.join(self.directory, DOCS_FILE)
+        if os.path.exists(docs_path):
+            with open(docs_path, 'r', encoding='utf-8') as f:
+                for doc, line in enumerate(f):
+                    event_id, name, artists = json.loads(line)
+                    self.ids.append(event_id)
+                    self.names.append(name)
+                    self.artists.append(tuple(artists))
+                    self.doc_of[event_id] = doc
+            with open(os.path.join(self.directory, LEXICON_FILE), 'r', encoding='utf-8') as f:
+                lexicon = json.load(f)
+            data = array('I')
+            with open(os.path.join(self.directory, POSTINGS_FILE), 'rb') as f:
+                data.frombytes(f.read())
+            for field, target in (('name', self.postings['name']), ('artist', self.postings['artist']),
+                                  ('exact', self.exact_artists)):
+                for gram, (offset, length) in lexicon['fields'][field].items():
+                    target[gram] = data[offset:offset + length]
+
+        journal_path = os.path.join(self.directory, JOURNAL_FILE)
+        if os.path.exists(journal_path):
+            with open(journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    record = json.loads(line)
+                    if len(record) == 1:
+                        self.remove(record[0])
+                    else:
+                        event_id, name, artists = record
+                        self._add_document(event_id, name, tuple(artists))
+                    self._journal_lines += 1
+
+    def _reset(self):
+        # 文書番号 → イベントID（削除済みはNone）・正規化したイベント名・出演者名
+        self.ids: List[Any] = []
+        self.names: List[str] = []
+        self.artists: List[Tuple[str, ...]] = []
+        # イベントID → 最新の文書番号
+        self.doc_of: Dict[Any, int] = {}
+        self.postings: Dict[str, Dict[str, array]] = {'name': {}, 'artist': {}}
+        # 正規化した出演者名 → 文書番号
+        self.exact_artists: Dict[str, array] = {}
+        self._deleted = 0
+        self._journal_lines = 0
+
+    def _add_document(self, event_id: Any, name: str, artists: Tuple[str, ...]):
+        previous = self.doc_of.get(event_id)
+        if previous is not None:
+            # 古い文書はposting listに残したまま削除済みにする
+            self.ids[previous] = None
+            self._deleted += 1
+        doc = len(self.ids)
+        self.ids.append(event_id)
+        self.names.append(name)
+        self.artists.append(artists)
+        self.doc_of[event_id] = doc
+        for gram in ngrams(name):
+            self._posting(self.postings['name'], gram).append(doc)
+        artist_grams = set()
+        for artist in set(artists):
+            if artist:
+                self._posting(self.exact_artists, artist).append(doc)
+                artist_grams.update(ngrams(artist))
+        for gram in artist_grams:
+            self._posting(self.postings['artist'], gram).append(doc)
+
+    @staticmethod
+    def _posting(postings: Dict[str, array], gram: str) -> array:
+        docs = postings.get(gram)
+        if docs is None:
+            docs = postings[gram] = array('I')
+        return docs
+
+    def _candidates(self, field: str, text: str) -> Iterator[int]:
+        """検索語のn-gramをすべて含む文書番号（昇順）"""
+        grams = query_grams(text)
+        if not grams:
+            # n文字未満の検索語は全文書を順に調べる
+            return iter(range(len(self.ids)))
+        postings = self.postings[field]
+        lists = sorted((postings.get(gram) for gram in grams), key=lambda docs: len(docs) if docs else 0)
+        if not lists[0]:
+            return iter(())
+        return self._intersect(lists[0], lists[1:])
+
+    @staticmethod
+    def _intersect(shortest: array, others: List[array]) -> Iterator[int]:
+        # 最も短いposting listの各文書を、他のposting listから二分探索で探す
+        for doc in shortest:
+            for docs in others:
+                position = bisect_left(docs, doc)
+                if position == len(docs) or docs[position] != doc:
+                    break
+            else:
+                yield doc
+
+    def _compact(self):
+        """削除済みの文書を除いて文書番号を振り直す"""
+        live = [(self.ids[doc], self.names[doc], self.artists[doc])
+                for doc in range(len(self.ids)) if self.ids[doc] is not None]
+        self._reset()
+        for event_id, name, artists in live:
+            self._add_document(event_id, name, artists)
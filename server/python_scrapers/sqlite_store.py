@@ -0,0 +1,180 @@
+"""
+SQLiteを使ったイベントストア
+"""
+import json
+import os
+import sqlite3
+from typing import List, Dict, Any, Iterator, Iterable, Optional, Tuple
+
+from .dates import parse_date
+from .dedup import MergeResult, dedup_key, merge_batch
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    dedup_key TEXT NOT NULL,
+    name TEXT,
+    date_iso TEXT,
+    region TEXT,
+    genre TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_events_dedup_key ON events (dedup_key);
+CREATE INDEX IF NOT EXISTS idx_events_date ON events (date_iso);
+CREATE INDEX IF NOT EXISTS idx_events_region_date ON events (region, date_iso);
+CREATE INDEX IF NOT EXISTS idx_events_genre_date ON events (genre, date_iso);
+"""
+
+# SQLiteのプレースホルダー数の上限を超えないようにIN句を分割する件数
+QUERY_CHUNK = 500
+# dedup_key列の形式の版（PRAGMA user_versionに保存し、古ければ全行のキーを作り直す）
+KEY_VERSION = 1
+
+
+class SqliteEventStore:
+    """イベントをSQLiteに保存し、日付・地域・ジャンルで索引を引けるようにするストア
+
+    イベント本体はJSONのままdata列に保存し、検索に使う項目だけを列として持つ。
+    IDはdedup.event_idで決まるため、同じイベントの再取得は同じ行の更新になる。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(SCHEMA)
+        self._migrate_keys()
+
+    def close(self):
+        self.connection.close()
+
+    def is_empty(self) -> bool:
+        return self.connection.execute("SELECT 1 FROM events LIMIT 1").fetchone() is None
+
+    def version(self) -> Tuple[Tuple[int, int], ...]:
+        """データベースファイルの版（書き込みで変わる。接続を使わないため別スレッドからも呼べる）"""
+        version = []
+        for path in (self.path, f"{self.path}-wal"):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            version.append((stat.st_size, stat.st_mtime_ns))
+        return tuple(version)
+
+    def count(self) -> int:
+        return self.connection.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def iter_events(self) -> Iterator[Dict[str, Any]]:
+        """全イベントをID順に1件ずつ返す"""
+        for (data,) in self.connection.execute("SELECT data FROM events ORDER BY id"):
+            yield json.loads(data)
+
+    def query(self, region: Optional[str] = None, genre: Optional[str] = None,
+              date_from: Optional[str] = None, date_to: Optional[str] = None) -> List[Dict[str, Any]]:
+        """地域・ジャンル・日付範囲（YYYY-MM-DD、両端を含む）でイベントを検索"""
+        conditions, params = [], []
+        if region is not None:
+            conditions.append("region = ?")
+            params.append(region)
+        if genre is not None:
+            conditions.append("genre = ?")
+            params.append(genre)
+        if date_from is not None:
+            conditions.append("date_iso >= ?")
+            params.append(date_from)
+        if date_to is not None:
+            conditions.append("date_iso <= ?")
+            params.append(date_to)
+        sql = "SELECT data FROM events"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY date_iso, id"
+        return [json.loads(data) for (data,) in self.connection.execute(sql, params)]
+
+    def append(self, events: Iterable[Dict[str, Any]]) -> int:
+        """イベントをそのまま書き込む（同じIDのイベントは置き換える）。書いた件数を返す"""
+        with self.connection:
+            rows = [self._row(event) for event in events]
+            self._write(rows)
+        return len(rows)
+
+    def upsert(self, new_events: List[Dict[str, Any]]) -> MergeResult:
+        """新しいイベントをマージし、追加・更新されたイベントを1つのトランザクションで書き込む"""
+        with self.connection:
+            # 今回のイベントとIDかキーが重なる既存イベントだけを読み込む
+            existing = {}
+            ids = [event['id'] for event in new_events if isinstance(event.get('id'), int)]
+            keys = [_encode_key(key) for key in {dedup_key(event) for event in new_events}]
+            for sql, values in (("SELECT id, data FROM events WHERE id IN ({})", ids),
+                                ("SELECT id, data FROM events WHERE dedup_key IN ({})", keys)):
+                for row_id, data in self._select_in(sql, values):
+                    if row_id not in existing:
+                        existing[row_id] = json.loads(data)
+
+            result, changed = merge_batch(new_events, existing.values())
+            self._write([self._row(event) for event in changed])
+        return result
+
+    def export_json(self, filepath: str) -> int:
+        """既存APIが読むevents.json形式に書き出し、件数を返す"""
+        count = 0
+        tmp_path = filepath + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('[')
+            for event in self.iter_events():
+                f.write(',\n  ' if count else '\n  ')
+                f.write(json.dumps(event, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+                count += 1
+            f.write('\n]' if count else ']')
+        os.replace(tmp_path, filepath)
+        return count
+
+    def _write(self, rows: List[Tuple[Any, ...]]):
+        self.connection.executemany(
+            """
+            INSERT INTO events (id, dedup_key, name, date_iso, region, genre, data)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (id) DO UPDATE SET
+                dedup_key = excluded.dedup_key,
+                name = excluded.name,
+                date_iso = excluded.date_iso,
+                region = excluded.region,
+                genre = excluded.genre,
+                data = excluded.data
+            """,
+            rows
+        )
+
+    def _migrate_keys(self):
+        """dedup_keyの形式が変わる前に保存された行のキーを作り直す"""
+        if self.connection.execute("PRAGMA user_version").fetchone()[0] >= KEY_VERSION:
+            return
+        with self.connection:
+            rows = [(_encode_key(dedup_key(json.loads(data))), row_id)
+                    for row_id, data in self.connection.execute("SELECT id, data FROM events")]
+            self.connection.executemany("UPDATE events SET dedup_key = ? WHERE id = ?", rows)
+            self.connection.execute(f"PRAGMA user_version = {KEY_VERSION}")
+
+    def _select_in(self, sql: str, values: List[Any]) -> Iterator[Tuple[Any, ...]]:
+        for start in range(0, len(values), QUERY_CHUNK):
+            chunk = values[start:start + QUERY_CHUNK]
+            yield from self.connection.execute(sql.format(','.join('?' * len(chunk))), chunk)
+
+    def _row(self, event: Dict[str, Any]) -> Tuple[Any, ...]:
+        return (
+            event.get('id'),
+            _encode_key(dedup_key(event)),
+            event.get('name'),
+            # 読み取れない日付はNULLにし、日付の範囲検索や並び順に混ぜない
+            event.get('dateISO') or parse_date(event.get('date')),
+            event.get('region'),
+            event.get('genre'),
+            json.dumps(event, ensure_ascii=False),
+        )
+
+
+def _encode_key(key: Tuple[str, str, str]) -> str:
+    """dedup_keyを1つの列に保存する文字列にする"""
+    return '\x1f'.join(key)
@@ -1,9 +1,11 @@
 """
 東京の音楽イベント情報スクレイパー
 """
-from .base_scraper import BaseScraper
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any
+from .base_scraper import BaseScraper, PageJob
+from .genre import genre_classifier
+from bs4 import BeautifulSoup, SoupStrainer
+from typing import List, Dict, Any, Optional
+from urllib.parse import urljoin
 import re
 from datetime import datetime, timedelta
 
@@ -11,76 +13,46 @@ from datetime import datetime, timedelta
 class TokyoMusicScraper(BaseScraper):
     """東京の音楽イベント情報をスクレイピング"""
     
+    # 複数のライブハウスサイトをチェック
+    live_house_sites = [
+        "https://www.livehouse.co.jp",
+        "https://www.tokyo-music.jp/livehouse"
+    ]
+    
+    # イベント一覧・ライブハウスサイトのどちらもイベント系のクラスを持つ要素の中だけを解析する
+    parse_only = SoupStrainer(['div', 'article'], class_=re.compile(r'event|live|schedule'))
+    
     def __init__(self):
         super().__init__("https://www.tokyo-music.jp")
     
     def scrape_events(self, days: int = 30) -> List[Dict[str, Any]]:
         """東京の音楽イベントをスクレイピング"""
-        events = []
-        
-        # 複数の音楽イベントサイトから情報を取得
-        events.extend(self._scrape_tokyo_music(days))
-        events.extend(self._scrape_live_house_info(days))
+        # 複数の音楽イベントサイトから情報を取得（各ページは独立して取得できる）
+        jobs = [PageJob(f"{self.base_url}/events", '_parse_event_list')]
+        jobs.extend(PageJob(site_url, '_parse_live_house_site', (site_url,)) for site_url in self.live_house_sites)
         
-        return events
+        return self.scrape_pages(jobs)
     
-    def _scrape_tokyo_music(self, days: int) -> List[Dict[str, Any]]:
-        """東京音楽サイトからスクレイピング"""
+    def _parse_event_list(self, soup: BeautifulSoup) -> List[Dict[str, Any]]:
+        """東京音楽サイトのイベント一覧をパース"""
         events = []
         
-        try:
-            # 実際のサイトに合わせてURLを調整
-            url = f"{self.base_url}/events"
-            soup = self.get_page(url)
-            
-            if not soup:
-                return events
-            
-            # イベント要素を検索
-            event_elements = soup.find_all('div', class_='event-item')
-            
-            for element in event_elements:
-                try:
-                    event_data = self._parse_event_element(element)
-                    if event_data:
-                        events.append(event_data)
-                except Exception as e:
-                    print(f"Error parsing event element: {e}")
-                    continue
-            
-        except Exception as e:
-            print(f"Error scraping Tokyo Music: {e}")
-        
-        return events
-    
-    def _scrape_live_house_info(self, days: int) -> List[Dict[str, Any]]:
-        """ライブハウス情報サイトからスクレイピング"""
-        events = []
+        # イベント要素を検索
+        event_elements = soup.find_all('div', class_='event-item')
         
-        try:
-            # 複数のライブハウスサイトをチェック
-            live_house_sites = [
-                "https://www.livehouse.co.jp",
-                "https://www.tokyo-music.jp/livehouse"
-            ]
-            
-            for site_url in live_house_sites:
-                try:
-                    soup = self.get_page(site_url)
-                    if soup:
-                        site_events = self._parse_live_house_site(soup, site_url)
-                        events.extend(site_events)
-                except Exception as e:
-                    print(f"Error scraping {site_url}: {e}")
-                    continue
-                    
-        except Exception as e:
-            print(f"Error scraping live house info: {e}")
+        for element in event_elements:
+            try:
+                event_data = self._parse_event_element(element)
+                if event_data:
+                    events.append(event_data)
+            except Exception as e:
+                self.element_error(f"Error parsing event element: {e}")
+                continue
         
         return events
     
-    def _parse_event_element(self, element) -> Dict[str, Any]:
-        """イベント要素をパース"""
+    def _parse_event_element(self, element, page_url: Optional[str] = None) -> Dict[str, Any]:
+        """イベント要素をパース（相対リンクはイベントを掲載していたページのURLで解決する）"""
         try:
             # タイトル
             title_elem = element.find('h3') or element.find('h2') or element.find('a')
@@ -110,7 +82,7 @@ class TokyoMusicScraper(BaseScraper):
             if link_elem and link_elem.get('href'):
                 link_url = link_elem['href']
                 if not link_url.startswith('http'):
-                    link_url = self.base_url + link_url
+                    link_url = urljoin(page_url or self.base_url, link_url)
                 links.append({
                     'label': '詳細情報',
                     'url': link_url
@@ -131,7 +103,7 @@ class TokyoMusicScraper(BaseScraper):
             }
             
         except Exception as e:
-            print(f"Error parsing event element: {e}")
+            self.element_error(f"Error parsing event element: {e}")
             return {}
     
     def _parse_live_house_site(self, soup: BeautifulSoup, site_url: str) -> List[Dict[str, Any]]:
@@ -143,11 +115,11 @@ class TokyoMusicScraper(BaseScraper):
         
         for element in event_elements:
             try:
-                event_data = self._parse_event_element(element)
+                event_data = self._parse_event_element(element, site_url)
                 if event_data:
                     events.append(event_data)
             except Exception as e:
-                print(f"Error parsing live house event: {e}")
+                self.element_error(f"Error parsing live house event: {e}")
                 continue
         
         return events
@@ -163,16 +135,4 @@ class TokyoMusicScraper(BaseScraper):
     
     def _detect_genre(self, title: str, artists: List[str]) -> str:
         """ジャンルを検出"""
-        title_lower = title.lower()
-        artists_text = ' '.join(artists).lower()
-        
-        if any(word in title_lower or word in artists_text for word in ['rock', 'ロック', 'rock']):
-            return "ロック"
-        elif any(word in title_lower or word in artists_text for word in ['jazz', 'ジャズ']):
-            return "ジャズ"
-        elif any(word in title_lower or word in artists_text for word in ['classical', 'クラシック', 'classic']):
-            return "クラシック"
-        elif any(word in title_lower or word in artists_text for word in ['edm', 'electronic', 'エレクトロ']):
-            return "EDM"
-        else:
-            return "ポップ" 
\ No newline at end of file
+        return genre_classifier.classify(title, artists)
\ No newline at end of file
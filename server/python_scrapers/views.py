@@ -0,0 +1,197 @@
+"""
+一覧表示用のビューファイル（地域・月・ジャンル別と今後のイベント）
+"""
+import hashlib
+import json
+import os
+import shutil
+from datetime import date, datetime
+from typing import List, Dict, Any, Iterable, Optional, Set, Tuple
+
+from .dates import parse_date
+
+
+# 分割する項目（ビューの種類）。地域・ジャンル別のビューはさらに月ごとに分ける
+VIEW_KINDS = ('region', 'month', 'genre')
+# 日付のないイベントの月
+UNDATED = 'undated'
+# 今後のイベントのビューに入れる件数
+UPCOMING_LIMIT = 100
+
+MANIFEST_FILE = 'manifest.json'
+UPCOMING_FILE = 'upcoming.json'
+# イベントID → そのイベントが入っているビューのパス
+LOCATIONS_FILE = 'locations.json'
+
+
+def partitions(event: Dict[str, Any]) -> Set[Tuple[str, str, str]]:
+    """イベントが入るビューの(種類, 値, 月)"""
+    date_iso = _date_iso(event)
+    month = date_iso[:7] if date_iso else UNDATED
+    keys = set()
+    if date_iso:
+        keys.add(('month', month, month))
+    for kind in ('region', 'genre'):
+        if event.get(kind):
+            keys.add((kind, event[kind], month))
+    return keys
+
+
+class MaterializedViews:
+    """地域・月・ジャンルごとのイベントと今後のイベントをJSONファイルに書き出しておく
+
+    ビューは month/2024-08.json、region/東京/2024-08.json、genre/ロック/2024-08.json のように
+    月ごとに分け、1ファイルを小さく保つ。各ビューは日付順のイベントと内容のハッシュ（version）を持ち、manifest.json に全ビューの
+    パス・version・件数をまとめる。追加・更新・削除されたイベントが入っている（入る）ビューだけを
+    書き直すため、変わっていないビューのファイルとversionはそのまま残り、クライアントのキャッシュが使える。
+    更新・削除されたイベントが以前どのビューに入っていたかは locations.json で引く。
+    """
+
+    def __init__(self, directory: str, upcoming_limit: int = UPCOMING_LIMIT):
+        self.directory = directory
+        self.upcoming_limit = upcoming_limit
+        self.manifest = self._load_manifest()
+        self.locations: Dict[Any, List[str]] = self._load_locations()
+
+    def exists(self) -> bool:
+        return bool(self.manifest['views']) and os.path.exists(os.path.join(self.directory, LOCATIONS_FILE))
+
+    def rebuild(self, events: Iterable[Dict[str, Any]], today: Optional[str] = None) -> int:
+        """全イベントからすべてのビューを作り直す。書き出したビューの数を返す"""
+        grouped: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        for event in events:
+            for key in partitions(event):
+                grouped.setdefault(key, []).append(event)
+
+        # 以前のビュー（今はもうない地域・月など）を残さない
+        for kind in VIEW_KINDS:
+            shutil.rmtree(os.path.join(self.directory, kind), ignore_errors=True)
+        self.manifest = {'generatedAt': None, 'views': {}}
+        self.locations = {}
+        for (kind, value, month), view_events in grouped.items():
+            path = self.view_path(kind, value, month)
+            self._write_view(path, kind, value, month, view_events)
+            for event in view_events:
+                self.locations.setdefault(event.get('id'), []).append(path)
+        self._finish(today)
+        return len(grouped)
+
+    def update(self, upserted: Iterable[Dict[str, Any]], deleted: Iterable[Any] = (),
+               today: Optional[str] = None) -> int:
+        """追加・更新・削除されたイベントが入っている（入る）ビューだけを書き直す。書き直したビューの数を返す
+
+        upsertedは追加・更新されたイベントの最新の内容、deletedは削除されたイベントのID。
+        """
+        # 変わったイベントのID → (イベント, 入るビュー)
+        changed: Dict[Any, Tuple[Dict[str, Any], Set[Tuple[str, str, str]]]] = {
+            event.get('id'): (event, partitions(event)) for event in upserted
+        }
+        removed = set(deleted) | set(changed)
+        # ビューのパス → (種類, 値, 月)
+        touched: Dict[str, Tuple[str, str, str]] = {}
+        for event_id in removed:
+            # 地域や日付が変わったイベント・削除されたイベントは以前のビューから取り除く
+            for path in self.locations.pop(event_id, ()):
+                entry = self.manifest['views'].get(path)
+                if entry:
+                    touched[path] = (entry['kind'], entry['value'], entry['month'])
+        for event_id, (_, keys) in changed.items():
+            paths = [self.view_path(*key) for key in keys]
+            touched.update(zip(paths, keys))
+            self.locations[event_id] = paths
+
+        for path, key in sorted(touched.items()):
+            view_events = [event for event in self._read_view(path) if event.get('id') not in removed]
+            view_events.extend(event for event, keys in changed.values() if key in keys)
+            self._write_view(path, *key, view_events)
+        self._finish(today)
+        return len(touched)
+
+    def view_path(self, kind: str, value: str, month: str) -> str:
+        """ビューのファイルのパス（views からの相対パス）"""
+        if kind == 'month':
+            return f"month/{month}.json"
+        return f"{kind}/{value.replace('/', '_').replace(os.sep, '_')}/{month}.json"
+
+    def _finish(self, today: Optional[str]):
+        # 今後のイベントは日付が変わるだけでも変わるため、毎回月別のビューから作り直す
+        self._write_upcoming(today or date.today().isoformat())
+        self.manifest['generatedAt'] = datetime.now().isoformat()
+        self._write_text(LOCATIONS_FILE, json.dumps(list(self.locations.items()), ensure_ascii=False,
+                                                    separators=(',', ':')))
+        self._write_json(MANIFEST_FILE, self.manifest)
+
+    def _write_upcoming(self, today: str):
+        upcoming: List[Dict[str, Any]] = []
+        months = sorted(entry['value'] for entry in self.manifest['views'].values()
+                        if entry['kind'] == 'month' and entry['month'] >= today[:7])
+        for month in months:
+            for event in self._read_view(self.view_path('month', month, month)):
+                if _date_iso(event) >= today:
+                    upcoming.append(event)
+            if len(upcoming) >= self.upcoming_limit:
+                break
+        self._write_view(UPCOMING_FILE, 'upcoming', today, today[:7], upcoming[:self.upcoming_limit])
+
+    def _write_view(self, path: str, kind: str, value: str, month: str, events: List[Dict[str, Any]]):
+        if not events and kind != 'upcoming':
+            # イベントがなくなったビューは削除する
+            self.manifest['views'].pop(path, None)
+            try:
+                os.remove(os.path.join(self.directory, path))
+            except OSError:
+                pass
+            return
+        # 日付のあるイベントを日付順に並べ、日付のないイベントはその後ろに置く
+        events = sorted(events, key=_sort_key)
+        body = json.dumps(events, ensure_ascii=False, separators=(',', ':'))
+        version = hashlib.sha1(body.encode('utf-8')).hexdigest()[:16]
+        entry = self.manifest['views'].get(path)
+        if entry and entry['version'] == version and os.path.exists(os.path.join(self.directory, path)):
+            return
+        entry = {'kind': kind, 'value': value, 'month': month, 'version': version, 'count': len(events)}
+        self.manifest['views'][path] = entry
+        # 同じイベントを2回シリアライズしないよう、versionを求めたときの文字列をそのまま使う
+        header = json.dumps(entry, ensure_ascii=False, separators=(',', ':'))
+        self._write_text(path, f'{header[:-1]},"events":{body}}}')
+
+    def _read_view(self, path: str) -> List[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, path), 'r', encoding='utf-8') as f:
+                return json.load(f)['events']
+        except (OSError, ValueError, KeyError):
+            return []
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'generatedAt': None, 'views': {}}
+
+    def _load_locations(self) -> Dict[Any, List[str]]:
+        try:
+            with open(os.path.join(self.directory, LOCATIONS_FILE), 'r', encoding='utf-8') as f:
+                return dict((event_id, paths) for event_id, paths in json.load(f))
+        except (OSError, ValueError):
+            return {}
+
+    def _write_json(self, path: str, data: Any):
+        self._write_text(path, json.dumps(data, ensure_ascii=False, indent=2))
+
+    def _write_text(self, path: str, text: str):
+        # 読み込み途中のファイルを返さないよう、一時ファイルに書いてから置き換える
+        target = os.path.join(self.directory, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(f"{target}.tmp", 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(f"{target}.tmp", target)
+
+
+def _date_iso(event: Dict[str, Any]) -> Optional[str]:
+    return event.get('dateISO') or parse_date(event.get('date'))
+
+
+def _sort_key(event: Dict[str, Any]) -> Tuple[bool, str, Any]:
+    date_iso = _date_iso(event)
+    return date_iso is None, date_iso or '', event.get('id') or 0
@@ -10,30 +10,54 @@ from datetime import datetime
 # プロジェクトルートをパスに追加
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from python_scrapers.scraper_manager import ScraperManager
-
 
 def main():
     parser = argparse.ArgumentParser(description='音楽イベント情報スクレイパー')
     parser.add_argument('--days', type=int, default=30, help='スクレイピングする日数（デフォルト: 30）')
     parser.add_argument('--output', type=str, default='events.json', help='出力ファイル名（デフォルト: events.json）')
     parser.add_argument('--data-dir', type=str, default='data', help='データディレクトリ（デフォルト: data）')
+    parser.add_argument('--workers', type=int, default=1, help='並列ワーカー数（デフォルト: 1 = 逐次実行）')
+    parser.add_argument('--backend', type=str, default='sync', choices=['sync', 'async'], help='ページ取得のバックエンド（デフォルト: sync）')
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help='ページを解析するプロセス数（0: 取得したスレッドで解析。デフォルト: 0）')
+    parser.add_argument('--parser', type=str, default='lxml', choices=['lxml', 'html.parser'], help='HTMLパーサー（デフォルト: lxml）')
+    parser.add_argument('--storage', type=str, default='json', choices=['json', 'jsonl', 'sqlite'],
+                        help='保存形式（jsonl: 追記型ストア / sqlite: SQLiteデータベース。どちらも差分だけを書き込む。デフォルト: json）')
+    parser.add_argument('--incremental', action='store_true', help='前回の取得から時間が経ったページだけを取得する（近い月ほど頻繁に取り直す）')
+    parser.add_argument('--regions', type=str, help='実行する地域をカンマ区切りで指定（例: tokyo,osaka。デフォルト: 全地域）')
+    parser.add_argument('--profile', type=str, metavar='PATH',
+                        help='cProfileで計測し統計をPATHに保存する（全体を計測するには --workers 1 で実行）')
+    parser.add_argument('--no-cache', action='store_true', help='HTTPキャッシュを使わずに全ページを取得し直す')
     
     args = parser.parse_args()
+    regions = [region.strip() for region in args.regions.split(',') if region.strip()] if args.regions else None
     
     print(f"=== 音楽イベント情報スクレイピング開始 ===")
     print(f"日時: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     print(f"対象日数: {args.days}日")
     print(f"出力ファイル: {args.output}")
     print(f"データディレクトリ: {args.data_dir}")
+    print(f"並列ワーカー数: {args.workers}")
+    print(f"取得バックエンド: {args.backend}")
+    print(f"解析プロセス数: {args.parse_workers or 'なし'}")
+    print(f"保存形式: {args.storage}")
+    print(f"対象地域: {', '.join(regions) if regions else '全地域'}")
     print("=" * 50)
     
+    # 引数の確認（--helpなど）だけで終わる場合に読み込まないよう、ここでimportする
+    from python_scrapers.scraper_manager import ScraperManager
+    from python_scrapers.metrics import profiled
+    
     try:
         # スクレイパーマネージャーを初期化
-        manager = ScraperManager(data_dir=args.data_dir)
+        manager = ScraperManager(data_dir=args.data_dir, workers=args.workers, fetch_backend=args.backend,
+                                use_cache=not args.no_cache, parser_backend=args.parser,
+                                storage=args.storage, incremental=args.incremental, regions=regions,
+                                parse_workers=args.parse_workers)
         
-        # スクレイピングパイプラインを実行
-        filepath = manager.run_scraping_pipeline(days=args.days, filename=args.output)
+        # スクレイピングパイプラインを実行（取得・解析などの時間はdata/run_report.jsonに保存される）
+        with profiled(args.profile):
+            filepath = manager.run_scraping_pipeline(days=args.days, filename=args.output)
         
         print("=" * 50)
         print(f"スクレイピング完了！")
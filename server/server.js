@@ -1,7 +1,11 @@
 import express from 'express';
 import cors from 'cors';
+import path from 'path';
+import { fileURLToPath } from 'url';
 import eventsRouter from './routes/events.js';
 
+const __dirname = path.dirname(fileURLToPath(import.meta.url));
+
 // Expressアプリケーションを作成
 const app = express();
 const PORT = process.env.PORT || 3001;
@@ -15,6 +19,10 @@ app.use(express.json());
 // これで、GET, POST, PUT, DELETE のリクエストを処理します
 app.use('/api/events', eventsRouter);
 
+// スクレイパーが書き出す地域・月・ジャンル別のビュー（data/views）をそのまま返す
+// 例: /api/views/manifest.json, /api/views/region/東京/2026-11.json, /api/views/upcoming.json
+app.use('/api/views', express.static(path.join(__dirname, 'data', 'views'), { maxAge: 0 }));
+
 
 // --- Server Activation ---
 app.listen(PORT, () => {
@@ -0,0 +1,107 @@
+"""
+AsyncFetcher と ConnectionLimiter のテスト
+"""
+import asyncio
+import threading
+import time
+
+from benchmarks.stub_server import StubServer
+from python_scrapers.async_fetcher import AsyncFetcher
+from python_scrapers.connection_limiter import ConnectionLimiter
+from python_scrapers.http_cache import HttpCache
+from python_scrapers.rate_limiter import HostRateLimiter
+
+
+class ActiveCounter:
+    """同時に処理中のリクエスト数の最大値を数えるスタブの応答"""
+
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, path):
+        with self._lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        return f"<p>{path}</p>".encode('utf-8')
+
+
+def _fetcher(limiter, **kwargs):
+    return AsyncFetcher({}, rate_limiter=HostRateLimiter(rate=1000, burst=1000),
+                        connection_limiter=limiter, **kwargs)
+
+
+def test_limit_is_shared_across_event_loops():
+    counter = ActiveCounter()
+    limiter = ConnectionLimiter(max_concurrency=3, per_host_concurrency=10)
+    with StubServer(counter, latency=0) as server:
+        results = []
+
+        def run(prefix):
+            urls = [f"{server.url}/{prefix}/{i}" for i in range(6)]
+            results.append(_fetcher(limiter).fetch_all(urls))
+
+        threads = [threading.Thread(target=run, args=(prefix,)) for prefix in ('tokyo', 'osaka')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    assert [len([page for page in pages if page]) for pages in results] == [6, 6]
+    assert counter.peak <= 3
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    limiter = ConnectionLimiter(max_concurrency=1)
+
+    async def scenario():
+        slots = limiter.connection()
+        await slots.acquire()
+        waiter = asyncio.ensure_future(slots.acquire())
+        await asyncio.sleep(0)
+        waiter.cancel()
+        slots.release()
+        await asyncio.sleep(0)
+        # キャンセルされた待ちの分のスロットが戻り、次の取得が待たずに通る
+        await asyncio.wait_for(slots.acquire(), timeout=1)
+        slots.release()
+
+    asyncio.run(scenario())
+
+
+def test_not_modified_with_cache(tmp_path):
+    served = []
+
+    class ETagServer(StubServer):
+        def _make_handler(self):
+            handler = super()._make_handler()
+
+            class Handler(handler):
+                def do_GET(self):
+                    served.append(self.headers.get('If-None-Match'))
+                    if self.headers.get('If-None-Match') == '"v1"':
+                        self.send_response(304)
+                        self.send_header('Content-Length', '0')
+                        self.end_headers()
+                        return
+                    body = b'<p>page</p>'
+                    self.send_response(200)
+                    self.send_header('ETag', '"v1"')
+                    self.send_header('Content-Length', str(len(body)))
+                    self.end_headers()
+                    self.wfile.write(body)
+
+            return Handler
+
+    cache = HttpCache(str(tmp_path))
+    with ETagServer(lambda path: None, latency=0) as server:
+        first, = _fetcher(None, http_cache=cache).fetch_all([f"{server.url}/page"])
+        second, = _fetcher(None, http_cache=cache).fetch_all([f"{server.url}/page"])
+
+    assert served == [None, '"v1"']
+    assert not first.not_modified
+    assert second.not_modified and second.content == b'<p>page</p>'
@@ -0,0 +1,79 @@
+"""
+ChangeFeed のテスト
+"""
+from python_scrapers.change_feed import ChangeFeed
+
+
+def _event(event_id, name, price='¥3,000'):
+    return {'id': event_id, 'name': name, 'date': '2024-08-12', 'price': price}
+
+
+def test_first_run_records_baseline_only(tmp_path):
+    feed = ChangeFeed(str(tmp_path))
+    changes = feed.record([_event(1, 'ロックナイト'), _event(2, 'ジャズナイト')])
+    assert changes.baseline and changes.counts == {'insert': 0, 'update': 0, 'delete': 0}
+    assert feed.exists() and feed.head() == 0
+    assert feed.changes_since(0) == ([], 0, 0, False)
+
+
+def test_changes_get_consecutive_sequence_numbers(tmp_path):
+    feed = ChangeFeed(str(tmp_path))
+    feed.record([_event(1, 'ロックナイト'), _event(2, 'ジャズナイト')])
+
+    changes = feed.record([_event(1, 'ロックナイト', price='¥4,000'), _event(3, 'クラシックの夕べ')])
+    assert not changes.baseline
+    assert changes.counts == {'insert': 1, 'update': 1, 'delete': 1}
+    assert changes.deleted == [2]
+    feed.record([_event(1, 'ロックナイト', price='¥5,000'), _event(3, 'クラシックの夕べ')])
+    assert feed.head() == 4
+
+    batch = feed.changes_since(0)
+    assert [(change['seq'], change['op'], change['id']) for change in batch.changes] == [
+        (1, 'update', 1), (2, 'insert', 3), (3, 'delete', 2), (4, 'update', 1)]
+    assert batch.changes[-1]['event']['price'] == '¥5,000'
+    assert 'event' not in batch.changes[2]
+    assert (batch.next, batch.head, batch.reset) == (4, 4, False)
+
+
+def test_unchanged_run_keeps_head(tmp_path):
+    feed = ChangeFeed(str(tmp_path))
+    feed.record([_event(1, 'ロックナイト')])
+    feed.record([_event(1, 'ロックナイト', price='¥4,000')])
+    # 作成日時など実行ごとに変わる項目だけの違いは変更にしない
+    changes = feed.record([dict(_event(1, 'ロックナイト', price='¥4,000'), createdAt='2024-08-13T00:00:00')])
+    assert changes.counts == {'insert': 0, 'update': 0, 'delete': 0}
+    assert feed.head() == 1
+
+
+def test_cursor_resumes_across_pages_and_runs(tmp_path):
+    feed = ChangeFeed(str(tmp_path))
+    feed.record([])
+    feed.record([_event(i, f"イベント{i}") for i in range(1, 6)])
+
+    seen = []
+    cursor = 0
+    while True:
+        batch = feed.changes_since(cursor, limit=2)
+        seen.extend(change['seq'] for change in batch.changes)
+        if not batch.changes:
+            break
+        cursor = batch.next
+    assert seen == [1, 2, 3, 4, 5] and cursor == 5
+
+    # 次の実行の変更だけを受け取る
+    feed.record([_event(i, f"イベント{i}") for i in range(1, 5)])
+    batch = feed.changes_since(cursor)
+    assert [(change['seq'], change['op'], change['id']) for change in batch.changes] == [(6, 'delete', 5)]
+
+
+def test_stale_cursor_requires_reset(tmp_path):
+    feed = ChangeFeed(str(tmp_path), max_segments=2)
+    feed.record([])
+    for price in ('¥1,000', '¥2,000', '¥3,000'):
+        feed.record([_event(1, 'ロックナイト', price=price)])
+    # 最初の変更のセグメントは消されている
+    assert feed.changes_since(0).reset
+    batch = feed.changes_since(1)
+    assert not batch.reset and [change['seq'] for change in batch.changes] == [2, 3]
+    # 記録より新しいカーソルも読み込み直しにする
+    assert feed.changes_since(10) == ([], 3, 3, True)
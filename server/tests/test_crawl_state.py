@@ -0,0 +1,90 @@
+"""
+CrawlState（差分スクレイピング）のテスト
+"""
+import time
+
+import pytest
+
+from python_scrapers.base_scraper import BaseScraper, PageJob
+from python_scrapers.crawl_state import CrawlState, refresh_interval
+from python_scrapers.rate_limiter import HostRateLimiter
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self):
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.requests.append(url)
+        return FakeResponse(f'<h3>{url}</h3>'.encode('utf-8'))
+
+
+class MonthlyScraper(BaseScraper):
+    def __init__(self, session, crawl_state):
+        super().__init__('https://example.com')
+        self._session = session
+        self.crawl_state = crawl_state
+        self.rate_limiter = HostRateLimiter(rate=1000, burst=1000)
+
+    def scrape_events(self, **kwargs):
+        return self.scrape_pages([
+            PageJob(f'https://example.com/schedule/{months}', '_parse', months_ahead=months) for months in range(3)
+        ])
+
+    def _parse(self, soup):
+        return [{'name': element.get_text(strip=True)} for element in soup.find_all('h3')]
+
+
+@pytest.mark.parametrize('months_ahead, interval', [(0, 6 * HOUR), (1, DAY), (2, 3 * DAY), (3, 3 * DAY), (6, 7 * DAY)])
+def test_refresh_interval(months_ahead, interval):
+    assert refresh_interval(months_ahead) == interval
+
+
+def test_stale_pages_and_changes_are_tracked(tmp_path):
+    path = str(tmp_path / 'crawl_state.json')
+    state = CrawlState(path)
+    assert state.is_stale('https://example.com/a')
+    assert state.record('https://example.com/a', b'v1')
+    assert not state.record('https://example.com/a', b'v1')
+    assert state.record('https://example.com/a', b'v2')
+    assert (state.fetched, state.changed) == (3, 2)
+    state.save()
+
+    state = CrawlState(path)
+    now = time.time()
+    assert not state.is_stale('https://example.com/a', months_ahead=0, now=now + 5 * HOUR)
+    assert state.is_stale('https://example.com/a', months_ahead=0, now=now + 7 * HOUR)
+    assert not state.is_stale('https://example.com/a', months_ahead=4, now=now + 6 * DAY)
+    assert state.skipped == 2
+
+
+def test_scraper_skips_pages_fetched_recently(tmp_path):
+    path = str(tmp_path / 'crawl_state.json')
+    session = FakeSession()
+    state = CrawlState(path)
+    assert len(MonthlyScraper(session, state).scrape_events()) == 3
+    assert len(session.requests) == 3
+    state.save()
+
+    state = CrawlState(path)
+    # 7時間前に取得したことにすると、6時間ごとに取り直す今月のページだけが古くなる
+    for page in state._pages.values():
+        page['fetched_at'] -= 7 * HOUR
+    session.requests.clear()
+    assert len(MonthlyScraper(session, state).scrape_events()) == 1
+    assert session.requests == ['https://example.com/schedule/0']
+    assert state.skipped == 2
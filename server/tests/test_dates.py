@@ -0,0 +1,50 @@
+"""
+日付・時刻の正規化のテスト
+"""
+from datetime import date
+
+import pytest
+
+from python_scrapers.dates import DateTimeNormalizer, parse_date, parse_times
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('18:00〜21:00', (None, '18:00', '21:00')),
+    ('20:00～24:00', (None, '20:00', '24:00')),
+    ('18:00 - 21:00', (None, '18:00', '21:00')),
+    ('18:00–21:00', (None, '18:00', '21:00')),
+    ('開場17:30 / 開演18:00〜20:00', ('17:30', '18:00', '20:00')),
+    ('19時〜', (None, '19:00', None)),
+])
+def test_parse_times_reads_ranges_as_start_and_end(value, expected):
+    assert parse_times(value) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('18:00開場・18:30開演', ('18:00', '18:30', None)),
+    ('OPEN 18:00 - START 18:30', ('18:00', '18:30', None)),
+    ('開場 18時半 開演 19時', ('18:30', '19:00', None)),
+    ('18:00 / 18:30', ('18:00', '18:30', None)),
+    ('19:00', (None, '19:00', None)),
+])
+def test_parse_times_reads_open_and_start(value, expected):
+    assert parse_times(value) == expected
+
+
+def test_parse_date_formats():
+    assert parse_date('2024年8月12日（月）') == '2024-08-12'
+    assert parse_date('令和6年8月12日') == '2024-08-12'
+    assert parse_date('8/12(月)') is None
+    assert parse_date('8/12(月)', reference=date(2024, 7, 1)) == '2024-08-12'
+    # 基準日よりかなり前の月日は翌年とみなす
+    assert parse_date('1月5日', reference=date(2024, 11, 1)) == '2025-01-05'
+
+
+def test_normalizer_sets_fields_of_existing_events():
+    events = [{'date': '2024-08-12', 'time': '18:00〜21:00'}, {'date': '日程未定', 'time': '未定'}]
+    normalizer = DateTimeNormalizer(reference=date(2024, 7, 1))
+    normalizer.normalize(events)
+    assert events[0] == {'date': '2024-08-12', 'time': '18:00〜21:00', 'dateISO': '2024-08-12',
+                         'openTime': None, 'startTime': '18:00', 'endTime': '21:00'}
+    assert events[1]['dateISO'] is None and events[1]['startTime'] is None
+    assert normalizer.date_failures['日程未定'] == 1 and normalizer.time_failures['未定'] == 1
@@ -0,0 +1,85 @@
+"""
+FuzzyDeduplicator のテスト
+"""
+from datetime import date
+
+from bs4 import BeautifulSoup
+
+from python_scrapers.dates import DateTimeNormalizer
+from python_scrapers.dedup import FuzzyDeduplicator
+from python_scrapers.tokyo_scraper import TokyoMusicScraper
+
+
+def _event(name, date, location, site, source='Tokyo Music Scraper', region='東京'):
+    return {'name': name, 'date': date, 'location': location, 'source': source, 'region': region,
+            'artists': [], 'links': [{'label': '詳細情報', 'url': f"https://{site}/events/{name}"}]}
+
+
+def test_merges_same_event_listed_on_different_sites():
+    events = [
+        _event('サマー・ロック・フェス', '2024-08-12', 'Zepp Tokyo', 'www.tokyo-music.jp'),
+        _event('サマーロックフェス', '2024年8月12日', 'ZEPP TOKYO（お台場）', 'www.livehouse.co.jp'),
+    ]
+    deduped = FuzzyDeduplicator().dedupe(events)
+    assert len(deduped) == 1
+    assert len(deduped[0]['links']) == 2
+
+
+def test_merges_listing_and_live_house_pages_of_the_same_scraper():
+    scraper = TokyoMusicScraper()
+    listing = BeautifulSoup(
+        '<div class="event-item"><h3>サマー・ロック・フェス 2024</h3><span class="date">2024年8月12日（月）</span>'
+        '<span class="venue">Zepp Tokyo</span><a href="/events/1">詳細</a></div>', 'html.parser')
+    live_house = BeautifulSoup(
+        '<article class="live"><h2>サマーロックフェス2024</h2><span class="date">8/12(月)</span>'
+        '<span class="venue">ZEPP TOKYO</span><a href="/schedule/812">詳細</a></article>', 'html.parser')
+    events = scraper._parse_event_list(listing)
+    events += scraper._parse_live_house_site(live_house, 'https://www.livehouse.co.jp')
+    assert {event['source'] for event in events} == {'Tokyo Music Scraper'}
+    DateTimeNormalizer(reference=date(2024, 7, 1)).normalize(events)
+
+    deduped = FuzzyDeduplicator().dedupe(events)
+    assert len(deduped) == 1
+    assert [link['url'] for link in deduped[0]['links']] == [
+        'https://www.tokyo-music.jp/events/1', 'https://www.livehouse.co.jp/schedule/812']
+
+
+def test_keeps_events_at_different_venues():
+    events = [
+        _event('Jazz Session Vol.1', '2024-08-12', 'Blue Note', 'www.tokyo-music.jp'),
+        _event('Jazz Session Vol.2', '2024-08-12', 'Pit Inn', 'www.livehouse.co.jp'),
+    ]
+    assert len(FuzzyDeduplicator().dedupe(events)) == 2
+
+
+def test_keeps_events_from_the_same_site():
+    events = [
+        _event('夜のジャズライブ 1', '2024-08-12', '大ホール', 'www.kyobun.org', region='札幌'),
+        _event('夜のジャズライブ 2', '2024-08-12', '小ホール', 'www.kyobun.org', region='札幌'),
+        _event('夜のジャズライブ 1', '2024-08-12', '大ホール', 'www.kyobun.org', region='札幌'),
+        _event('夜のジャズライブ 2', '2024-08-12', '大ホール', 'www.kyobun.org', region='札幌'),
+    ]
+    assert len(FuzzyDeduplicator().dedupe(events)) == 4
+
+
+def test_never_merges_undated_or_placeholder_events():
+    events = [
+        _event('不明なイベント', '', '会場A', 'www.tokyo-music.jp'),
+        _event('不明なイベント', '', '会場B', 'www.livehouse.co.jp'),
+        _event('不明なイベント', '2024-08-12', '会場A', 'www.tokyo-music.jp'),
+        _event('不明なイベント', '2024-08-12', '会場A', 'www.livehouse.co.jp'),
+        _event('ロックナイト', '日程未定', '会場A', 'www.tokyo-music.jp'),
+        _event('ロックナイト', '日程未定', '会場A', 'www.livehouse.co.jp'),
+        _event('ロックナイト', '2024-08-12', '東京', 'www.tokyo-music.jp'),
+        _event('ロックナイト', '2024-08-12', '東京', 'www.livehouse.co.jp'),
+    ]
+    assert len(FuzzyDeduplicator().dedupe(events)) == 8
+
+
+def test_merges_events_with_the_same_id_from_different_pages():
+    first = dict(_event('不明なイベント', '', '東京', 'www.tokyo-music.jp'), id=1)
+    second = dict(_event('不明なイベント', '', '東京', 'www.livehouse.co.jp'), id=1)
+    other = dict(_event('不明なイベント', '', '東京', 'www.livehouse.co.jp'), id=2)
+    deduped = FuzzyDeduplicator().dedupe([first, other, second])
+    assert [event['id'] for event in deduped] == [1, 2]
+    assert len(deduped[0]['links']) == 2
@@ -0,0 +1,26 @@
+"""
+Event と行形式のシリアライズのテスト
+"""
+import json
+
+from python_scrapers.event import EVENT_FIELDS, Event, dumps_events, loads_events, normalize_events
+
+
+def test_dumps_and_loads_round_trip():
+    events = normalize_events([
+        {'id': 1, 'name': 'ロックナイト', 'date': '2024-08-12', 'region': '東京', 'artists': ['A', 'B'],
+         'links': [{'label': '詳細情報', 'url': 'https://example.com/1'}]},
+        {'id': 2, 'title': 'ジャズの夕べ', 'venue': 'Blue Note', 'ticket_price': '¥5,000', 'region': '東京'},
+    ])
+    text = dumps_events(events)
+    assert json.loads(text)['fields'] == list(EVENT_FIELDS)
+
+    loaded = loads_events(text)
+    assert loaded == events
+    # 地域などの文字列は読み込んだイベントでも共有される
+    assert loaded[0].region is loaded[1].region
+
+
+def test_loads_rows_written_with_another_field_order():
+    text = json.dumps({'fields': ['name', 'id', 'region'], 'rows': [['ロックナイト', 1, '東京']]})
+    assert loads_events(text) == [Event(id=1, name='ロックナイト', region='東京')]
@@ -0,0 +1,51 @@
+"""
+内容から決まるイベントIDと既存イベントの振り直しのテスト
+"""
+import json
+
+import pytest
+
+from python_scrapers.dedup import dedup_key, event_id, rekey_legacy_events
+from python_scrapers.scraper_manager import ScraperManager
+
+
+def _legacy_events():
+    return [
+        {'id': 1, 'name': 'ロックナイト', 'date': '2024-08-12', 'location': 'Zepp Tokyo', 'source': 'Tokyo Music Scraper'},
+        {'id': 2, 'name': 'ジャズの夕べ', 'date': '2024-08-13', 'location': 'Blue Note', 'source': 'Tokyo Music Scraper'},
+        # 以前の連番では別のIDが付いていた同じイベント
+        {'id': 3, 'name': 'ロックナイト', 'date': '2024-08-12', 'location': 'Zepp Tokyo', 'source': 'Tokyo Music Scraper'},
+    ]
+
+
+def test_rekey_replaces_positional_ids_and_keeps_content_ids():
+    events = _legacy_events()
+    kept = dict(events[1], id=event_id(dict(events[1], name='旧タイトル')))
+    rekeyed = rekey_legacy_events([events[0], kept, events[2]])
+    assert [event['id'] for event in rekeyed] == [event_id(events[0]), kept['id']]
+
+
+def test_dedup_key_and_event_id_agree_on_date_spellings():
+    first = {'name': 'ロックナイト', 'date': '2024年8月12日（月）', 'location': 'Zepp Tokyo', 'source': 'A'}
+    second = dict(first, date='2024-08-12')
+    assert dedup_key(first) == dedup_key(second)
+    assert event_id(first) == event_id(second)
+
+
+@pytest.mark.parametrize('storage', ['json', 'jsonl', 'sqlite'])
+def test_existing_events_get_the_same_ids_with_every_storage(tmp_path, storage):
+    with open(tmp_path / 'events.json', 'w', encoding='utf-8') as f:
+        json.dump(_legacy_events(), f, ensure_ascii=False)
+    manager = ScraperManager(data_dir=str(tmp_path), storage=storage, use_cache=False)
+    # 再スクレイピングで日付の表記と価格が変わった同じイベント
+    scraped = {'name': 'ロックナイト', 'date': '2024年8月12日', 'location': 'Zepp Tokyo',
+               'source': 'Tokyo Music Scraper', 'price': '¥3,000'}
+    scraped['id'] = event_id(scraped)
+    manager.run_all_scrapers = lambda days: [scraped]
+    manager.run_scraping_pipeline(days=30)
+
+    with open(tmp_path / 'events.json', 'r', encoding='utf-8') as f:
+        saved = json.load(f)
+    expected = {event_id(event) for event in _legacy_events()}
+    assert {event['id'] for event in saved} == expected
+    assert manager.last_merge.stats() == {'inserted': 0, 'updated': 1, 'unchanged': 0}
@@ -0,0 +1,91 @@
+"""
+JsonLinesEventStore のテスト
+"""
+import json
+
+import pytest
+
+from python_scrapers.event_store import JsonLinesEventStore
+from python_scrapers.scraper_manager import ScraperManager
+
+
+def _event(event_id, name, price='¥3,000'):
+    return {'id': event_id, 'name': name, 'date': '2024-08-12', 'location': '会場', 'price': price,
+            'artists': [], 'links': []}
+
+
+def test_append_after_torn_write(tmp_path):
+    JsonLinesEventStore(str(tmp_path)).append([_event(1, 'ロックナイト'), _event(2, 'ジャズナイト')])
+    # 2件目の記録の途中で止まった状態にする
+    (segment,) = tmp_path.glob('*.jsonl')
+    data = segment.read_bytes()
+    segment.write_bytes(data[:len(data) - 10])
+
+    store = JsonLinesEventStore(str(tmp_path))
+    assert [event['id'] for event in store.iter_events()] == [1]
+    store.append([_event(3, 'クラシックの夕べ')])
+    assert [event['id'] for event in store.iter_events()] == [1, 3]
+    assert segment.read_bytes().count(b'\n') == 2
+    assert [event['id'] for event in JsonLinesEventStore(str(tmp_path)).iter_events()] == [1, 3]
+
+
+def test_upsert_reads_only_matching_records(tmp_path, monkeypatch):
+    JsonLinesEventStore(str(tmp_path)).append([_event(i, f"イベント{i}") for i in range(1, 101)])
+
+    store = JsonLinesEventStore(str(tmp_path))
+    monkeypatch.setattr(store, 'iter_events', lambda: iter(()))
+    result = store.upsert([_event(5, 'イベント5', price='¥4,000'), _event(6, 'イベント6'), _event(101, '新しいイベント')])
+    assert result.stats() == {'inserted': 1, 'updated': 1, 'unchanged': 1}
+    # 新しいイベントと更新されたイベントの2件だけを追記する
+    (segment,) = tmp_path.glob('*.jsonl')
+    assert segment.read_bytes().count(b'\n') == 102
+
+    events = {event['id']: event for event in JsonLinesEventStore(str(tmp_path)).iter_events()}
+    assert len(events) == 101
+    assert events[5]['price'] == '¥4,000'
+
+
+def test_index_is_rebuilt_from_segments(tmp_path):
+    store = JsonLinesEventStore(str(tmp_path))
+    store.append([_event(1, 'ロックナイト'), _event(2, 'ジャズナイト')])
+    store.append([_event(1, 'ロックナイト', price='¥5,000')])
+    # 索引を書く前に止まった状態にする
+    for index_path in tmp_path.glob('*.idx'):
+        index_path.unlink()
+
+    store = JsonLinesEventStore(str(tmp_path))
+    result = store.upsert([_event(1, 'ロックナイト', price='¥5,000'), _event(2, 'ジャズナイト')])
+    assert result.stats() == {'inserted': 0, 'updated': 0, 'unchanged': 2}
+    assert list(tmp_path.glob('*.idx'))
+
+
+def test_compact_keeps_latest_records(tmp_path):
+    store = JsonLinesEventStore(str(tmp_path), segment_max_bytes=200, max_segments=2)
+    for price in ('¥1,000', '¥2,000', '¥3,000'):
+        store.upsert([_event(1, 'ロックナイト', price=price), _event(2, 'ジャズナイト', price=price)])
+    assert len(list(tmp_path.glob('*.jsonl'))) <= 2
+
+    store = JsonLinesEventStore(str(tmp_path))
+    assert [(event['id'], event['price']) for event in store.iter_events()] == [(1, '¥3,000'), (2, '¥3,000')]
+    assert store.upsert([_event(1, 'ロックナイト', price='¥3,000')]).stats()['unchanged'] == 1
+
+
+@pytest.mark.parametrize('storage', ['jsonl', 'sqlite'])
+def test_pipeline_skips_export_when_store_is_unchanged(tmp_path, storage):
+    manager = ScraperManager(data_dir=str(tmp_path), storage=storage, use_cache=False)
+    scraped = [_event(1, 'ロックナイト'), _event(2, 'ジャズナイト')]
+    manager.run_all_scrapers = lambda days: [dict(event) for event in scraped]
+    manager.run_scraping_pipeline(days=30)
+    exported = (tmp_path / 'events.json').stat().st_mtime_ns
+    snapshot = (tmp_path / 'changes' / 'snapshot.json').stat().st_mtime_ns
+
+    manager.run_scraping_pipeline(days=30)
+    assert manager.last_merge.stats() == {'inserted': 0, 'updated': 0, 'unchanged': 2}
+    assert (tmp_path / 'events.json').stat().st_mtime_ns == exported
+    assert (tmp_path / 'changes' / 'snapshot.json').stat().st_mtime_ns == snapshot
+
+    scraped[1] = _event(2, 'ジャズナイト', price='¥4,000')
+    manager.run_scraping_pipeline(days=30)
+    assert manager.last_changes == {'insert': 0, 'update': 1, 'delete': 0}
+    with open(tmp_path / 'events.json', 'r', encoding='utf-8') as f:
+        assert [event['price'] for event in json.load(f)] == ['¥3,000', '¥4,000']
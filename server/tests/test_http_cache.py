@@ -0,0 +1,109 @@
+"""
+HttpCache と条件付きGETのテスト
+"""
+import json
+import time
+
+from python_scrapers.base_scraper import BaseScraper, PageJob
+from python_scrapers.http_cache import HttpCache
+from python_scrapers.rate_limiter import HostRateLimiter
+
+PAGE = b'<div class="event-item"><h3>ROCK NIGHT</h3></div>'
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+
+class FakeSession:
+    """ETagが一致すれば304を返すサーバーの代わり"""
+
+    def __init__(self, content=PAGE, etag='"v1"'):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, timeout=None, headers=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, {'ETag': self.etag})
+
+
+class CountingScraper(BaseScraper):
+    def __init__(self, session, http_cache):
+        super().__init__('https://example.com')
+        self._session = session
+        self.http_cache = http_cache
+        self.rate_limiter = HostRateLimiter(rate=1000, burst=1000)
+        self.parsed = 0
+
+    def scrape_events(self, **kwargs):
+        return self.scrape_pages([PageJob('https://example.com/events', '_parse')])
+
+    def _parse(self, soup):
+        self.parsed += 1
+        return [{'name': element.get_text(strip=True)} for element in soup.find_all('h3')]
+
+
+def test_store_and_validators(tmp_path):
+    cache = HttpCache(str(tmp_path))
+    cache.store('https://example.com/a', b'body', {'ETag': '"abc"', 'Last-Modified': 'Mon, 12 Aug 2024 00:00:00 GMT'})
+    meta = cache.lookup('https://example.com/a')
+    assert cache.validators(meta) == {'If-None-Match': '"abc"', 'If-Modified-Since': 'Mon, 12 Aug 2024 00:00:00 GMT'}
+    assert cache.load_body('https://example.com/a') == b'body'
+    # 検証用ヘッダーのないレスポンスは保存しない
+    cache.store('https://example.com/b', b'body', {})
+    assert cache.lookup('https://example.com/b') is None
+
+
+def test_expired_entry_is_removed(tmp_path):
+    cache = HttpCache(str(tmp_path), ttl=60, max_bytes=1000)
+    cache.store('https://example.com/a', b'x' * 100, {'ETag': '"a"'})
+    cache.store('https://example.com/b', b'x' * 50, {'ETag': '"b"'})
+    assert cache._total_bytes == 150
+    # 最後に検証されてからttlを過ぎた状態にする
+    meta = cache._read_meta('https://example.com/a')
+    meta['validated_at'] = time.time() - 120
+    with open(cache._meta_path(cache._key('https://example.com/a')), 'w', encoding='utf-8') as f:
+        json.dump(meta, f)
+    assert cache.lookup('https://example.com/a') is None
+    assert cache._total_bytes == 50
+    assert cache.load_body('https://example.com/a') is None
+
+
+def test_not_modified_page_reuses_body(tmp_path):
+    session = FakeSession()
+    scraper = CountingScraper(session, HttpCache(str(tmp_path)))
+    first = scraper.fetch('https://example.com/events')
+    second = scraper.fetch('https://example.com/events')
+    assert not first.not_modified
+    assert second.not_modified and second.content == PAGE
+    assert session.requests[1] == {'If-None-Match': '"v1"'}
+
+
+def test_not_modified_page_is_not_parsed_again_without_parse_cache(tmp_path):
+    session = FakeSession()
+    cache = HttpCache(str(tmp_path))
+    first = CountingScraper(session, cache)
+    assert first.scrape_events() == [{'name': 'ROCK NIGHT'}]
+    assert first.parsed == 1
+
+    # 次の実行（parse_cacheなし）では304応答のページを解析しない
+    second = CountingScraper(session, cache)
+    assert second.parse_cache is None
+    assert second.scrape_events() == [{'name': 'ROCK NIGHT'}]
+    assert second.parsed == 0
+
+    # ページが変わったら取り直して解析する
+    session.content, session.etag = PAGE.replace(b'ROCK', b'JAZZ'), '"v2"'
+    third = CountingScraper(session, cache)
+    assert third.scrape_events() == [{'name': 'JAZZ NIGHT'}]
+    assert third.parsed == 1
@@ -0,0 +1,95 @@
+"""
+ParseCache のテスト
+"""
+import os
+
+from python_scrapers.base_scraper import BaseScraper, PageJob
+from python_scrapers.parse_cache import ParseCache
+from python_scrapers.rate_limiter import HostRateLimiter
+
+PAGE = b'<div class="event-item"><h3>ROCK NIGHT</h3></div>'
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, content):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+class FakeSession:
+    """検証用ヘッダーを返さない（毎回本文を返す）サーバーの代わり"""
+
+    def __init__(self, content=PAGE):
+        self.content = content
+
+    def get(self, url, timeout=None, headers=None):
+        return FakeResponse(self.content)
+
+
+class CountingScraper(BaseScraper):
+    def __init__(self, session, parse_cache):
+        super().__init__('https://example.com')
+        self._session = session
+        self.parse_cache = parse_cache
+        self.rate_limiter = HostRateLimiter(rate=1000, burst=1000)
+        self.parsed = 0
+
+    def scrape_events(self, **kwargs):
+        return self.scrape_pages([PageJob('https://example.com/events', '_parse')])
+
+    def _parse(self, soup):
+        self.parsed += 1
+        return [{'name': element.get_text(strip=True)} for element in soup.find_all('h3')]
+
+
+def test_key_depends_on_body_and_parser(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    key = cache.key(PAGE, 'parser:lxml')
+    assert key == cache.key(PAGE, 'parser:lxml')
+    assert key != cache.key(PAGE + b' ', 'parser:lxml')
+    assert key != cache.key(PAGE, 'parser:html.parser')
+
+    assert cache.get(key) is None
+    cache.put(key, [{'name': 'ROCK NIGHT'}])
+    assert ParseCache(str(tmp_path)).get(key) == [{'name': 'ROCK NIGHT'}]
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache = ParseCache(str(tmp_path), max_entries=10)
+    keys = [cache.key(str(i).encode(), 'parser') for i in range(10)]
+    for i, key in enumerate(keys):
+        cache.put(key, [{'name': str(i)}])
+        os.utime(cache._path(key), (i, i))
+    # 最も古いエントリを使い直すと削除の対象から外れる
+    assert cache.get(keys[0]) == [{'name': '0'}]
+
+    cache.put(cache.key(b'new', 'parser'), [])
+    remaining = [key for key in keys if cache.get(key) is not None]
+    assert len(os.listdir(str(tmp_path))) == 9
+    assert keys[0] in remaining and keys[1] not in remaining and keys[2] not in remaining
+
+
+def test_unchanged_body_is_not_parsed_again(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    session = FakeSession()
+    first = CountingScraper(session, cache)
+    assert first.scrape_events() == [{'name': 'ROCK NIGHT'}]
+    second = CountingScraper(session, cache)
+    assert second.scrape_events() == [{'name': 'ROCK NIGHT'}]
+    assert (first.parsed, second.parsed) == (1, 0)
+
+    # パーサーのバックエンドが変わると解析し直す
+    third = CountingScraper(session, cache)
+    third.parser_backend = 'html.parser'
+    assert third.scrape_events() == [{'name': 'ROCK NIGHT'}]
+    assert third.parsed == 1
+
+    session.content = PAGE.replace(b'ROCK', b'JAZZ')
+    fourth = CountingScraper(session, cache)
+    assert fourth.scrape_events() == [{'name': 'JAZZ NIGHT'}]
+    assert fourth.parsed == 1
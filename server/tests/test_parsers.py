@@ -0,0 +1,32 @@
+"""
+HTMLパーサーと parse_only フィルタのテスト
+"""
+import pytest
+
+from benchmarks.fixtures import region_pages
+from python_scrapers.osaka_scraper import OsakaMusicScraper
+from python_scrapers.sapporo_scraper import SapporoKyobunScraper
+from python_scrapers.tokyo_scraper import TokyoMusicScraper
+
+SCRAPERS = {cls.__name__: cls for cls in (SapporoKyobunScraper, TokyoMusicScraper, OsakaMusicScraper)}
+
+
+def _parse(scraper, parser, args, content):
+    events = getattr(scraper, parser)(scraper.make_soup(content), *args)
+    # アーティストはsetで重複除去しているため順序を揃える
+    return [dict(event, artists=sorted(event['artists'])) for event in events]
+
+
+@pytest.mark.parametrize('region, class_name, parser, args, content', region_pages(20))
+@pytest.mark.parametrize('backend', ['html.parser', 'lxml'])
+def test_strained_parse_matches_full_parse(region, class_name, parser, args, content, backend):
+    reference = SCRAPERS[class_name]()
+    reference.parser_backend = 'html.parser'
+    reference.parse_only = None
+    expected = _parse(reference, parser, args, content)
+    assert len(expected) == 20
+
+    scraper = SCRAPERS[class_name]()
+    scraper.parser_backend = backend
+    assert _parse(scraper, parser, args, content) == expected
+
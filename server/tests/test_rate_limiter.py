@@ -0,0 +1,81 @@
+"""
+HostRateLimiter のテスト
+"""
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+
+import pytest
+
+from python_scrapers import rate_limiter
+from python_scrapers.rate_limiter import HostRateLimiter, parse_retry_after
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter.time, 'monotonic', clock)
+    return clock
+
+
+def test_waits_only_after_burst_is_used(clock):
+    limiter = HostRateLimiter(rate=2, burst=3)
+    assert [limiter.reserve('example.com') for _ in range(3)] == [0.0, 0.0, 0.0]
+    # 予算を使い切った後は、補充を待つ分だけ順に後ろに並ぶ
+    assert limiter.reserve('example.com') == pytest.approx(0.5)
+    assert limiter.reserve('example.com') == pytest.approx(1.0)
+
+
+def test_tokens_are_refilled_over_time(clock):
+    limiter = HostRateLimiter(rate=2, burst=2)
+    limiter.reserve('example.com')
+    limiter.reserve('example.com')
+    clock.now += 0.5
+    assert limiter.reserve('example.com') == 0.0
+    assert limiter.reserve('example.com') == pytest.approx(0.5)
+    # 長く空いてもburstを超えては貯まらない
+    clock.now += 60
+    assert [limiter.reserve('example.com') for _ in range(3)] == [0.0, 0.0, pytest.approx(0.5)]
+
+
+def test_hosts_have_independent_budgets(clock):
+    limiter = HostRateLimiter(rate=1, burst=1)
+    assert limiter.reserve('a.example.com') == 0.0
+    assert limiter.reserve('a.example.com') == pytest.approx(1.0)
+    assert limiter.reserve('b.example.com') == 0.0
+    limiter.configure('c.example.com', rate=10, burst=5)
+    assert [limiter.reserve('c.example.com') for _ in range(5)] == [0.0] * 5
+    assert limiter.report()['a.example.com']['throttled_seconds'] == 1.0
+
+
+def test_backoff_blocks_host_and_recovers(clock):
+    limiter = HostRateLimiter(rate=1, burst=5)
+    assert limiter.backoff('example.com', retry_after=30) == 30
+    assert limiter.reserve('example.com') == pytest.approx(30)
+    assert limiter.reserve('other.example.com') == 0.0
+    # Retry-Afterがなければ連続失敗回数に応じて延ばす
+    assert limiter.backoff('example.com') == pytest.approx(4.0)
+    assert limiter._buckets['example.com'].rate == 0.25
+
+    limiter.success('example.com')
+    limiter.success('example.com')
+    limiter.success('example.com')
+    assert limiter._buckets['example.com'].rate == 1
+    assert limiter.report()['example.com']['backoffs'] == 2
+
+
+def test_parse_retry_after():
+    assert parse_retry_after('120') == 120.0
+    assert parse_retry_after('') is None
+    assert parse_retry_after('soon') is None
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=60)
+    assert 55 <= parse_retry_after(format_datetime(retry_at, usegmt=True)) <= 60
+    past = datetime.now(timezone.utc) - timedelta(seconds=60)
+    assert parse_retry_after(format_datetime(past, usegmt=True)) == 0.0
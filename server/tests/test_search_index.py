@@ -0,0 +1,20 @@
+"""
+SearchIndex のテスト
+"""
+from python_scrapers.search_index import SearchIndex
+
+
+def _event(event_id, name, artists=()):
+    return {'id': event_id, 'name': name, 'artists': list(artists)}
+
+
+def test_update_removes_deleted_and_edited_documents(tmp_path):
+    index = SearchIndex(str(tmp_path))
+    index.rebuild([_event(1, 'ジャズナイト 1'), _event(2, 'ジャズナイト 2'), _event(3, 'ジャズナイト 3')])
+    index.update([_event(3, 'ロックナイト 3')], deleted=[2])
+
+    # ジャーナルから読み込み直しても同じ結果になる
+    for current in (index, SearchIndex.open(str(tmp_path))):
+        assert current.search('ジャズ', limit=2) == [(1, 1)]
+        assert current.search('ロック') == [(3, 1)]
+        assert len(current) == 2
@@ -0,0 +1,83 @@
+"""
+SqliteEventStore のテスト
+"""
+import json
+import sqlite3
+
+from python_scrapers.dedup import event_id
+from python_scrapers.sqlite_store import SqliteEventStore
+
+
+def _event(name, date='2024-08-12', region='東京', price='¥3,000', genre='ロック'):
+    return {'name': name, 'date': date, 'location': '会場', 'region': region, 'genre': genre,
+            'price': price, 'source': 'Tokyo Music Scraper', 'artists': [], 'links': []}
+
+
+def test_upsert_inserts_updates_and_skips_unchanged(tmp_path):
+    store = SqliteEventStore(str(tmp_path / 'events.db'))
+    result = store.upsert([_event('ロックナイト'), _event('ジャズナイト')])
+    assert result.stats() == {'inserted': 2, 'updated': 0, 'unchanged': 0}
+    assert store.count() == 2
+
+    result = store.upsert([_event('ロックナイト', price='¥4,000'), _event('ジャズナイト'), _event('クラシックの夕べ')])
+    assert result.stats() == {'inserted': 1, 'updated': 1, 'unchanged': 1}
+    events = {event['name']: event for event in store.iter_events()}
+    assert len(events) == 3
+    assert events['ロックナイト']['price'] == '¥4,000'
+    assert events['ロックナイト']['id'] == event_id(_event('ロックナイト'))
+    store.close()
+
+    # 再び開いても同じ内容が読める
+    store = SqliteEventStore(str(tmp_path / 'events.db'))
+    assert store.upsert([_event('ロックナイト', price='¥4,000')]).stats()['unchanged'] == 1
+    store.close()
+
+
+def test_export_json_matches_stored_events(tmp_path):
+    store = SqliteEventStore(str(tmp_path / 'events.db'))
+    filepath = str(tmp_path / 'events.json')
+    assert store.export_json(filepath) == 0
+    with open(filepath, 'r', encoding='utf-8') as f:
+        assert json.load(f) == []
+
+    store.upsert([_event('ロックナイト'), _event('ジャズナイト')])
+    assert store.export_json(filepath) == 2
+    with open(filepath, 'r', encoding='utf-8') as f:
+        assert json.load(f) == list(store.iter_events())
+    assert not (tmp_path / 'events.json.tmp').exists()
+
+
+def test_query_by_region_genre_and_date(tmp_path):
+    store = SqliteEventStore(str(tmp_path / 'events.db'))
+    store.upsert([
+        _event('ロックナイト', date='2024年8月20日'),
+        _event('ジャズナイト', date='2024-08-12', genre='ジャズ'),
+        _event('なにわロック', date='2024-08-15', region='大阪'),
+        _event('日程未定ライブ', date='日程未定'),
+    ])
+    assert [event['name'] for event in store.query(region='東京', date_from='2024-08-01', date_to='2024-08-31')] == [
+        'ジャズナイト', 'ロックナイト']
+    assert [event['name'] for event in store.query(genre='ロック', date_to='2024-08-15')] == ['なにわロック']
+    # 読み取れない日付は日付の範囲検索に含めない
+    date_iso = store.connection.execute("SELECT date_iso FROM events WHERE name = '日程未定ライブ'").fetchone()[0]
+    assert date_iso is None
+    assert len(store.query(region='東京')) == 3
+
+
+def test_old_keys_are_migrated(tmp_path):
+    path = str(tmp_path / 'events.db')
+    store = SqliteEventStore(path)
+    store.upsert([_event('ロックナイト', date='2024年8月12日')])
+    store.close()
+    # キーの形式が変わる前のデータベースにする
+    connection = sqlite3.connect(path)
+    with connection:
+        connection.execute("UPDATE events SET dedup_key = 'old'")
+        connection.execute("PRAGMA user_version = 0")
+    connection.close()
+
+    store = SqliteEventStore(path)
+    # IDが違っても、日付の書き方が違う同じイベントはキーで既存の行が見つかる
+    result = store.upsert([dict(_event('ロックナイト', date='2024-08-12'), id=7)])
+    assert result.stats() == {'inserted': 0, 'updated': 1, 'unchanged': 0}
+    assert store.count() == 1
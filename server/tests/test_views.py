@@ -0,0 +1,41 @@
+"""
+MaterializedViews のテスト
+"""
+import json
+
+from python_scrapers.views import MaterializedViews
+
+
+def _event(event_id, date, region='東京', genre='ロック'):
+    return {'id': event_id, 'name': f"イベント{event_id}", 'date': date, 'dateISO': date,
+            'region': region, 'genre': genre}
+
+
+def _ids(directory, path):
+    with open(directory / path, encoding='utf-8') as f:
+        return [event['id'] for event in json.load(f)['events']]
+
+
+def test_update_removes_deleted_events(tmp_path):
+    views = MaterializedViews(str(tmp_path))
+    views.rebuild([_event(1, '2026-11-01'), _event(2, '2026-11-02')], today='2026-10-01')
+
+    views = MaterializedViews(str(tmp_path))
+    views.update([], deleted=[2], today='2026-10-01')
+    assert _ids(tmp_path, 'month/2026-11.json') == [1]
+    assert _ids(tmp_path, 'region/東京/2026-11.json') == [1]
+    assert _ids(tmp_path, 'upcoming.json') == [1]
+
+
+def test_update_moves_edited_events(tmp_path):
+    views = MaterializedViews(str(tmp_path))
+    views.rebuild([_event(1, '2026-11-01'), _event(2, '2026-11-02')], today='2026-10-01')
+
+    # 日付と地域を変更したイベントは以前のビューから消え、新しいビューに入る
+    views = MaterializedViews(str(tmp_path))
+    views.update([_event(2, '2026-12-05', region='大阪')], today='2026-10-01')
+    assert _ids(tmp_path, 'month/2026-11.json') == [1]
+    assert _ids(tmp_path, 'month/2026-12.json') == [2]
+    assert not (tmp_path / 'region/東京/2026-12.json').exists()
+    assert _ids(tmp_path, 'region/大阪/2026-12.json') == [2]
+    assert _ids(tmp_path, 'upcoming.json') == [1, 2]